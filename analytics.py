@@ -0,0 +1,142 @@
+import math
+import threading
+
+import numpy as np
+
+from columnar import MISSING
+
+
+class OrderAggregates:
+    """Running totals over the order history, updated per order event.
+
+    Every counter is adjusted on insert and on status/driver transitions so
+    the admin dashboard reads them in O(1); `rebuild` recomputes them from
+    scratch and `verify` compares the two.
+    """
+
+    def __init__(self, orders=()):
+        self._lock = threading.Lock()
+        self.rebuild(orders)
+
+    def _reset(self):
+        self.order_count = 0
+        self.total_revenue = 0.0
+        self.total_delivery_fees = 0.0
+        self.count_by_status = {}
+        self.revenue_by_product = {}
+        self.units_by_product = {}
+        self.revenue_by_pickup_city = {}
+        self.revenue_by_delivery_city = {}
+        self.fees_by_driver = {}
+
+    @staticmethod
+    def _bump(counter, key, delta):
+        value = counter.get(key, 0) + delta
+        if value:
+            counter[key] = value
+        else:
+            counter.pop(key, None)
+
+    def _add(self, order, sign=1):
+        self.order_count += sign
+        self.total_revenue += sign * order['grand_total']
+        self.total_delivery_fees += sign * order['delivery_charge']
+        self._bump(self.count_by_status, order['status'], sign)
+        self._bump(self.revenue_by_product, order['product_name'], sign * order['grand_total'])
+        self._bump(self.units_by_product, order['product_name'], sign * order['quantity'])
+        self._bump(self.revenue_by_pickup_city, order['pickup_location'], sign * order['grand_total'])
+        self._bump(self.revenue_by_delivery_city, order['delivery_location'], sign * order['grand_total'])
+        if order.get('driver_id') is not None:
+            self._bump(self.fees_by_driver, order['driver_id'], sign * order['delivery_charge'])
+
+    def order_placed(self, order):
+        with self._lock:
+            self._add(order)
+
+    def order_updated(self, old, new):
+        if old.get('status') == new.get('status') and old.get('driver_id') == new.get('driver_id'):
+            return
+        with self._lock:
+            self._bump(self.count_by_status, old['status'], -1)
+            self._bump(self.count_by_status, new['status'], 1)
+            if old.get('driver_id') is not None:
+                self._bump(self.fees_by_driver, old['driver_id'], -old['delivery_charge'])
+            if new.get('driver_id') is not None:
+                self._bump(self.fees_by_driver, new['driver_id'], new['delivery_charge'])
+
+    def order_deleted(self, order):
+        with self._lock:
+            self._add(order, sign=-1)
+
+    def on_order_event(self, event, old, new):
+        # 'archived' orders are still part of the history the counters cover.
+        if event == 'created':
+            self.order_placed(new)
+        elif event == 'updated':
+            self.order_updated(old, new)
+        elif event == 'deleted':
+            self.order_deleted(old)
+
+    def rebuild(self, orders):
+        with self._lock:
+            self._reset()
+            for order in orders:
+                self._add(order)
+
+    def rebuild_from_columns(self, store):
+        """Recompute the counters from a ColumnStore of orders, one bincount per counter."""
+        columns, live = store.view(('status', 'product_name', 'pickup_location', 'delivery_location', 'quantity', 'grand_total', 'delivery_charge', 'driver_id'))
+        columns = {field: column[live] for field, column in columns.items()}
+
+        def totals(field, weights=None):
+            categories = store.categories[field]
+            sums = np.bincount(columns[field], weights=weights, minlength=len(categories))
+            if weights is None or weights.dtype.kind == 'i':
+                sums = sums.astype(np.int64)
+            return {value: total for value, total in zip(categories, sums.tolist()) if total}
+
+        assigned = columns['driver_id'] != MISSING
+        driver_ids, driver_codes = np.unique(columns['driver_id'][assigned], return_inverse=True)
+        driver_fees = np.bincount(driver_codes, weights=columns['delivery_charge'][assigned], minlength=len(driver_ids))
+        with self._lock:
+            self._reset()
+            self.order_count = int(live.sum())
+            self.total_revenue = float(columns['grand_total'].sum())
+            self.total_delivery_fees = float(columns['delivery_charge'].sum())
+            self.count_by_status = totals('status')
+            self.revenue_by_product = totals('product_name', columns['grand_total'])
+            self.units_by_product = totals('product_name', columns['quantity'])
+            self.revenue_by_pickup_city = totals('pickup_location', columns['grand_total'])
+            self.revenue_by_delivery_city = totals('delivery_location', columns['grand_total'])
+            self.fees_by_driver = {driver_id: fee for driver_id, fee in zip(driver_ids.tolist(), driver_fees.tolist()) if fee}
+
+    def status_counts(self):
+        with self._lock:
+            return dict(self.count_by_status)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'order_count': self.order_count,
+                'total_revenue': self.total_revenue,
+                'total_delivery_fees': self.total_delivery_fees,
+                'count_by_status': dict(self.count_by_status),
+                'revenue_by_product': dict(self.revenue_by_product),
+                'units_by_product': dict(self.units_by_product),
+                'revenue_by_pickup_city': dict(self.revenue_by_pickup_city),
+                'revenue_by_delivery_city': dict(self.revenue_by_delivery_city),
+                'fees_by_driver': dict(self.fees_by_driver)
+            }
+
+    def verify(self, orders):
+        """Return the names of counters that disagree with a fresh rebuild from `orders`."""
+        expected = OrderAggregates(orders).snapshot()
+        actual = self.snapshot()
+        return [name for name in expected if not _close(expected[name], actual[name])]
+
+
+def _close(expected, actual):
+    if isinstance(expected, dict):
+        keys = set(expected) | set(actual)
+        return all(_close(expected.get(key, 0), actual.get(key, 0)) for key in keys)
+    return math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-6)
@@ -0,0 +1,436 @@
+"""JSON API over the same repositories, pricing and reservations as the Streamlit app.
+
+Set INDE_API_PORT to serve it from inside the Streamlit process; both
+interfaces then share one in-memory state. There is no standalone mode:
+a second process would load its own copy of that state and drift from
+the app's.
+"""
+import io
+import itertools
+import threading
+import uuid
+
+from flask import Flask, Response, jsonify, request
+from werkzeug.exceptions import HTTPException
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from bulk_io import FORMATS, export_orders, export_products, import_products
+from cache import VERSIONS
+from distances import ASSAM_CITIES
+from gazetteer import MAX_SUGGESTIONS, get_gazetteer, nearest_hub
+from matching import get_matching_engine
+from pagination import paginate
+from pricing import batch_quote, calculate_total_price, delivery_coordinates, quote_cart
+from repository import ORDER_STATUSES, get_repositories, new_order, new_parent_order
+from reservations import ReservationError, get_reservations
+from storage import InsufficientStockError
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_BATCH_REQUESTS = 100
+MAX_BULK_QUOTES = 10000
+MAX_CART_LINES = 100
+MAX_EVENT_WAIT = 30
+
+# Versions restart at zero with the process, so ETags carry a per-boot token.
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+
+def _json_body():
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        raise ApiError("Request body must be a JSON object")
+    return body
+
+
+def _int_arg(value, name, minimum=None, maximum=None):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ApiError(f"'{name}' must be an integer")
+    if minimum is not None and value < minimum:
+        raise ApiError(f"'{name}' must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise ApiError(f"'{name}' must be at most {maximum}")
+    return value
+
+
+def _not_modified(etag):
+    """A 304 response if the client already holds `etag`, else None."""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+    return None
+
+
+def _with_etag(payload, etag):
+    response = jsonify(payload)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = "no-cache"
+    return response
+
+
+def create_app(repos=None, reservations=None, matcher=None):
+    repos = repos or get_repositories()
+    reservations = reservations or get_reservations()
+    matcher = matcher or get_matching_engine()
+    app = Flask(__name__)
+    app.json.sort_keys = False
+
+    def product_or_404(product_id):
+        product = repos.products.get(product_id)
+        if product is None:
+            raise ApiError(f"Unknown product #{product_id}", 404)
+        return product
+
+    def order_or_404(order_id):
+        order = repos.orders.get(order_id)
+        if order is None:
+            raise ApiError(f"Unknown order #{order_id}", 404)
+        return order
+
+    def driver_or_404(driver_id):
+        driver = repos.drivers.get(driver_id)
+        if driver is None:
+            raise ApiError(f"Unknown driver #{driver_id}", 404)
+        return driver
+
+    def checked_item(item):
+        if not isinstance(item, dict):
+            raise ApiError("Each quote item must be a JSON object")
+        product = product_or_404(_int_arg(item.get('product_id'), 'product_id'))
+        quantity = _int_arg(item.get('quantity', product['min_quantity']), 'quantity', minimum=product['min_quantity'])
+        delivery_location = item.get('delivery_location')
+        if not isinstance(delivery_location, str):
+            raise ApiError("'delivery_location' must be a string")
+        if delivery_location not in ASSAM_CITIES and get_gazetteer().resolve(delivery_location) is None:
+            raise ApiError(f"Unknown delivery location: {delivery_location}")
+        return product, quantity, delivery_location
+
+    def checked_cart(body):
+        lines = body.get('lines')
+        if not isinstance(lines, list) or not lines:
+            raise ApiError("'lines' must be a non-empty list")
+        if len(lines) > MAX_CART_LINES:
+            raise ApiError(f"At most {MAX_CART_LINES} lines per cart")
+        delivery_location = body.get('delivery_location')
+        checked = [checked_item(dict(line, delivery_location=delivery_location) if isinstance(line, dict) else line) for line in lines]
+        catalog = {product['id']: product for product, _, _ in checked}
+        return catalog, [(product['id'], quantity) for product, quantity, _ in checked], delivery_location
+
+    def buyer_details(body):
+        missing = [field for field in ('buyer_name', 'buyer_phone', 'delivery_address') if not body.get(field)]
+        if missing:
+            raise ApiError(f"Missing buyer details: {', '.join(missing)}")
+        return body['buyer_name'], body['buyer_phone'], body['delivery_address']
+
+    def routed(delivery_location, delivery_address):
+        if delivery_location in ASSAM_CITIES:
+            return delivery_location, delivery_address
+        # Orders are routed through hubs; keep the exact place in the address.
+        place = get_gazetteer().resolve(delivery_location)
+        return nearest_hub(delivery_coordinates(delivery_location)), f"{delivery_address}, {place['label']}"
+
+    @app.errorhandler(ApiError)
+    def api_error(error):
+        return jsonify({'error': error.message}), error.status
+
+    @app.errorhandler(HTTPException)
+    def http_error(error):
+        return jsonify({'error': error.description}), error.code
+
+    # Catalog
+
+    @app.get("/api/products")
+    def list_products():
+        etag = f"catalog-{BOOT_ID}-{VERSIONS.get('catalog')}"
+        cached = _not_modified(etag)
+        if cached is not None:
+            return cached
+        products = repos.products.list(
+            category=request.args.get('category') or None,
+            location=request.args.get('location') or None,
+            search=request.args.get('search', "")
+        )
+        page = paginate(
+            products,
+            _int_arg(request.args.get('page', 1), 'page', minimum=1),
+            _int_arg(request.args.get('page_size', DEFAULT_PAGE_SIZE), 'page_size', minimum=1, maximum=MAX_PAGE_SIZE)
+        )
+        return _with_etag({
+            'items': page.items,
+            'page': page.number,
+            'page_size': page.page_size,
+            'page_count': page.page_count,
+            'total': page.total
+        }, etag)
+
+    @app.get("/api/products/<int:product_id>")
+    def get_product(product_id):
+        etag = f"catalog-{BOOT_ID}-{VERSIONS.get('catalog')}"
+        cached = _not_modified(etag)
+        if cached is not None:
+            return cached
+        return _with_etag(product_or_404(product_id), etag)
+
+    @app.post("/api/products/import")
+    def bulk_import():
+        fmt = request.args.get('format', 'csv')
+        if fmt not in FORMATS:
+            raise ApiError(f"'format' must be one of: {', '.join(FORMATS)}")
+        # CSV is parsed straight off the request stream; Parquet needs a seekable file.
+        source = request.stream if fmt == 'csv' else io.BytesIO(request.get_data())
+        try:
+            report = import_products(repos, source, fmt)
+        except ValueError as error:
+            raise ApiError(str(error))
+        return jsonify(report)
+
+    def export_response(exporter, name):
+        fmt = request.args.get('format', 'csv')
+        if fmt not in FORMATS:
+            raise ApiError(f"'format' must be one of: {', '.join(FORMATS)}")
+        return Response(
+            exporter(repos.storage, fmt),
+            mimetype="text/csv" if fmt == 'csv' else "application/vnd.apache.parquet",
+            headers={'Content-Disposition': f"attachment; filename=inde_{name}.{fmt}"}
+        )
+
+    @app.get("/api/products/export")
+    def export_product_catalog():
+        return export_response(export_products, "products")
+
+    @app.get("/api/orders/export")
+    def export_order_history():
+        return export_response(export_orders, "orders")
+
+    # Places
+
+    @app.get("/api/places")
+    def search_places():
+        limit = _int_arg(request.args.get('limit', MAX_SUGGESTIONS), 'limit', minimum=1, maximum=MAX_PAGE_SIZE)
+        places = get_gazetteer().search(request.args.get('q', ""), limit)
+        return jsonify({'places': [dict(place, hub=nearest_hub(place['coordinates'])) for place in places]})
+
+    # Quotes
+
+    @app.post("/api/quote")
+    def quote():
+        product, quantity, delivery_location = checked_item(_json_body())
+        pricing = calculate_total_price(product, quantity, delivery_location)
+        return jsonify(dict(pricing, product_id=product['id'], quantity=quantity, delivery_location=delivery_location))
+
+    @app.post("/api/quotes")
+    def bulk_quote():
+        items = _json_body().get('items')
+        if not isinstance(items, list) or not items:
+            raise ApiError("'items' must be a non-empty list")
+        if len(items) > MAX_BULK_QUOTES:
+            raise ApiError(f"At most {MAX_BULK_QUOTES} items per request")
+        checked = [checked_item(item) for item in items]
+        quotes = batch_quote(
+            {product['id']: product for product, _, _ in checked},
+            [product['id'] for product, _, _ in checked],
+            [quantity for _, quantity, _ in checked],
+            [delivery_location for _, _, delivery_location in checked]
+        )
+        return jsonify({'quotes': quotes.to_dict(orient='records')})
+
+    # Orders
+
+    @app.post("/api/reservations")
+    def reserve():
+        body = _json_body()
+        product = product_or_404(_int_arg(body.get('product_id'), 'product_id'))
+        quantity = _int_arg(body.get('quantity'), 'quantity', minimum=product['min_quantity'])
+        holder = body.get('holder') or uuid.uuid4().hex
+        try:
+            reservation = reservations.reserve(product['id'], quantity, holder)
+        except InsufficientStockError as error:
+            raise ApiError(str(error), 409)
+        return jsonify({
+            'reservation_id': reservation.id,
+            'product_id': reservation.product_id,
+            'quantity': reservation.quantity,
+            'holder': holder,
+            'expires_in': round(reservation.expires_at - reservations.clock(), 1)
+        }), 201
+
+    @app.delete("/api/reservations/<int:reservation_id>")
+    def release(reservation_id):
+        if not reservations.release(reservation_id):
+            raise ApiError(f"Unknown reservation #{reservation_id}", 404)
+        return "", 204
+
+    @app.post("/api/orders")
+    def place_order():
+        body = _json_body()
+        product, quantity, delivery_location = checked_item(body)
+        buyer_name, buyer_phone, delivery_address = buyer_details(body)
+        pricing = calculate_total_price(product, quantity, delivery_location)
+        delivery_location, delivery_address = routed(delivery_location, delivery_address)
+        order = new_order(product, quantity, delivery_location, pricing, buyer_name, buyer_phone, delivery_address)
+        try:
+            if body.get('reservation_id') is not None:
+                order = reservations.confirm(_int_arg(body['reservation_id'], 'reservation_id'), order)
+            else:
+                order = reservations.place(order, body.get('holder'))
+        except InsufficientStockError as error:
+            raise ApiError(str(error), 409)
+        except ReservationError as error:
+            raise ApiError(str(error), 409)
+        return jsonify(order), 201
+
+    # Carts
+
+    @app.post("/api/carts/quote")
+    def quote_cart_lines():
+        catalog, lines, delivery_location = checked_cart(_json_body())
+        return jsonify(dict(quote_cart(catalog, lines, delivery_location), delivery_location=delivery_location))
+
+    @app.post("/api/carts/checkout")
+    def checkout_cart():
+        body = _json_body()
+        catalog, lines, delivery_location = checked_cart(body)
+        buyer_name, buyer_phone, delivery_address = buyer_details(body)
+        cart_quote = quote_cart(catalog, lines, delivery_location)
+        delivery_location, delivery_address = routed(delivery_location, delivery_address)
+        parent, shipments = new_parent_order(catalog, cart_quote, delivery_location, buyer_name, buyer_phone, delivery_address)
+        try:
+            if body.get('reservation_ids') is not None:
+                if not isinstance(body['reservation_ids'], list):
+                    raise ApiError("'reservation_ids' must be a list")
+                reservation_ids = [_int_arg(reservation_id, 'reservation_ids') for reservation_id in body['reservation_ids']]
+                parent, orders = reservations.confirm_many(reservation_ids, parent, shipments)
+            else:
+                parent, orders = reservations.place_parent(parent, shipments, body.get('holder'))
+        except InsufficientStockError as error:
+            raise ApiError(str(error), 409)
+        except ReservationError as error:
+            raise ApiError(str(error), 409)
+        return jsonify(dict(parent, orders=orders)), 201
+
+    @app.get("/api/parent-orders/<int:parent_id>")
+    def get_parent_order(parent_id):
+        parent = repos.orders.get_parent(parent_id)
+        if parent is None:
+            raise ApiError(f"Unknown parent order #{parent_id}", 404)
+        return jsonify(parent)
+
+    @app.get("/api/orders/<int:order_id>")
+    def get_order(order_id):
+        return jsonify(order_or_404(order_id))
+
+    @app.post("/api/orders/<int:order_id>/status")
+    def update_status(order_id):
+        order = order_or_404(order_id)
+        body = _json_body()
+        status = body.get('status')
+        if status not in ORDER_STATUSES:
+            raise ApiError(f"Status must be one of: {', '.join(ORDER_STATUSES)}")
+        if order['status'] == 'Order Placed':
+            raise ApiError("Open jobs must be claimed by a driver first", 409)
+        driver_id = _int_arg(body.get('driver_id'), 'driver_id')
+        if driver_id != order['driver_id']:
+            raise ApiError(f"Order #{order_id} is assigned to another driver", 403)
+        if ORDER_STATUSES.index(status) <= ORDER_STATUSES.index(order['status']):
+            raise ApiError(f"Order #{order_id} is already '{order['status']}'; status can only move forward", 409)
+        if order_id not in repos.orders.table:
+            raise ApiError(f"Order #{order_id} is archived and can no longer change", 409)
+        return jsonify(repos.orders.update_status(order_id, status))
+
+    # Jobs
+
+    @app.get("/api/jobs")
+    def list_jobs():
+        limit = _int_arg(request.args.get('limit', DEFAULT_PAGE_SIZE), 'limit', minimum=1, maximum=MAX_PAGE_SIZE)
+        if request.args.get('driver_id') is None:
+            jobs = (repos.orders.as_job(order) for order in repos.orders.list(status='Order Placed'))
+            return jsonify({'jobs': [{'order': job} for job in itertools.islice(filter(None, jobs), limit)]})
+        driver = driver_or_404(_int_arg(request.args['driver_id'], 'driver_id'))
+        return jsonify({'jobs': matcher.jobs_for_driver(driver, limit=limit)})
+
+    @app.post("/api/jobs/<int:order_id>/claim")
+    def claim_job(order_id):
+        order_or_404(order_id)
+        driver = driver_or_404(_int_arg(_json_body().get('driver_id'), 'driver_id'))
+        winner = repos.feed.claim(repos.orders, order_id, driver['id'])
+        if winner is None:
+            raise ApiError(f"Order #{order_id} has already been accepted by another driver", 409)
+        if winner['driver_id'] != driver['id']:
+            raise ApiError(f"Order #{order_id} has already been accepted by driver #{winner['driver_id']}", 409)
+        return jsonify(repos.orders.get(order_id))
+
+    # Change feed
+
+    @app.get("/api/events")
+    def list_events():
+        since = _int_arg(request.args.get('since', 0), 'since', minimum=0)
+        wait = _int_arg(request.args.get('wait', 0), 'wait', minimum=0, maximum=MAX_EVENT_WAIT)
+        if wait:
+            repos.feed.wait(since, wait)
+        events = repos.feed.since(since) if since <= repos.feed.sequence else None
+        if events is None:
+            # The caller fell behind the ring or the process restarted: it must
+            # re-read state and resume from the returned sequence.
+            return jsonify({'sequence': repos.feed.sequence, 'events': [], 'reset': True})
+        return jsonify({'sequence': events[-1]['seq'] if events else since, 'events': events, 'reset': False})
+
+    # Batching
+
+    @app.post("/api/batch")
+    def batch():
+        calls = _json_body().get('requests')
+        if not isinstance(calls, list) or not calls:
+            raise ApiError("'requests' must be a non-empty list")
+        if len(calls) > MAX_BATCH_REQUESTS:
+            raise ApiError(f"At most {MAX_BATCH_REQUESTS} requests per batch")
+        client = app.test_client()
+        responses = []
+        for call in calls:
+            if not isinstance(call, dict) or not str(call.get('path', "")).startswith("/api/") or call['path'].startswith("/api/batch"):
+                responses.append({'status': 400, 'body': {'error': "Each request needs a 'path' under /api/"}})
+                continue
+            response = client.open(
+                call['path'],
+                method=call.get('method', "GET").upper(),
+                json=call.get('body'),
+                headers={'If-None-Match': call['if_none_match']} if call.get('if_none_match') else None
+            )
+            responses.append({
+                'status': response.status_code,
+                'etag': response.headers.get('ETag'),
+                'body': response.get_json(silent=True)
+            })
+        return jsonify({'responses': responses})
+
+    return app
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_api_server(host="127.0.0.1", port=8000):
+    """Serve the API from a daemon thread in this process; later calls return the running server."""
+    global _server
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                server = make_server(host, port, create_app(), threaded=True, request_handler=KeepAliveRequestHandler)
+                threading.Thread(target=server.serve_forever, name="inde-api", daemon=True).start()
+                _server = server
+    return _server
+
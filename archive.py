@@ -0,0 +1,224 @@
+import bisect
+import json
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+BLOCK_ROWS = 1000
+SEGMENT_ROWS = 50000
+CACHED_BLOCKS = 64
+
+SEGMENT_SUFFIX = ".seg"
+MAGIC = b"INDESEG1"
+FOOTER_LENGTH = struct.Struct("<Q")
+
+DATE_FIELDS = ('placed_at', 'delivered_at')
+
+
+def _block_rows(columns):
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+class Segment:
+    """One sealed segment file and its sparse index.
+
+    The index holds one entry per block: where the block sits in the file,
+    its id range and its placed/delivered date ranges. Rows inside a
+    segment are sorted by id, so block id ranges are disjoint and `first_ids`
+    can be bisected.
+    """
+
+    def __init__(self, path, blocks):
+        self.path = path
+        self.blocks = blocks
+        self.first_ids = [block['first_id'] for block in blocks]
+        self.rows = sum(block['rows'] for block in blocks)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as file:
+            file.seek(-FOOTER_LENGTH.size, os.SEEK_END)
+            length, = FOOTER_LENGTH.unpack(file.read(FOOTER_LENGTH.size))
+            file.seek(-FOOTER_LENGTH.size - length, os.SEEK_END)
+            return cls(path, json.loads(file.read(length))['blocks'])
+
+    def block_for(self, order_id):
+        i = bisect.bisect_right(self.first_ids, order_id) - 1
+        if i >= 0 and order_id <= self.blocks[i]['last_id']:
+            return i
+        return None
+
+
+class OrderArchive:
+    """Append-only, compressed segment files for orders that are done changing.
+
+    Each `append` seals one or more segment files of at most SEGMENT_ROWS
+    orders. A segment is a run of zlib-compressed JSON blocks of BLOCK_ROWS
+    orders each, stored a column at a time, followed by its sparse index.
+    Files are written under a temporary name and renamed once synced, so a
+    segment is either complete or absent; nothing is ever rewritten.
+
+    Lookups by id or date only decompress the blocks whose ranges match,
+    and recently decoded blocks are kept in a small LRU.
+    """
+
+    def __init__(self, directory, fields):
+        self.directory = directory
+        self.fields = list(fields)
+        self.segments = []
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if name.endswith(SEGMENT_SUFFIX):
+                    self.segments.append(Segment.open(path))
+                elif name.endswith(SEGMENT_SUFFIX + ".tmp"):
+                    # Left behind by a crash before the rename.
+                    os.remove(path)
+
+    def __len__(self):
+        return sum(segment.rows for segment in self.segments)
+
+    def __contains__(self, order_id):
+        return self.get(order_id) is not None
+
+    # Writing
+
+    def _encode_block(self, orders):
+        columns = {field: [order[field] for order in orders] for field in self.fields}
+        entry = {'rows': len(orders), 'first_id': orders[0]['id'], 'last_id': orders[-1]['id']}
+        for field in DATE_FIELDS:
+            times = [value for value in columns[field] if value is not None]
+            entry[field] = [min(times), max(times)] if times else None
+        return zlib.compress(json.dumps(columns, separators=(',', ':')).encode()), entry
+
+    def _decode_block(self, data):
+        columns = json.loads(zlib.decompress(data))
+        # Fields added to orders after a segment was written read as None.
+        for field in self.fields:
+            if field not in columns:
+                columns[field] = [None] * len(columns['id'])
+        return columns
+
+    def _write_segment(self, orders):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"segment-{len(self.segments) + 1:06d}{SEGMENT_SUFFIX}")
+        blocks = []
+        with open(path + ".tmp", 'wb') as file:
+            file.write(MAGIC)
+            for start in range(0, len(orders), BLOCK_ROWS):
+                data, entry = self._encode_block(orders[start:start + BLOCK_ROWS])
+                entry.update(offset=file.tell(), length=len(data))
+                file.write(data)
+                blocks.append(entry)
+            footer = json.dumps({'fields': self.fields, 'blocks': blocks}).encode()
+            file.write(footer)
+            file.write(FOOTER_LENGTH.pack(len(footer)))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + ".tmp", path)
+        return Segment(path, blocks)
+
+    def append(self, orders):
+        """Seal `orders` into new segment files; returns once they are on disk."""
+        orders = sorted(orders, key=lambda order: order['id'])
+        with self._lock:
+            for start in range(0, len(orders), SEGMENT_ROWS):
+                # Readers iterate over whatever list they picked up, so swap in a new one.
+                self.segments = self.segments + [self._write_segment(orders[start:start + SEGMENT_ROWS])]
+            if hasattr(os, 'O_DIRECTORY') and orders:
+                descriptor = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(descriptor)
+                finally:
+                    os.close(descriptor)
+
+    # Reading
+
+    def _columns(self, segment, i):
+        key = (segment.path, i)
+        with self._lock:
+            columns = self._blocks.get(key)
+            if columns is not None:
+                self._blocks.move_to_end(key)
+                return columns
+        block = segment.blocks[i]
+        with open(segment.path, 'rb') as file:
+            file.seek(block['offset'])
+            columns = self._decode_block(file.read(block['length']))
+        with self._lock:
+            self._blocks[key] = columns
+            if len(self._blocks) > CACHED_BLOCKS:
+                self._blocks.popitem(last=False)
+        return columns
+
+    def get(self, order_id):
+        for segment in self.segments:
+            i = segment.block_for(order_id)
+            if i is None:
+                continue
+            columns = self._columns(segment, i)
+            j = bisect.bisect_left(columns['id'], order_id)
+            if j < len(columns['id']) and columns['id'][j] == order_id:
+                return {field: values[j] for field, values in columns.items()}
+        return None
+
+    def iter_columns(self, segments=None):
+        """Every archived block (of `segments`, default all) as a dict of column lists, oldest segment first."""
+        for segment in self.segments if segments is None else segments:
+            with open(segment.path, 'rb') as file:
+                for block in segment.blocks:
+                    file.seek(block['offset'])
+                    yield self._decode_block(file.read(block['length']))
+
+    def iter_batches(self, segments=None):
+        """Every archived order, a block's worth of rows at a time."""
+        for columns in self.iter_columns(segments):
+            yield _block_rows(columns)
+
+    def _matching_blocks(self, start, end, field):
+        # Newest segment first; blocks whose range lies inside [start, end)
+        # are counted without being decompressed.
+        for segment in reversed(self.segments):
+            for i in reversed(range(len(segment.blocks))):
+                span = segment.blocks[i][field]
+                if span is None or span[1] < start or span[0] >= end:
+                    continue
+                yield segment, i, start <= span[0] and span[1] < end
+
+    def _block_matches(self, segment, i, start, end, field):
+        columns = self._columns(segment, i)
+        return [j for j, value in enumerate(columns[field]) if value is not None and start <= value < end]
+
+    def count(self, start, end, field='placed_at'):
+        """Number of archived orders with `field` in [start, end)."""
+        total = 0
+        for segment, i, inside in self._matching_blocks(start, end, field):
+            total += segment.blocks[i]['rows'] if inside else len(self._block_matches(segment, i, start, end, field))
+        return total
+
+    def between(self, start, end, field='placed_at', offset=0, limit=None):
+        """Archived orders with `field` in [start, end), most recently archived first.
+
+        `offset` and `limit` page through the matches; whole blocks before
+        the page are skipped using the index alone.
+        """
+        rows = []
+        for segment, i, inside in self._matching_blocks(start, end, field):
+            if limit is not None and len(rows) >= limit:
+                break
+            if inside and offset >= segment.blocks[i]['rows']:
+                offset -= segment.blocks[i]['rows']
+                continue
+            columns = self._columns(segment, i)
+            matches = self._block_matches(segment, i, start, end, field)[::-1]
+            if offset >= len(matches):
+                offset -= len(matches)
+                continue
+            for j in matches[offset:]:
+                rows.append({name: values[j] for name, values in columns.items()})
+            offset = 0
+        return rows if limit is None else rows[:limit]
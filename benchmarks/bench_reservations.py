@@ -0,0 +1,133 @@
+"""Contention benchmark: many threads hammering reservations on one hot SKU.
+
+    python benchmarks/bench_reservations.py --threads 32 --seconds 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository import Repositories
+from reservations import ReservationService
+from storage import InsufficientStockError, Storage
+
+HOT_PRODUCT_ID = 4
+
+
+def make_order(product, quantity):
+    placed_at = int(time.time())
+    return {
+        'product_id': product['id'],
+        'product_name': product['name'],
+        'buyer_name': 'Benchmark',
+        'buyer_phone': '0000000000',
+        'quantity': quantity,
+        'delivery_location': 'Guwahati',
+        'delivery_address': 'Benchmark',
+        'pickup_location': product['location'],
+        'product_total': product['price'] * quantity,
+        'delivery_charge': 0,
+        'grand_total': product['price'] * quantity,
+        'distance_km': 0,
+        'status': 'Order Placed',
+        'driver_id': None,
+        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(placed_at)),
+        'weight_kg': product['weight_kg'] * quantity,
+        'volume_m3': product['volume_m3'] * quantity,
+        'placed_at': placed_at,
+        'delivered_at': None,
+        'parent_id': None,
+        'shipment_id': None
+    }
+
+
+def run_threads(threads, target):
+    barrier = threading.Barrier(threads + 1)
+    results = [None] * threads
+
+    def worker(i):
+        barrier.wait()
+        results[i] = target(i)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def bench_holds(service, threads, seconds):
+    def hammer(i):
+        holder = f"bench-{i}"
+        done = rejected = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            try:
+                reservation = service.reserve(HOT_PRODUCT_ID, 1, holder)
+            except InsufficientStockError:
+                rejected += 1
+                continue
+            service.release(reservation.id)
+            done += 1
+        return done, rejected
+
+    results, elapsed = run_threads(threads, hammer)
+    done = sum(r[0] for r in results)
+    rejected = sum(r[1] for r in results)
+    print(f"reserve+release  threads={threads:<3} ops={done:<9} rejected={rejected:<6} {done / elapsed:>12,.0f} ops/s")
+
+
+def bench_oversell(service, repos, threads, stock, quantity):
+    repos.products.update(HOT_PRODUCT_ID, stock=stock)
+    product = repos.products.get(HOT_PRODUCT_ID)
+    attempts = (stock // quantity) * 2 // threads + 1
+
+    def buy(i):
+        placed = 0
+        for _ in range(attempts):
+            try:
+                service.place(make_order(product, quantity), holder=f"buyer-{i}")
+                placed += 1
+            except InsufficientStockError:
+                pass
+        return placed
+
+    results, elapsed = run_threads(threads, buy)
+    placed = sum(results)
+    remaining = repos.storage.get_product(HOT_PRODUCT_ID)['stock']
+    sold = placed * quantity
+    status = "OK" if sold + remaining == stock and remaining >= 0 else "OVERSOLD"
+    print(f"confirm orders   threads={threads:<3} placed={placed:<6} sold={sold} remaining={remaining} [{status}] {placed / elapsed:>8,.0f} orders/s")
+    return status == "OK"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--stock", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Storage(os.path.join(tmp, "bench.db"))
+        repos = Repositories(storage)
+        service = ReservationService(repos)
+        repos.products.update(HOT_PRODUCT_ID, stock=10 ** 9)
+
+        for threads in args.threads:
+            bench_holds(service, threads, args.seconds)
+        ok = all(bench_oversell(service, repos, threads, args.stock, 7) for threads in args.threads)
+        storage.pool.close()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Seeded synthetic catalogs, orders and drivers spread over ASSAM_CITIES."""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from distances import ASSAM_CITIES
+from matching import VEHICLE_CAPACITIES
+from pricing import batch_quote
+from repository import ORDER_STATUSES
+from storage import DRIVER_FIELDS, ORDER_FIELDS, PRODUCT_FIELDS, Storage
+from tariff import DEFAULT_TARIFF, CompiledTariff
+
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000}
+
+# category: (item names, units, price range ₹, kg per unit, m³ per unit, min order range)
+CATALOG = {
+    'Plants': (['Tea Saplings', 'Areca Seedlings', 'Bamboo Cuttings', 'Orchid Pots', 'Mango Grafts'], ['saplings', 'pots', 'bundles'], (50, 6000), (0.5, 30), (0.05, 2.0), (10, 100)),
+    'Furniture': (['Teak Chairs', 'Cane Sofa Set', 'Bamboo Shelves', 'Office Desks', 'Sal Wood Beds'], ['sets', 'pieces'], (1500, 60000), (8, 120), (0.3, 4.0), (1, 10)),
+    'Fertilizers': (['Organic Compost', 'Vermicompost', 'NPK Blend', 'Urea', 'Bone Meal'], ['bags'], (200, 2500), (25, 50), (0.03, 0.08), (10, 50)),
+    'Building Materials': (['Cement', 'Red Bricks', 'TMT Bars', 'River Sand', 'Roofing Sheets'], ['bags', 'units', 'bundles', 'tons'], (5, 70000), (1, 1000), (0.01, 1.5), (50, 500)),
+    'Agricultural Supplies': (['Drip Kits', 'Sprayers', 'Seed Trays', 'Mulch Film', 'Hand Tools'], ['kits', 'pieces', 'rolls'], (100, 9000), (0.5, 20), (0.01, 0.5), (5, 50)),
+    'Hardware': (['Nails', 'Hinges', 'PVC Pipes', 'Padlocks', 'Wire Rolls'], ['boxes', 'pieces', 'rolls'], (20, 4000), (0.2, 25), (0.005, 0.3), (10, 200))
+}
+GRADES = ['Premium', 'Standard', 'Economy', 'Heavy Duty', 'Export Grade', 'Local']
+FIRST_NAMES = ['Rahul', 'Priya', 'Amit', 'Bikash', 'Jyoti', 'Pranab', 'Dipankar', 'Rina', 'Manoj', 'Anjali']
+LAST_NAMES = ['Das', 'Sharma', 'Baruah', 'Gogoi', 'Kalita', 'Bora', 'Saikia', 'Deka', 'Hazarika', 'Nath']
+
+
+def generate_products(n, seed=0):
+    rng = np.random.default_rng(seed)
+    cities = list(ASSAM_CITIES)
+    categories = list(CATALOG)
+    products = []
+    for i in range(n):
+        category = categories[rng.integers(len(categories))]
+        names, units, (price_lo, price_hi), (kg_lo, kg_hi), (m3_lo, m3_hi), (min_lo, min_hi) = CATALOG[category]
+        location = cities[rng.integers(len(cities))]
+        min_quantity = int(rng.integers(min_lo, min_hi + 1))
+        products.append({
+            'name': f"{GRADES[rng.integers(len(GRADES))]} {names[rng.integers(len(names))]} #{i}",
+            'category': category,
+            'price': int(np.exp(rng.uniform(np.log(price_lo), np.log(price_hi)))),
+            'weight_kg': round(float(rng.uniform(kg_lo, kg_hi)), 2),
+            'volume_m3': round(float(rng.uniform(m3_lo, m3_hi)), 3),
+            'min_quantity': min_quantity,
+            'unit': units[rng.integers(len(units))],
+            'supplier': f"{LAST_NAMES[rng.integers(len(LAST_NAMES))]} Traders {location}",
+            'location': location,
+            'coordinates': ASSAM_CITIES[location],
+            'description': f"{category} from {location}",
+            'stock': int(min_quantity * rng.integers(5, 200))
+        })
+    return products
+
+
+def generate_drivers(n, seed=0):
+    rng = np.random.default_rng(seed + 1)
+    cities = list(ASSAM_CITIES)
+    vehicles = list(VEHICLE_CAPACITIES)
+    drivers = []
+    for i in range(n):
+        location = cities[rng.integers(len(cities))]
+        vehicle_type = vehicles[rng.integers(len(vehicles))]
+        capacity_kg, capacity_m3 = VEHICLE_CAPACITIES[vehicle_type]
+        drivers.append({
+            'name': f"{FIRST_NAMES[rng.integers(len(FIRST_NAMES))]} {LAST_NAMES[rng.integers(len(LAST_NAMES))]}",
+            'phone': f"9{rng.integers(10 ** 8, 10 ** 9):09d}",
+            'vehicle_type': vehicle_type,
+            'capacity_kg': capacity_kg,
+            'capacity_m3': capacity_m3,
+            'location': location,
+            'coordinates': ASSAM_CITIES[location],
+            'available': bool(rng.random() < 0.8)
+        })
+    return drivers
+
+
+def generate_orders(products, drivers, n, seed=0, now=None):
+    """Orders for `products` (which must carry ids), priced with the real pricing code.
+
+    Prices use DEFAULT_TARIFF rather than whatever tariff the local database
+    has saved, so generated data never depends on (or opens) that database.
+
+    Quantities are kept small enough that most orders fit on some vehicle.
+    Two in five orders are still open; the rest are spread over later statuses.
+    """
+    rng = np.random.default_rng(seed + 2)
+    now = now or datetime(2025, 1, 1)
+    cities = list(ASSAM_CITIES)
+    picks = rng.integers(len(products), size=n)
+    quantities = [
+        int(products[i]['min_quantity'] * rng.integers(1, 4)) if products[i]['weight_kg'] * products[i]['min_quantity'] <= 2000 else products[i]['min_quantity']
+        for i in picks.tolist()
+    ]
+    destinations = [cities[i] for i in rng.integers(len(cities), size=n).tolist()]
+    quotes = batch_quote(products, [products[i]['id'] for i in picks.tolist()], quantities, destinations, tariff=CompiledTariff(DEFAULT_TARIFF))
+    statuses = rng.choice(ORDER_STATUSES, size=n, p=[0.4, 0.15, 0.1, 0.1, 0.25]).tolist()
+    ages = rng.integers(0, 90 * 24 * 3600, size=n).tolist()
+    delivery_hours = rng.integers(2, 72, size=n).tolist()
+    orders = []
+    for row, i, quantity, destination, status, age, hours in zip(quotes.itertuples(index=False), picks.tolist(), quantities, destinations, statuses, ages, delivery_hours):
+        product = products[i]
+        placed = now - timedelta(seconds=age)
+        orders.append({
+            'product_id': product['id'],
+            'product_name': product['name'],
+            'buyer_name': f"{LAST_NAMES[age % len(LAST_NAMES)]} Stores",
+            'buyer_phone': f"8{age % 10 ** 9:09d}",
+            'quantity': quantity,
+            'delivery_location': destination,
+            'delivery_address': f"Main Road, {destination}",
+            'pickup_location': product['location'],
+            'product_total': row.product_total,
+            'delivery_charge': row.delivery_charge,
+            'grand_total': row.grand_total,
+            'distance_km': row.distance_km,
+            'status': status,
+            'driver_id': None if status == 'Order Placed' or not drivers else drivers[age % len(drivers)]['id'],
+            'timestamp': placed.strftime("%Y-%m-%d %H:%M:%S"),
+            'weight_kg': product['weight_kg'] * quantity,
+            'volume_m3': product['volume_m3'] * quantity,
+            'placed_at': int(placed.timestamp()),
+            'delivered_at': int(min(placed + timedelta(hours=hours), now).timestamp()) if status == 'Delivered' else None,
+            'parent_id': None,
+            'shipment_id': None
+        })
+    orders.sort(key=lambda o: o['timestamp'])
+    return orders
+
+
+def _insert_many(conn, table, fields, rows, extra=()):
+    columns = fields + [name for name, _ in extra]
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        ([row[field] for field in fields] + [convert(row) for _, convert in extra] for row in rows)
+    )
+
+
+def build_database(path, n_products, n_orders=None, n_drivers=None, seed=0):
+    """Create a SQLite database at `path` filled with a seeded synthetic dataset."""
+    n_orders = n_products if n_orders is None else n_orders
+    n_drivers = max(n_products // 20, 10) if n_drivers is None else n_drivers
+    storage = Storage(path, pool_size=1, seed=False)
+    products = generate_products(n_products, seed)
+    drivers = generate_drivers(n_drivers, seed)
+    coordinates = (('lat', lambda row: row['coordinates'][0]), ('lon', lambda row: row['coordinates'][1]))
+    with storage.write() as conn:
+        _insert_many(conn, 'products', PRODUCT_FIELDS, products, coordinates)
+        _insert_many(conn, 'drivers', DRIVER_FIELDS, drivers, coordinates + (('available', lambda row: int(row['available'])),))
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seeded', '1')")
+    for i, product in enumerate(products, 1):
+        product['id'] = i
+    for i, driver in enumerate(drivers, 1):
+        driver['id'] = i
+    orders = generate_orders(products, drivers, n_orders, seed)
+    with storage.write() as conn:
+        _insert_many(conn, 'orders', ORDER_FIELDS, orders)
+    storage.pool.close()
+    return {'products': n_products, 'orders': n_orders, 'drivers': n_drivers}
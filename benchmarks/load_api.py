@@ -0,0 +1,130 @@
+"""Load test for the JSON API: catalog polling, quotes and batched calls.
+
+    python benchmarks/load_api.py --threads 8 --seconds 5
+    python benchmarks/load_api.py --url http://127.0.0.1:8000
+
+Without --url a server is started in-process on a throwaway database.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CITIES = ['Guwahati', 'Jorhat', 'Dibrugarh', 'Silchar', 'Tezpur', 'Nagaon', 'Bongaigaon', 'Diphu', 'Goalpara', 'Sivasagar']
+
+
+def start_local_server(tmp):
+    os.environ['INDE_DB_PATH'] = os.path.join(tmp, "load.db")
+    from api import KeepAliveRequestHandler, create_app
+    from werkzeug.serving import make_server
+
+    class QuietRequestHandler(KeepAliveRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, create_app(), threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def scenarios(base_url, product_ids):
+    def catalog(session, state):
+        headers = {'If-None-Match': state['etag']} if state.get('etag') else {}
+        response = session.get(f"{base_url}/api/products", params={'page_size': 50}, headers=headers)
+        if response.status_code == 200:
+            state['etag'] = response.headers.get('ETag')
+        return response
+
+    def quote(session, state):
+        return session.post(f"{base_url}/api/quote", json={
+            'product_id': random.choice(product_ids),
+            'delivery_location': random.choice(CITIES)
+        })
+
+    def bulk_quote(session, state):
+        return session.post(f"{base_url}/api/quotes", json={'items': [
+            {'product_id': random.choice(product_ids), 'delivery_location': random.choice(CITIES)}
+            for _ in range(100)
+        ]})
+
+    def batch(session, state):
+        return session.post(f"{base_url}/api/batch", json={'requests': [
+            {'method': "POST", 'path': "/api/quote", 'body': {'product_id': random.choice(product_ids), 'delivery_location': random.choice(CITIES)}}
+            for _ in range(10)
+        ]})
+
+    return {'catalog (conditional GET)': catalog, 'quote': quote, 'bulk quote x100': bulk_quote, 'batch x10': batch}
+
+
+def run(name, call, threads, seconds, keep_alive):
+    latencies = [[] for _ in range(threads)]
+    statuses = [{} for _ in range(threads)]
+
+    def worker(i):
+        session = requests.Session()
+        state = {}
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            if not keep_alive:
+                session.close()
+                session = requests.Session()
+            started = time.perf_counter()
+            response = call(session, state)
+            latencies[i].append(time.perf_counter() - started)
+            statuses[i][response.status_code] = statuses[i].get(response.status_code, 0) + 1
+        session.close()
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = sorted(sample for worker_samples in latencies for sample in worker_samples)
+    codes = {}
+    for worker_statuses in statuses:
+        for code, count in worker_statuses.items():
+            codes[code] = codes.get(code, 0) + count
+    p95 = samples[int(len(samples) * 0.95) - 1] if samples else 0
+    print(
+        f"{name:<28} {len(samples) / elapsed:>9,.0f} req/s  "
+        f"p50 {statistics.median(samples) * 1000 if samples else 0:>7.2f} ms  "
+        f"p95 {p95 * 1000:>7.2f} ms  status {dict(sorted(codes.items()))}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Base URL of a running API; starts a local one if omitted")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--no-keep-alive", action="store_true", help="Open a new connection for every request")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        base_url = args.url
+        if base_url is None:
+            server, base_url = start_local_server(tmp)
+        base_url = base_url.rstrip("/")
+
+        product_ids = [p['id'] for p in requests.get(f"{base_url}/api/products", params={'page_size': 500}).json()['items']]
+        for name, call in scenarios(base_url, product_ids).items():
+            run(name, call, args.threads, args.seconds, not args.no_keep_alive)
+
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Benchmark suite: pricing micro-benchmarks, browse and job-board paths, page renders.
+
+    python benchmarks/run_benchmarks.py --scales 1k 10k --output bench.json
+    python benchmarks/run_benchmarks.py --scales 1k 10k --baseline bench.json --threshold 0.25
+
+Each scale runs in its own process against a freshly generated database so
+module-level singletons and caches never leak between scales. Results map
+benchmark names to seconds per call; with --baseline, anything slower than
+baseline * (1 + threshold) is flagged and the exit status is 1.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generators import SCALES, build_database
+
+APP_PATH = os.path.join(ROOT, "app.py")
+ADMIN_PASSWORD = "benchmark"
+PAGES = ["🏠 Browse Products", "🛒 Place Order", "🚛 Driver Dashboard", "👤 Admin Panel"]
+RENDER_REPEAT = 3
+
+
+def measure(fn, repeat=5):
+    """Best-of-`repeat` seconds per call, with the loop count picked by timeit."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def bench_pricing(results):
+    from distances import ASSAM_CITIES
+    from pricing import batch_quote, calculate_delivery_price, calculate_distance, calculate_total_price
+    from repository import get_repositories
+
+    products = get_repositories().products.list()
+    product = products[len(products) // 2]
+    results['pricing/calculate_distance'] = measure(lambda: calculate_distance(ASSAM_CITIES['Guwahati'], ASSAM_CITIES['Dibrugarh']))
+    results['pricing/calculate_delivery_price'] = measure(lambda: calculate_delivery_price(25, 2.0, 50, 120.5))
+    # A fresh quantity every call misses the QUOTES memo, so this times the
+    # pricing path itself; the cached case is a repeat of the same quote.
+    quantities = itertools.count(product['min_quantity'])
+    results['pricing/calculate_total_price'] = measure(lambda: calculate_total_price(product, next(quantities), 'Silchar'))
+    results['pricing/calculate_total_price_cached'] = measure(lambda: calculate_total_price(product, product['min_quantity'], 'Silchar'))
+    sample = products[:1000]
+    results['pricing/batch_quote_1000'] = measure(lambda: batch_quote(
+        sample,
+        [p['id'] for p in sample],
+        [p['min_quantity'] for p in sample],
+        'Jorhat'
+    ), repeat=3)
+
+
+def bench_browse(results):
+    from pagination import paginate
+    from repository import get_repositories
+
+    repos = get_repositories()
+
+    def browse(category=None, location=None, search="", sort_field=None):
+        products = repos.products.list(category=category, location=location, search=search)
+        sort_values = [p[sort_field] for p in products] if sort_field else None
+        return paginate(products, 1, 25, sort_values)
+
+    results['browse/all'] = measure(lambda: browse(), repeat=3)
+    results['browse/category'] = measure(lambda: browse(category='Building Materials'), repeat=3)
+    results['browse/category_location'] = measure(lambda: browse(category='Building Materials', location='Jorhat'))
+    results['browse/search'] = measure(lambda: browse(search="cement"), repeat=3)
+    results['browse/search_prefix'] = measure(lambda: browse(search="prem tea"), repeat=3)
+    results['browse/all_sorted_by_price'] = measure(lambda: browse(sort_field='price'), repeat=3)
+    results['browse/suggest'] = measure(lambda: repos.products.suggest("ce"))
+
+
+def bench_job_board(results):
+    from matching import get_matching_engine
+    from pagination import paginate
+    from repository import get_repositories
+
+    repos = get_repositories()
+    matcher = get_matching_engine()
+    driver = max(repos.drivers.list(available=True), key=lambda d: d['capacity_kg'])
+
+    def job_board():
+        jobs = repos.orders.list(status='Order Placed')
+        fee_per_km = [o['delivery_charge'] / max(o['distance_km'], 1) for o in jobs]
+        return paginate(jobs, 1, 25, fee_per_km, descending=True)
+
+    results['jobs/open_sorted_by_fee_per_km'] = measure(job_board, repeat=3)
+    results['jobs/matched_top_20'] = measure(lambda: matcher.jobs_for_driver(driver, limit=20))
+    results['jobs/matched_all'] = measure(lambda: matcher.jobs_for_driver(driver, limit=None), repeat=3)
+    results['jobs/drivers_for_order'] = measure(lambda: matcher.drivers_for_order(repos.orders.list(status='Order Placed')[0]), repeat=3)
+
+
+def bench_renders(results):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=600)
+    started = time.perf_counter()
+    at.run()
+    results['render/cold_start'] = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    for page in PAGES:
+        at.sidebar.radio[0].set_value(page).run()
+        if page == "👤 Admin Panel" and not at.session_state['admin_logged_in']:
+            at.text_input[0].input(ADMIN_PASSWORD)
+            at.button[0].click().run()
+        timings = []
+        for _ in range(RENDER_REPEAT):
+            started = time.perf_counter()
+            at.run()
+            timings.append(time.perf_counter() - started)
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+        results[f"render/{page.split(' ', 1)[1].lower().replace(' ', '_')}"] = statistics.median(timings)
+
+
+def worker(skip_render):
+    results = {}
+    bench_pricing(results)
+    bench_browse(results)
+    bench_job_board(results)
+    if not skip_render:
+        bench_renders(results)
+    json.dump(results, sys.stdout)
+
+
+def run_scale(scale, tmp, skip_render):
+    db_path = os.path.join(tmp, f"bench_{scale}.db")
+    started = time.perf_counter()
+    sizes = build_database(db_path, SCALES[scale])
+    print(f"[{scale}] generated {sizes} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    env = dict(os.environ, INDE_DB_PATH=db_path, ADMIN_PASSWORD=ADMIN_PASSWORD)
+    env.pop('INDE_API_PORT', None)
+    command = [sys.executable, os.path.abspath(__file__), "--worker"] + (["--skip-render"] if skip_render else [])
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return {f"{scale}/{name}": seconds for name, seconds in json.loads(output).items()}
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        ratio = seconds / before if before else None
+        flag = ""
+        if ratio is not None and ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio is not None and ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        change = f"{ratio:6.2f}x" if ratio is not None else "   new"
+        print(f"{name:<45} {seconds * 1000:>12.4f} ms  {change}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=['1k', '10k'])
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous results file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging, as a fraction")
+    parser.add_argument("--skip-render", action="store_true", help="Skip AppTest page renders")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.skip_render)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            results.update(run_scale(scale, tmp, args.skip_render))
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                'meta': {
+                    'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'scales': args.scales
+                },
+                'results': results
+            }, f, indent=2)
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from distances import ASSAM_CITIES
+from storage import ORDER_FIELDS, PRODUCT_CATEGORIES, PRODUCT_FIELDS
+
+CHUNK_ROWS = 5000
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ('csv', 'parquet')
+
+TEXT_FIELDS = ['name', 'unit', 'supplier', 'description']
+INTEGER_FIELDS = {'id', 'min_quantity', 'stock', 'product_id', 'quantity', 'driver_id'}
+FLOAT_FIELDS = {'price', 'weight_kg', 'volume_m3', 'lat', 'lon', 'product_total', 'delivery_charge', 'grand_total', 'distance_km'}
+
+
+def _arrow_schema(columns):
+    return pa.schema([
+        (column, pa.int64() if column in INTEGER_FIELDS else pa.float64() if column in FLOAT_FIELDS else pa.string())
+        for column in columns
+    ])
+
+
+PRODUCT_EXPORT_COLUMNS = ['id'] + PRODUCT_FIELDS + ['lat', 'lon']
+ORDER_EXPORT_COLUMNS = ['id'] + ORDER_FIELDS
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if extension == 'pq':
+        extension = 'parquet'
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported file type: {filename} (expected .csv or .parquet)")
+    return extension
+
+
+def read_chunks(source, fmt, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames of at most `chunk_rows` rows from a CSV or Parquet file or file object."""
+    if fmt == 'csv':
+        yield from pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False, skipinitialspace=True)
+    elif fmt == 'parquet':
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _numeric(column, integer=False):
+    values = pd.to_numeric(column, errors='coerce').astype(float)
+    if integer:
+        values = values.where(values == np.floor(values))
+    return values
+
+
+def validate_chunk(chunk, first_row=1):
+    """Check a chunk against the Add Product form rules.
+
+    Returns (products, errors): product dicts for valid rows, with
+    coordinates resolved from their location, and {'row', 'errors'} entries
+    for rejected rows. Row numbers count data rows from `first_row`.
+    """
+    missing = [field for field in PRODUCT_FIELDS if field not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    n = len(chunk)
+    text = {field: chunk[field].fillna("").astype(str).str.strip() for field in TEXT_FIELDS + ['category', 'location']}
+    numbers = {
+        'price': _numeric(chunk['price'], integer=True),
+        'weight_kg': _numeric(chunk['weight_kg']),
+        'volume_m3': _numeric(chunk['volume_m3']),
+        'min_quantity': _numeric(chunk['min_quantity'], integer=True),
+        'stock': _numeric(chunk['stock'], integer=True)
+    }
+
+    rules = [(text[field] != "", f"{field} is required") for field in TEXT_FIELDS]
+    rules += [
+        (text['category'].isin(PRODUCT_CATEGORIES), "category is not one of the allowed categories"),
+        (text['location'].isin(list(ASSAM_CITIES)), "location is not a known city"),
+        (numbers['price'] >= 0, "price must be a whole number ≥ 0"),
+        (numbers['weight_kg'] >= 0.1, "weight_kg must be a number ≥ 0.1"),
+        (numbers['volume_m3'] >= 0.1, "volume_m3 must be a number ≥ 0.1"),
+        (numbers['min_quantity'] >= 1, "min_quantity must be a whole number ≥ 1"),
+        (numbers['stock'] >= 0, "stock must be a whole number ≥ 0")
+    ]
+
+    valid = np.ones(n, dtype=bool)
+    failures = {}
+    for mask, message in rules:
+        mask = mask.to_numpy()
+        valid &= mask
+        for i in np.flatnonzero(~mask).tolist():
+            failures.setdefault(i, []).append(message)
+    errors = [{'row': first_row + i, 'errors': failures[i]} for i in sorted(failures)]
+
+    if not valid.any():
+        return [], errors
+    clean = pd.DataFrame({field: text[field][valid] for field in TEXT_FIELDS + ['category', 'location']})
+    for field, values in numbers.items():
+        clean[field] = values[valid]
+    for field in ('price', 'min_quantity', 'stock'):
+        clean[field] = clean[field].astype(np.int64)
+    lat = clean['location'].map({city: coords[0] for city, coords in ASSAM_CITIES.items()})
+    lon = clean['location'].map({city: coords[1] for city, coords in ASSAM_CITIES.items()})
+
+    columns = [clean[field].tolist() for field in PRODUCT_FIELDS] + [list(zip(lat.tolist(), lon.tolist()))]
+    products = [dict(zip(PRODUCT_FIELDS + ['coordinates'], values)) for values in zip(*columns)]
+    return products, errors
+
+
+def import_products(repos, source, fmt, chunk_rows=CHUNK_ROWS):
+    """Stream a catalog file into the product repository, upserting by (supplier, name).
+
+    Each chunk is validated and written in its own transaction, so memory
+    stays bounded by the chunk size. Only the first MAX_REPORTED_ERRORS
+    rejected rows are kept in the report.
+    """
+    report = {'rows': 0, 'created': 0, 'updated': 0, 'rejected': 0, 'errors': []}
+    for chunk in read_chunks(source, fmt, chunk_rows):
+        products, errors = validate_chunk(chunk, report['rows'] + 1)
+        report['rows'] += len(chunk)
+        report['rejected'] += len(errors)
+        report['errors'].extend(errors[:MAX_REPORTED_ERRORS - len(report['errors'])])
+        # Later rows win when a file repeats a supplier + name pair.
+        latest = {}
+        for product in products:
+            latest[(product['supplier'], product['name'])] = product
+        for _, created in repos.products.upsert_many(list(latest.values())):
+            report['created' if created else 'updated'] += 1
+    return report
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only stream that hands out what was written since the last drain."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _frames(batches, columns):
+    for rows in batches:
+        frame = pd.DataFrame(rows)
+        if 'coordinates' in frame.columns:
+            frame['lat'] = [coords[0] for coords in frame['coordinates']]
+            frame['lon'] = [coords[1] for coords in frame['coordinates']]
+        yield frame.reindex(columns=columns)
+
+
+def iter_export(batches, columns, fmt):
+    """Yield encoded bytes for row batches, one CSV block or Parquet row group per batch."""
+    if fmt == 'csv':
+        yield (",".join(columns) + "\n").encode()
+        for frame in _frames(batches, columns):
+            yield frame.to_csv(index=False, header=False).encode()
+    elif fmt == 'parquet':
+        schema = _arrow_schema(columns)
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        for frame in _frames(batches, columns):
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def export_products(storage, fmt, chunk_rows=CHUNK_ROWS):
+    return iter_export(storage.iter_products(chunk_rows), PRODUCT_EXPORT_COLUMNS, fmt)
+
+
+def export_orders(storage, fmt, chunk_rows=CHUNK_ROWS):
+    return iter_export(storage.iter_order_history(chunk_rows), ORDER_EXPORT_COLUMNS, fmt)
@@ -0,0 +1,94 @@
+import functools
+import threading
+from collections import OrderedDict
+
+MAX_ENTRIES = 512
+
+
+class Versions:
+    """Monotonic change counters, one per namespace ('catalog', 'drivers', ...)."""
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def bump(self, namespace):
+        with self._lock:
+            self._counters[namespace] = self._counters.get(namespace, 0) + 1
+            return self._counters[namespace]
+
+    def get(self, namespace):
+        return self._counters.get(namespace, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+class VersionedCache:
+    """LRU cache whose keys embed the versions the value was derived from.
+
+    Bumping a version makes every dependent entry unreachable, so nothing has
+    to be invalidated explicitly; stale entries age out of the LRU.
+    """
+
+    def __init__(self, versions, max_entries=MAX_ENTRIES):
+        self.versions = versions
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, name, namespaces, args, compute):
+        key = (name, tuple(self.versions.get(n) for n in namespaces), args)
+        with self._lock:
+            stats = self._stats.setdefault(name, [0, 0])
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                stats[0] += 1
+                return self._entries[key]
+            stats[1] += 1
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return [
+                {
+                    'view': name,
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0
+                }
+                for name, (hits, misses) in sorted(self._stats.items())
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+
+VERSIONS = Versions()
+CACHE = VersionedCache(VERSIONS)
+
+
+def versioned(*namespaces):
+    """Memoize a function of hashable arguments until any of `namespaces` changes version."""
+    def decorator(fn):
+        name = fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            return CACHE.get_or_compute(name, namespaces, args, lambda: fn(*args))
+
+        return wrapper
+    return decorator
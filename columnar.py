@@ -0,0 +1,201 @@
+import numpy as np
+
+INITIAL_CAPACITY = 1024
+
+INT = 'int'
+OPTIONAL_INT = 'optional_int'
+REAL = 'real'
+NUMERIC = 'numeric'
+BOOL = 'bool'
+CATEGORY = 'category'
+TEXT = 'text'
+TIMESTAMP = 'timestamp'
+POINT = 'point'
+
+MISSING = np.iinfo(np.int64).min
+
+_DTYPES = {
+    INT: np.int64,
+    OPTIONAL_INT: np.int64,
+    REAL: np.float64,
+    NUMERIC: np.float64,
+    BOOL: np.bool_,
+    CATEGORY: np.int32,
+    TEXT: object,
+    TIMESTAMP: 'datetime64[s]',
+    POINT: np.float64
+}
+
+
+def _numeric(value):
+    # Same as SQLite NUMERIC affinity: integral values come back as int.
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _timestamp(value):
+    return str(value).replace('T', ' ')
+
+
+class ColumnStore:
+    """Rows kept as one NumPy array per field instead of one dict per row.
+
+    `schema` maps each field to a column kind. Strings that repeat across
+    rows (statuses, cities, product and buyer names) are CATEGORY columns:
+    int32 codes into a per-field list of values. Arrays double in capacity
+    when full, so appends are amortized O(1), and `patch` writes into them
+    in place. Removed rows stay in the arrays and are masked out by `live`.
+
+    `view` hands out zero-copy slices of the filled part of the arrays;
+    `row` and `rows` materialize rows as fresh dicts.
+    """
+
+    def __init__(self, schema, capacity=INITIAL_CAPACITY):
+        self.schema = dict(schema)
+        self.size = 0
+        self.removed = 0
+        self.columns = {field: self._empty(kind, capacity) for field, kind in self.schema.items()}
+        self.live = np.zeros(capacity, dtype=np.bool_)
+        self.categories = {field: [] for field, kind in self.schema.items() if kind == CATEGORY}
+        self._codes = {field: {} for field in self.categories}
+        self._category_arrays = {}
+
+    def __len__(self):
+        return self.size - self.removed
+
+    @property
+    def capacity(self):
+        return len(self.live)
+
+    @property
+    def nbytes(self):
+        return self.live.nbytes + sum(column.nbytes for column in self.columns.values())
+
+    @staticmethod
+    def _empty(kind, capacity):
+        return np.empty((capacity, 2) if kind == POINT else capacity, dtype=_DTYPES[kind])
+
+    def _reserve(self, needed):
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, 2 * self.capacity)
+        for field, kind in self.schema.items():
+            column = self._empty(kind, capacity)
+            column[:self.size] = self.columns[field][:self.size]
+            self.columns[field] = column
+        live = np.zeros(capacity, dtype=np.bool_)
+        live[:self.size] = self.live[:self.size]
+        self.live = live
+
+    def code(self, field, value):
+        codes = self._codes[field]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.categories[field])
+            self.categories[field].append(value)
+        return code
+
+    def _encode(self, field, values):
+        kind = self.schema[field]
+        if kind == CATEGORY:
+            return [self.code(field, value) for value in values]
+        if kind == OPTIONAL_INT:
+            return [MISSING if value is None else value for value in values]
+        if kind == TIMESTAMP:
+            return np.array(values, dtype='datetime64[s]')
+        return values
+
+    def extend(self, rows):
+        """Append rows (dicts with every schema field); returns their slots."""
+        rows = list(rows)
+        return self.extend_columns({field: [row[field] for row in rows] for field in self.schema})
+
+    def extend_columns(self, columns):
+        """Append rows given as one list of values per schema field; returns their slots."""
+        start, end = self.size, self.size + len(next(iter(columns.values())))
+        self._reserve(end)
+        for field, column in self.columns.items():
+            column[start:end] = self._encode(field, columns[field])
+        self.live[start:end] = True
+        self.size = end
+        return range(start, end)
+
+    def append(self, row):
+        return self.extend([row])[0]
+
+    def patch(self, slot, **fields):
+        for field, value in fields.items():
+            if field not in self.columns:
+                raise KeyError(f"Unknown field: {field}")
+            self.columns[field][slot] = self._encode(field, [value])[0]
+
+    def remove(self, slot):
+        if self.live[slot]:
+            self.live[slot] = False
+            self.removed += 1
+
+    def value(self, slot, field):
+        kind = self.schema[field]
+        value = self.columns[field][slot]
+        if kind == CATEGORY:
+            return self.categories[field][value]
+        if kind == TEXT:
+            return value
+        if kind == INT:
+            return int(value)
+        if kind == OPTIONAL_INT:
+            return None if value == MISSING else int(value)
+        if kind == REAL:
+            return float(value)
+        if kind == NUMERIC:
+            return _numeric(value)
+        if kind == BOOL:
+            return bool(value)
+        if kind == TIMESTAMP:
+            return _timestamp(value)
+        return (float(value[0]), float(value[1]))
+
+    def row(self, slot):
+        return {field: self.value(slot, field) for field in self.schema}
+
+    def _values(self, field, slots):
+        kind = self.schema[field]
+        values = self.columns[field][slots]
+        if kind == CATEGORY:
+            return self.decode(field, values).tolist()
+        if kind == OPTIONAL_INT:
+            return [None if value == MISSING else value for value in values.tolist()]
+        if kind == NUMERIC:
+            return [int(value) if value.is_integer() else value for value in values.tolist()]
+        if kind == TIMESTAMP:
+            return [_timestamp(value) for value in np.datetime_as_string(values)]
+        if kind == POINT:
+            return [tuple(value) for value in values.tolist()]
+        return values.tolist()
+
+    def export(self, slots):
+        """Plain Python values for `slots`, one list per field; the inverse of `extend_columns`."""
+        slots = np.asarray(slots, dtype=np.intp)
+        return {field: self._values(field, slots) for field in self.schema}
+
+    def rows(self, slots):
+        """Materialize many rows at once, converting a column at a time."""
+        columns = self.export(slots)
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def view(self, fields=None):
+        """Zero-copy slices of the filled part of each column, plus the live-row mask."""
+        fields = self.schema if fields is None else fields
+        return {field: self.columns[field][:self.size] for field in fields}, self.live[:self.size]
+
+    def decode(self, field, values):
+        """Display values for an array taken from `view`: category codes become their strings."""
+        kind = self.schema[field]
+        if kind == CATEGORY:
+            categories = self._category_arrays.get(field)
+            if categories is None or len(categories) != len(self.categories[field]):
+                categories = self._category_arrays[field] = np.array(self.categories[field], dtype=object)
+            return categories[values]
+        if kind == OPTIONAL_INT:
+            return np.where(values == MISSING, None, values)
+        return values
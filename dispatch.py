@@ -0,0 +1,314 @@
+import heapq
+import time
+
+import numpy as np
+
+from distances import ASSAM_CITIES, DEFAULT_COORDINATES
+from matching import VEHICLE_CAPACITIES
+from pricing import distance_matrix
+
+NEIGHBOURS = 12
+MIN_SAVING_KM = 1e-6
+TWO_OPT_ROUNDS = 3
+
+
+class Route:
+    """One truckload: every pickup is visited before every drop."""
+
+    __slots__ = ('id', 'pickups', 'drops', 'orders', 'weight_kg', 'volume_m3', 'km', 'version')
+
+    def __init__(self, route_id, pickups, drops, orders, weight_kg, volume_m3, km):
+        self.id = route_id
+        self.pickups = pickups
+        self.drops = drops
+        self.orders = orders
+        self.weight_kg = weight_kg
+        self.volume_m3 = volume_m3
+        self.km = km
+        self.version = 0
+
+    @property
+    def stops(self):
+        return self.pickups + self.drops
+
+
+class Vehicle:
+    __slots__ = ('vehicle_type', 'capacity_kg', 'capacity_m3')
+
+    def __init__(self, vehicle_type, capacity_kg, capacity_m3):
+        self.vehicle_type = vehicle_type
+        self.capacity_kg = capacity_kg
+        self.capacity_m3 = capacity_m3
+
+    def fits(self, weight_kg, volume_m3):
+        return weight_kg <= self.capacity_kg and volume_m3 <= self.capacity_m3
+
+    def fill(self, weight_kg, volume_m3):
+        return max(weight_kg / self.capacity_kg, volume_m3 / self.capacity_m3)
+
+
+def fleet_from_drivers(drivers):
+    vehicles = {}
+    for driver in drivers:
+        vehicles.setdefault(driver['vehicle_type'], Vehicle(driver['vehicle_type'], driver['capacity_kg'], driver['capacity_m3']))
+    if not vehicles:
+        vehicles = {name: Vehicle(name, kg, m3) for name, (kg, m3) in VEHICLE_CAPACITIES.items()}
+    return sorted(vehicles.values(), key=lambda v: (v.capacity_kg, v.capacity_m3))
+
+
+def _path_km(dist, nodes):
+    return sum(dist[a][b] for a, b in zip(nodes, nodes[1:]))
+
+
+def _cheapest_insertion(dist, seq, node, lo, hi):
+    """Position in [lo, hi] where inserting `node` into `seq` adds the fewest km."""
+    best_pos, best_delta = lo, float('inf')
+    for pos in range(lo, hi + 1):
+        prev_node = seq[pos - 1] if pos > 0 else None
+        next_node = seq[pos] if pos < len(seq) else None
+        if prev_node is not None and next_node is not None:
+            delta = dist[prev_node][node] + dist[node][next_node] - dist[prev_node][next_node]
+        elif prev_node is not None:
+            delta = dist[prev_node][node]
+        elif next_node is not None:
+            delta = dist[node][next_node]
+        else:
+            delta = 0.0
+        if delta < best_delta:
+            best_pos, best_delta = pos, delta
+    return best_pos
+
+
+def _merge_stops(dist, a, b):
+    pickups, drops = list(a.pickups), list(a.drops)
+    for node in b.pickups:
+        if node not in pickups:
+            seq = pickups + drops
+            pickups.insert(_cheapest_insertion(dist, seq, node, 0, len(pickups)), node)
+    for node in b.drops:
+        if node not in drops:
+            seq = pickups + drops
+            pos = _cheapest_insertion(dist, seq, node, len(pickups), len(seq))
+            drops.insert(pos - len(pickups), node)
+    return pickups, drops
+
+
+def _two_opt(dist, pickups, drops):
+    """Reverse segments inside the pickup run and the drop run while that shortens the route."""
+    for _ in range(TWO_OPT_ROUNDS):
+        improved = False
+        for lo, hi in ((0, len(pickups)), (len(pickups), len(pickups) + len(drops))):
+            seq = pickups + drops
+            for i in range(lo, hi - 1):
+                for j in range(i + 1, hi):
+                    before = seq[i - 1] if i > 0 else None
+                    after = seq[j + 1] if j + 1 < len(seq) else None
+                    old = (dist[before][seq[i]] if before is not None else 0) + (dist[seq[j]][after] if after is not None else 0)
+                    new = (dist[before][seq[j]] if before is not None else 0) + (dist[seq[i]][after] if after is not None else 0)
+                    if new < old - MIN_SAVING_KM:
+                        seq[i:j + 1] = reversed(seq[i:j + 1])
+                        improved = True
+            pickups, drops = seq[:len(pickups)], seq[len(pickups):]
+        if not improved:
+            break
+    return pickups, drops
+
+
+class DispatchPlanner:
+    """Consolidates open orders into multi-stop truckloads.
+
+    Orders on the same lane are first packed into loads (first-fit
+    decreasing). Loads are then merged Clarke-Wright style: candidate pairs
+    of nearby routes are ranked by km saved, and a merge inserts the other
+    route's pickups and drops at their cheapest positions. Every route then
+    gets a 2-opt pass over its pickup and drop runs. Distances come from
+    the matrix pricing uses (road or geodesic, per DISTANCE_ENGINE), so
+    planned km agree with the distances quoted to buyers.
+    """
+
+    def __init__(self, vehicles, pickup_coordinates=None, neighbours=NEIGHBOURS, distances=None):
+        self.vehicles = sorted(vehicles, key=lambda v: (v.capacity_kg, v.capacity_m3))
+        self.largest = self.vehicles[-1]
+        self.pickup_coordinates = pickup_coordinates or (lambda order: ASSAM_CITIES.get(order['pickup_location'], DEFAULT_COORDINATES))
+        self.neighbours = neighbours
+        self.distances = distances
+
+    def _distances(self, points):
+        # Points the shared matrix has not seen go into a private copy, never into the shared one.
+        distances = self.distances or distance_matrix()
+        if any(point not in distances for point in points):
+            distances = distances.copy()
+        index = [distances.index_of(point) for point in points]
+        return distances.matrix[np.ix_(index, index)].tolist()
+
+    def _vehicle_for(self, weight_kg, volume_m3):
+        for vehicle in self.vehicles:
+            if vehicle.fits(weight_kg, volume_m3):
+                return vehicle
+        return None
+
+    def plan(self, orders):
+        started = time.perf_counter()
+        points = {}
+        nodes = {}
+        labels = {}
+        loads = {}
+        unassignable = []
+        for order in orders:
+            if not self.largest.fits(order['weight_kg'], order['volume_m3']):
+                unassignable.append(order)
+                continue
+            pickup = points.setdefault(tuple(self.pickup_coordinates(order)), len(points))
+            drop = points.setdefault(tuple(ASSAM_CITIES.get(order['delivery_location'], DEFAULT_COORDINATES)), len(points))
+            labels.setdefault(pickup, order['pickup_location'])
+            labels.setdefault(drop, order['delivery_location'])
+            nodes[order['id']] = (pickup, drop)
+            loads.setdefault((pickup, drop), []).append(order)
+        dist = self._distances(list(points))
+
+        routes = {}
+        for (pickup, drop), lane in loads.items():
+            bins = []
+            for order in sorted(lane, key=lambda o: (-o['weight_kg'], -o['volume_m3'])):
+                for b in bins:
+                    if self.largest.fits(b[1] + order['weight_kg'], b[2] + order['volume_m3']):
+                        b[0].append(order)
+                        b[1] += order['weight_kg']
+                        b[2] += order['volume_m3']
+                        break
+                else:
+                    bins.append([[order], order['weight_kg'], order['volume_m3']])
+            for lane_orders, weight_kg, volume_m3 in bins:
+                route_id = len(routes)
+                routes[route_id] = Route(route_id, [pickup], [drop], lane_orders, weight_kg, volume_m3, dist[pickup][drop])
+
+        baseline_km = sum(dist[nodes[o['id']][0]][nodes[o['id']][1]] for route in routes.values() for o in route.orders)
+        self._merge(routes, dist)
+
+        for route in routes.values():
+            route.pickups, route.drops = _two_opt(dist, route.pickups, route.drops)
+            route.km = _path_km(dist, route.stops)
+
+        return self._report(orders, unassignable, routes, labels, baseline_km, time.perf_counter() - started)
+
+    def _saving(self, dist, a, b):
+        if not self.largest.fits(a.weight_kg + b.weight_kg, a.volume_m3 + b.volume_m3):
+            return None
+        pickups, drops = _merge_stops(dist, a, b)
+        return a.km + b.km - _path_km(dist, pickups + drops), pickups, drops
+
+    def _merge(self, routes, dist):
+        dist_array = np.asarray(dist)
+        heap = []
+
+        def push_candidates(route, others):
+            if not others:
+                return
+            firsts = np.array([o.pickups[0] for o in others])
+            lasts = np.array([o.drops[-1] for o in others])
+            closeness = dist_array[route.pickups[0], firsts] + dist_array[route.drops[-1], lasts]
+            k = min(self.neighbours, len(others))
+            for i in np.argpartition(closeness, k - 1)[:k].tolist():
+                other = others[i]
+                result = self._saving(dist, route, other)
+                if result is not None and result[0] > MIN_SAVING_KM:
+                    heapq.heappush(heap, (-result[0], route.id, other.id, route.version, other.version))
+
+        ordered = list(routes.values())
+        for i, route in enumerate(ordered):
+            push_candidates(route, ordered[:i] + ordered[i + 1:])
+
+        next_id = len(routes)
+        while heap:
+            _, a_id, b_id, a_version, b_version = heapq.heappop(heap)
+            a, b = routes.get(a_id), routes.get(b_id)
+            if a is None or b is None or a.version != a_version or b.version != b_version:
+                continue
+            result = self._saving(dist, a, b)
+            if result is None or result[0] <= MIN_SAVING_KM:
+                continue
+            saving, pickups, drops = result
+            del routes[a_id], routes[b_id]
+            merged = Route(next_id, pickups, drops, a.orders + b.orders, a.weight_kg + b.weight_kg, a.volume_m3 + b.volume_m3, a.km + b.km - saving)
+            next_id += 1
+            routes[merged.id] = merged
+            push_candidates(merged, [r for r in routes.values() if r is not merged])
+
+    def _report(self, orders, unassignable, routes, labels, baseline_km, elapsed):
+        baseline_trips = 0
+        baseline_capacity_kg = baseline_capacity_m3 = 0.0
+        total_weight = total_volume = 0.0
+        for route in routes.values():
+            for order in route.orders:
+                vehicle = self._vehicle_for(order['weight_kg'], order['volume_m3'])
+                baseline_trips += 1
+                baseline_capacity_kg += vehicle.capacity_kg
+                baseline_capacity_m3 += vehicle.capacity_m3
+                total_weight += order['weight_kg']
+                total_volume += order['volume_m3']
+
+        planned = []
+        capacity_kg = capacity_m3 = 0.0
+        for route in sorted(routes.values(), key=lambda r: -r.weight_kg):
+            vehicle = self._vehicle_for(route.weight_kg, route.volume_m3)
+            capacity_kg += vehicle.capacity_kg
+            capacity_m3 += vehicle.capacity_m3
+            planned.append({
+                'vehicle_type': vehicle.vehicle_type,
+                'stops': [labels[n] for n in route.pickups] + [labels[n] for n in route.drops],
+                'pickups': len(route.pickups),
+                'order_ids': sorted(order_id for o in route.orders for order_id in _order_ids(o)),
+                'weight_kg': round(route.weight_kg, 2),
+                'volume_m3': round(route.volume_m3, 2),
+                'km': round(route.km, 2),
+                'fill_rate': round(vehicle.fill(route.weight_kg, route.volume_m3), 4)
+            })
+
+        def fill(weight, volume, cap_kg, cap_m3):
+            return round(max(weight / cap_kg, volume / cap_m3), 4) if cap_kg else 0.0
+
+        return {
+            'routes': planned,
+            'unassignable_order_ids': [order_id for o in unassignable for order_id in _order_ids(o)],
+            'orders': sum(len(_order_ids(o)) for o in orders) - sum(len(_order_ids(o)) for o in unassignable),
+            'before': {
+                'trips': baseline_trips,
+                'km': round(baseline_km, 2),
+                'fill_rate': fill(total_weight, total_volume, baseline_capacity_kg, baseline_capacity_m3)
+            },
+            'after': {
+                'trips': len(planned),
+                'km': round(sum(r['km'] for r in planned), 2),
+                'fill_rate': fill(total_weight, total_volume, capacity_kg, capacity_m3)
+            },
+            'seconds': round(elapsed, 3)
+        }
+
+
+def _order_ids(order):
+    # A cart shipment is planned as one unit and reported as its line orders.
+    return order.get('order_ids') or [order['id']]
+
+
+def plan_dispatch(repos):
+    """Plan truckloads for every 'Order Placed' order using the registered fleet.
+
+    Each cart shipment is one unit, as drivers see it, so its lines always
+    travel on the same truck.
+    """
+    def pickup_coordinates(order):
+        product = repos.products.get(order['product_id'])
+        if product is not None and product['location'] == order['pickup_location']:
+            return product['coordinates']
+        return ASSAM_CITIES.get(order['pickup_location'], DEFAULT_COORDINATES)
+
+    planner = DispatchPlanner(fleet_from_drivers(repos.drivers.list()), pickup_coordinates)
+    units = []
+    for order in repos.orders.list(status='Order Placed'):
+        job = repos.orders.as_job(order)
+        if job is None:
+            continue
+        if job['shipment_id'] is not None:
+            job = dict(job, order_ids=[line['id'] for line in repos.orders.shipment(job['id'])])
+        units.append(job)
+    return planner.plan(units)
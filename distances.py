@@ -0,0 +1,163 @@
+import copy
+import threading
+
+import numpy as np
+from geopy.distance import geodesic
+
+from cache import VERSIONS
+
+ASSAM_CITIES = {
+    'Guwahati': (26.1445, 91.7362),
+    'Jorhat': (26.7509, 94.2037),
+    'Dibrugarh': (27.4728, 94.9120),
+    'Silchar': (24.8333, 92.7789),
+    'Tezpur': (26.6338, 92.8000),
+    'Nagaon': (26.3467, 92.6833),
+    'Bongaigaon': (26.4833, 90.5667),
+    'Diphu': (25.8417, 93.4314),
+    'Goalpara': (26.1667, 90.6167),
+    'Sivasagar': (26.9847, 94.6378),
+    'Barpeta Road': (26.5005, 90.9664),
+    'Howly': (26.4232, 90.9801)
+}
+
+DEFAULT_COORDINATES = ASSAM_CITIES['Guwahati']
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _as_coords(coords):
+    return (float(coords[0]), float(coords[1]))
+
+
+def _as_pairs(from_coords, to_coords):
+    a = np.asarray(from_coords, dtype=float)
+    b = np.asarray(to_coords, dtype=float)
+    a, b = np.broadcast_arrays(a, b)
+    if a.shape[-1] != 2:
+        raise ValueError("coordinates must be (lat, lon) pairs")
+    return a, b
+
+
+def haversine_km(from_coords, to_coords):
+    a, b = _as_pairs(from_coords, to_coords)
+    lat1, lon1 = np.radians(a[..., 0]), np.radians(a[..., 1])
+    lat2, lon2 = np.radians(b[..., 0]), np.radians(b[..., 1])
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def geodesic_km(from_coords, to_coords):
+    a, b = _as_pairs(from_coords, to_coords)
+    shape = a.shape[:-1]
+    flat_a = a.reshape(-1, 2)
+    flat_b = b.reshape(-1, 2)
+    out = np.fromiter(
+        (geodesic(tuple(p), tuple(q)).kilometers for p, q in zip(flat_a, flat_b)),
+        dtype=float,
+        count=len(flat_a)
+    )
+    return out.reshape(shape)
+
+
+def batch_distance_km(from_coords, to_coords, method='haversine'):
+    if method == 'haversine':
+        return haversine_km(from_coords, to_coords)
+    if method == 'geodesic':
+        return geodesic_km(from_coords, to_coords)
+    raise ValueError(f"Unknown distance method: {method}")
+
+
+class DistanceMatrix:
+    """Symmetric geodesic distance matrix over a growing set of points.
+
+    Each new point costs one geodesic solve per existing point; every lookup
+    afterwards is a plain array read.
+    """
+
+    def __init__(self, points=()):
+        self._lock = threading.Lock()
+        self._index = {}
+        self._coords = []
+        self._matrix = np.zeros((0, 0))
+        self.add_many(points)
+
+    def __len__(self):
+        return len(self._coords)
+
+    def __contains__(self, coords):
+        return _as_coords(coords) in self._index
+
+    @property
+    def coordinates(self):
+        return np.array(self._coords, dtype=float).reshape(-1, 2)
+
+    @property
+    def matrix(self):
+        n = len(self._coords)
+        return self._matrix[:n, :n]
+
+    def add(self, coords):
+        key = _as_coords(coords)
+        idx = self._index.get(key)
+        if idx is not None:
+            return idx
+        with self._lock:
+            idx = self._index.get(key)
+            if idx is not None:
+                return idx
+            idx = len(self._coords)
+            row = self._row(key)
+            matrix = self._matrix
+            if idx >= matrix.shape[0]:
+                capacity = max(16, matrix.shape[0] * 2)
+                grown = np.zeros((capacity, capacity))
+                grown[:idx, :idx] = matrix[:idx, :idx]
+                matrix = grown
+            matrix[idx, :idx] = row
+            matrix[:idx, idx] = row
+            matrix[idx, idx] = 0.0
+            self._coords.append(key)
+            self._matrix = matrix
+            self._index[key] = idx
+            return idx
+
+    def _row(self, key):
+        # Distances from a new point to every existing one; called under the lock.
+        return np.array([geodesic(existing, key).kilometers for existing in self._coords])
+
+    def add_many(self, points):
+        return [self.add(coords) for coords in points]
+
+    def copy(self):
+        """An independent matrix over the same points, to grow without touching this one."""
+        with self._lock:
+            other = copy.copy(self)
+            other._lock = threading.Lock()
+            other._index = dict(self._index)
+            other._coords = list(self._coords)
+            other._matrix = self._matrix.copy()
+        return other
+
+    def index_of(self, coords):
+        return self.add(coords)
+
+    def distance(self, i, j):
+        return float(self._matrix[i, j])
+
+    def between(self, from_coords, to_coords):
+        i = self.add(from_coords)
+        j = self.add(to_coords)
+        return float(self._matrix[i, j])
+
+    def lookup(self, rows, cols):
+        return self._matrix[np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)]
+
+
+DISTANCES = DistanceMatrix(ASSAM_CITIES.values())
+
+
+def add_city(name, coords):
+    ASSAM_CITIES[name] = _as_coords(coords)
+    VERSIONS.bump('cities')
+    return DISTANCES.add(coords)
@@ -0,0 +1,188 @@
+import bisect
+import threading
+import time
+from collections import deque
+
+FEED_SIZE = 10000
+
+ORDER_CREATED = 'order_created'
+ORDER_CLAIMED = 'order_claimed'
+ORDER_STATUS = 'order_status'
+ORDER_DELETED = 'order_deleted'
+STOCK_CHANGED = 'stock_changed'
+
+
+class ChangeFeed:
+    """In-process, sequence-numbered log of order and stock changes.
+
+    Repositories publish through their listeners; readers remember the last
+    sequence number they saw and pull `since(seq)` deltas. The log is a
+    bounded ring: a reader that falls further behind than FEED_SIZE events
+    gets None and must reload from the repositories.
+
+    Job claims go through `claim`, which serializes them per process so the
+    feed records exactly one winner per order.
+    """
+
+    def __init__(self, size=FEED_SIZE):
+        self._events = deque(maxlen=size)
+        self._sequence = 0
+        self._changed = threading.Condition()
+        self._claim_lock = threading.Lock()
+        self._claims = {}
+
+    @property
+    def sequence(self):
+        return self._sequence
+
+    def publish(self, kind, entity_id, **data):
+        with self._changed:
+            self._sequence += 1
+            event = {
+                'seq': self._sequence,
+                'kind': kind,
+                'id': entity_id,
+                'timestamp': time.time(),
+                **data
+            }
+            self._events.append(event)
+            self._changed.notify_all()
+        return event
+
+    def since(self, seq, kinds=None):
+        """Events after `seq`, oldest first; None if some were already dropped from the ring."""
+        with self._changed:
+            if seq >= self._sequence:
+                return []
+            if not self._events or self._events[0]['seq'] > seq + 1:
+                return None
+            # Sequence numbers are contiguous, so the new events are the last
+            # (sequence - seq) entries; deque indexing near the end is cheap.
+            size = len(self._events)
+            events = [self._events[i] for i in range(size - (self._sequence - seq), size)]
+        if kinds is not None:
+            events = [event for event in events if event['kind'] in kinds]
+        return events
+
+    def wait(self, seq, timeout):
+        """Block until there is an event after `seq` or `timeout` seconds pass."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self._sequence > seq, timeout)
+
+    def claim(self, orders, order_id, driver_id):
+        """Claim an order for a driver; returns the winning claim event, or None.
+
+        The first claim recorded for an order wins. A driver repeating their
+        own claim gets the same event back, so retries are safe; a losing
+        driver gets the winner's event to report who took the job.
+        """
+        with self._claim_lock:
+            winner = self._claims.get(order_id)
+            if winner is None and orders.claim(order_id, driver_id):
+                winner = self._claims.get(order_id)
+            return winner
+
+    def on_order_event(self, event, old, new):
+        if event == 'created':
+            self.publish(ORDER_CREATED, new['id'], status=new['status'], driver_id=new['driver_id'], product_id=new['product_id'])
+        elif event == 'deleted':
+            self._claims.pop(old['id'], None)
+            self.publish(ORDER_DELETED, old['id'], status=old['status'], driver_id=old['driver_id'], product_id=old['product_id'])
+        elif event == 'archived':
+            # Delivered orders are on no board; nothing to push.
+            self._claims.pop(old['id'], None)
+        elif old['status'] == 'Order Placed' and new['status'] == 'Driver Assigned':
+            self._claims[new['id']] = self.publish(ORDER_CLAIMED, new['id'], status=new['status'], driver_id=new['driver_id'], product_id=new['product_id'])
+        elif old['status'] != new['status']:
+            self.publish(ORDER_STATUS, new['id'], status=new['status'], previous_status=old['status'], driver_id=new['driver_id'], product_id=new['product_id'])
+
+    def on_product_event(self, event, old, new):
+        if old is not None and new is not None and old['stock'] != new['stock']:
+            self.publish(STOCK_CHANGED, new['id'], stock=new['stock'], previous_stock=old['stock'])
+
+
+JOB_EVENTS = (ORDER_CREATED, ORDER_CLAIMED, ORDER_STATUS, ORDER_DELETED)
+
+
+def _job_key(job):
+    return (job.get('deadhead_km', 0), -job.get('fee_per_km', 0), job['order']['id'])
+
+
+class DriverBoard:
+    """One driver's open jobs and active deliveries, kept current from feed deltas.
+
+    `refresh` applies the events since the last call: new open orders the
+    driver can take are inserted in place, claimed or closed ones dropped.
+    Active deliveries are re-read only when an event touches this driver.
+    A full reload happens only when the driver record changes or the feed
+    has moved on past the ring.
+    """
+
+    def __init__(self, repos, matcher, driver_id, matched_only):
+        self.repos = repos
+        self.matcher = matcher
+        self.driver_id = driver_id
+        self.matched_only = matched_only
+        self.reloads = 0
+        self.reload()
+
+    def reload(self):
+        self.seq = self.repos.feed.sequence
+        self.driver = self.repos.drivers.get(self.driver_id)
+        if self.matched_only:
+            self.jobs = sorted(self.matcher.jobs_for_driver(self.driver, limit=None), key=_job_key)
+        else:
+            jobs = (self.repos.orders.as_job(order) for order in self.repos.orders.list(status='Order Placed'))
+            self.jobs = [{'order': job} for job in jobs if job is not None]
+        self.deliveries = self.repos.orders.active_for_driver(self.driver_id)
+        self.reloads += 1
+
+    def refresh(self):
+        """Apply pending feed events; returns True if anything shown changed."""
+        if self.repos.drivers.get(self.driver_id) is not self.driver:
+            self.reload()
+            return True
+        events = self.repos.feed.since(self.seq)
+        if events is None:
+            self.reload()
+            return True
+        if not events:
+            return False
+        self.seq = events[-1]['seq']
+        changed = False
+        for event in events:
+            if event['kind'] not in JOB_EVENTS:
+                continue
+            if event['kind'] == ORDER_CREATED:
+                changed = self._add_job(event['id']) or changed
+            else:
+                changed = self._drop_job(event['id']) or changed
+            if event['driver_id'] == self.driver_id:
+                self.deliveries = self.repos.orders.active_for_driver(self.driver_id)
+                changed = True
+        return changed
+
+    def _add_job(self, order_id):
+        order = self.repos.orders.get(order_id)
+        if order is None or order['status'] != 'Order Placed':
+            return False
+        # An order created while reload() was reading can already be listed.
+        if any(existing['order']['id'] == order_id for existing in self.jobs):
+            return False
+        if self.matched_only:
+            job = self.matcher.match_job(self.driver, order)
+        else:
+            order = self.repos.orders.as_job(order)
+            job = {'order': order} if order is not None else None
+        if job is None:
+            return False
+        keys = [_job_key(existing) for existing in self.jobs]
+        self.jobs.insert(bisect.bisect(keys, _job_key(job)), job)
+        return True
+
+    def _drop_job(self, order_id):
+        for i, job in enumerate(self.jobs):
+            if job['order']['id'] == order_id:
+                del self.jobs[i]
+                return True
+        return False
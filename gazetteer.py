@@ -0,0 +1,369 @@
+"""Offline gazetteer of Assam towns, villages and PIN codes.
+
+The bundled CSV is compiled once into a binary index beside it. Every
+process then memory-maps that file read-only: opening it costs a few
+milliseconds and its pages are shared by all workers instead of being
+copied into each one.
+
+The index holds the place table, a byte trie over normalised names, every
+word-suffix of a name and PIN codes for typeahead, and a uniform grid for
+nearest-place lookups.
+"""
+import csv
+import json
+import mmap
+import os
+import re
+import threading
+
+import numpy as np
+from numpy.lib.format import descr_to_dtype, dtype_to_descr
+
+from cache import versioned
+from distances import ASSAM_CITIES, EARTH_RADIUS_KM, haversine_km
+
+PLACES_PATH = os.getenv("INDE_PLACES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "assam_places.csv"))
+INDEX_MAGIC = b"INDEGAZ1"
+PLACE_KINDS = ['town', 'locality', 'village']
+GRID_CELL_DEG = 0.25
+HUB_GRID_CELL_DEG = 0.5
+MAX_SUGGESTIONS = 10
+
+PLACE_DTYPE = np.dtype([
+    ('pin', '<u4'),
+    ('name_start', '<u4'),
+    ('name_len', '<u2'),
+    ('district', '<u2'),
+    ('kind', 'u1')
+])
+
+KM_PER_DEGREE = np.radians(1) * EARTH_RADIUS_KM
+PIN_PATTERN = re.compile(r"\b(\d{6})\b")
+
+
+def normalize(text):
+    return re.sub(r"[^a-z0-9]+", " ", str(text).lower()).strip()
+
+
+def index_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + ".idx"
+
+
+class SpatialGrid:
+    """Points bucketed into square lat/lon cells, stored CSR-style.
+
+    `items[start[c]:start[c + 1]]` are the point ids in cell c. Nearest
+    queries search outward ring by ring and stop once no unvisited ring can
+    hold anything closer than the best hit so far.
+    """
+
+    def __init__(self, coordinates, start, items, lat0, lon0, rows, cols, cell_deg):
+        self.coordinates = coordinates
+        self.start = start
+        self.items = items
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.rows = rows
+        self.cols = cols
+        self.cell_deg = cell_deg
+        max_lat = min(abs(lat0) + rows * cell_deg, 89.0)
+        self._cell_km = cell_deg * KM_PER_DEGREE * np.cos(np.radians(max_lat))
+
+    @classmethod
+    def build(cls, coordinates, cell_deg):
+        coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        arrays, shape = cls.layout(coordinates, cell_deg)
+        return cls(coordinates, arrays['grid_start'], arrays['grid_items'], **shape)
+
+    @staticmethod
+    def layout(coordinates, cell_deg):
+        lat0 = float(np.floor(coordinates[:, 0].min() / cell_deg) * cell_deg) if len(coordinates) else 0.0
+        lon0 = float(np.floor(coordinates[:, 1].min() / cell_deg) * cell_deg) if len(coordinates) else 0.0
+        rows = int((coordinates[:, 0].max() - lat0) // cell_deg) + 1 if len(coordinates) else 1
+        cols = int((coordinates[:, 1].max() - lon0) // cell_deg) + 1 if len(coordinates) else 1
+        row = ((coordinates[:, 0] - lat0) // cell_deg).astype(np.int64)
+        col = ((coordinates[:, 1] - lon0) // cell_deg).astype(np.int64)
+        cell = row * cols + col
+        order = np.argsort(cell, kind='stable')
+        start = np.searchsorted(cell[order], np.arange(rows * cols + 1)).astype('<u4')
+        arrays = {'grid_start': start, 'grid_items': order.astype('<u4')}
+        shape = {'lat0': lat0, 'lon0': lon0, 'rows': rows, 'cols': cols, 'cell_deg': cell_deg}
+        return arrays, shape
+
+    def _cell_of(self, coords):
+        row = int(np.clip((coords[0] - self.lat0) // self.cell_deg, 0, self.rows - 1))
+        col = int(np.clip((coords[1] - self.lon0) // self.cell_deg, 0, self.cols - 1))
+        return row, col
+
+    def _ring(self, row, col, ring):
+        lo_col, hi_col = max(col - ring, 0), min(col + ring, self.cols - 1)
+        chunks = []
+        for r in range(max(row - ring, 0), min(row + ring, self.rows - 1) + 1):
+            if ring == 0 or abs(r - row) == ring:
+                spans = [(lo_col, hi_col)]
+            else:
+                spans = [(c, c) for c in {col - ring, col + ring} if 0 <= c < self.cols]
+            for first, last in spans:
+                chunks.append(self.items[self.start[r * self.cols + first]:self.start[r * self.cols + last + 1]])
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.intp)
+
+    def nearest(self, coords):
+        """(point id, km) of the point closest to `coords`, or (None, inf) when empty."""
+        coords = (float(coords[0]), float(coords[1]))
+        row, col = self._cell_of(coords)
+        best, best_km = None, np.inf
+        for ring in range(max(self.rows, self.cols) + 1):
+            if best_km <= (ring - 1) * self._cell_km:
+                break
+            ids = self._ring(row, col, ring)
+            if not len(ids):
+                continue
+            km = haversine_km(self.coordinates[ids], coords)
+            i = int(np.argmin(km))
+            if km[i] < best_km:
+                best, best_km = int(ids[i]), float(km[i])
+        return best, best_km
+
+
+def build_index(csv_path=PLACES_PATH, index_path=None):
+    """Compile the places CSV into the binary index and return its path."""
+    index_path = index_path or index_path_for(csv_path)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    districts = sorted({row['district'] for row in rows})
+    district_ids = {name: i for i, name in enumerate(districts)}
+    places = np.zeros(len(rows), dtype=PLACE_DTYPE)
+    names = bytearray()
+    keys = []
+    for i, row in enumerate(rows):
+        encoded = row['name'].encode("utf-8")
+        places[i] = (
+            int(row['pin']),
+            len(names),
+            len(encoded),
+            district_ids[row['district']],
+            PLACE_KINDS.index(row['kind'])
+        )
+        names += encoded
+        words = normalize(row['name']).split()
+        keys.extend((" ".join(words[w:]).encode("ascii"), i) for w in range(len(words)))
+        keys.append((row['pin'].encode("ascii"), i))
+    keys.sort()
+
+    coordinates = np.array([(float(row['lat']), float(row['lon'])) for row in rows], dtype='<f8').reshape(-1, 2)
+    grid_arrays, grid_shape = SpatialGrid.layout(coordinates, GRID_CELL_DEG)
+    sections = {
+        'places': places,
+        'coordinates': coordinates,
+        'names': np.frombuffer(bytes(names), dtype='u1'),
+        'postings': np.array([i for _, i in keys], dtype='<u4'),
+        **_build_trie([key for key, _ in keys]),
+        **grid_arrays
+    }
+
+    layout = {}
+    offset = 0
+    for name, array in sections.items():
+        layout[name] = [offset, dtype_to_descr(array.dtype), list(array.shape)]
+        offset += _aligned(array.nbytes)
+    header = json.dumps({
+        'districts': districts,
+        'grid': grid_shape,
+        'sections': layout
+    }).encode("utf-8")
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(INDEX_MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        f.write(b"\0" * (_aligned(12 + len(header)) - 12 - len(header)))
+        for array in sections.values():
+            data = array.tobytes()
+            f.write(data)
+            f.write(b"\0" * (_aligned(len(data)) - len(data)))
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+def _aligned(n):
+    return (n + 7) // 8 * 8
+
+
+def _build_trie(keys):
+    # Breadth-first layout keeps each node's children contiguous and sorted
+    # by byte. Keys are sorted, so every node's subtree is one contiguous
+    # run of postings.
+    byte, child_start, child_count, post_start, post_end = [0], [0], [0], [0], [len(keys)]
+    queue = [(0, 0, 0, len(keys))]
+    for node, depth, lo, hi in queue:
+        i = lo
+        while i < hi and len(keys[i]) == depth:
+            i += 1
+        first = len(byte)
+        while i < hi:
+            b = keys[i][depth]
+            j = i
+            while j < hi and keys[j][depth] == b:
+                j += 1
+            queue.append((len(byte), depth + 1, i, j))
+            byte.append(b)
+            child_start.append(0)
+            child_count.append(0)
+            post_start.append(i)
+            post_end.append(j)
+            i = j
+        child_start[node] = first
+        child_count[node] = len(byte) - first
+    return {
+        'trie_byte': np.array(byte, dtype='u1'),
+        'trie_child_start': np.array(child_start, dtype='<u4'),
+        'trie_child_count': np.array(child_count, dtype='<u2'),
+        'trie_post_start': np.array(post_start, dtype='<u4'),
+        'trie_post_end': np.array(post_end, dtype='<u4')
+    }
+
+
+class Gazetteer:
+    """Read-only view over a memory-mapped gazetteer index.
+
+    Places come back as dicts with id, name, kind, district, pin,
+    coordinates and label.
+    """
+
+    def __init__(self, index_path):
+        with open(index_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"{index_path} is not a gazetteer index")
+        header_len = int.from_bytes(self._mmap[8:12], "little")
+        header = json.loads(self._mmap[12:12 + header_len])
+        data_start = _aligned(12 + header_len)
+        for name, (offset, descr, shape) in header['sections'].items():
+            array = np.frombuffer(self._mmap, dtype=descr_to_dtype(descr), count=int(np.prod(shape)), offset=data_start + offset)
+            setattr(self, f"_{name}", array.reshape(shape))
+        self.districts = header['districts']
+        self.coordinates = self._coordinates
+        self.grid = SpatialGrid(self.coordinates, self._grid_start, self._grid_items, **header['grid'])
+        self._resolved = {}
+
+    def __len__(self):
+        return len(self._places)
+
+    def place(self, place_id):
+        row = self._places[place_id]
+        start, length = int(row['name_start']), int(row['name_len'])
+        name = self._names[start:start + length].tobytes().decode("utf-8")
+        district = self.districts[int(row['district'])]
+        pin = f"{int(row['pin']):06d}"
+        return {
+            'id': int(place_id),
+            'name': name,
+            'kind': PLACE_KINDS[int(row['kind'])],
+            'district': district,
+            'pin': pin,
+            'coordinates': tuple(self.coordinates[place_id].tolist()),
+            'label': f"{name}, {district} {pin}"
+        }
+
+    def _walk(self, key):
+        node = 0
+        for b in key:
+            start = int(self._trie_child_start[node])
+            children = self._trie_byte[start:start + int(self._trie_child_count[node])]
+            k = int(np.searchsorted(children, b))
+            if k == len(children) or children[k] != b:
+                return None
+            node = start + k
+        return node
+
+    def _matches(self, query):
+        node = self._walk(normalize(query).encode("ascii", "ignore"))
+        if node is None:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(self._postings[self._trie_post_start[node]:self._trie_post_end[node]])
+
+    def search(self, query, limit=MAX_SUGGESTIONS):
+        """Places whose name, any later word of the name, or PIN starts with `query`."""
+        if not normalize(query):
+            return []
+        ids = self._matches(query)
+        rows = self._places[ids]
+        order = np.lexsort((rows['name_len'], rows['kind']))[:limit]
+        return [self.place(i) for i in ids[order].tolist()]
+
+    def by_pin(self, pin):
+        return [place for place in map(self.place, self._matches(pin).tolist()) if place['pin'] == pin]
+
+    def by_name(self, name):
+        name = normalize(name)
+        return [place for place in map(self.place, self._matches(name).tolist()) if normalize(place['name']) == name]
+
+    def resolve(self, text):
+        """The place named by a label, "name", "name PIN" or a bare PIN, else None."""
+        if text in self._resolved:
+            return self._resolved[text]
+        name = str(text).split(",", 1)[0]
+        match = PIN_PATTERN.search(str(text))
+        if match:
+            candidates = self.by_pin(match.group(1))
+            named = [place for place in candidates if normalize(place['name']) == normalize(PIN_PATTERN.sub("", name))]
+            candidates = named or candidates
+        else:
+            candidates = self.by_name(name)
+        place = min(candidates, key=lambda p: PLACE_KINDS.index(p['kind'])) if candidates else None
+        if len(self._resolved) < 4096:
+            self._resolved[text] = place
+        return place
+
+    def geocode(self, address):
+        """Best-effort place for a free-text address: its PIN first, then any place name in it."""
+        match = PIN_PATTERN.search(address or "")
+        if match:
+            place = self.resolve(match.group(1))
+            if place is not None:
+                return place
+        words = normalize(address or "").split()
+        for size in (3, 2, 1):
+            for i in range(len(words) - size, -1, -1):
+                candidates = self.by_name(" ".join(words[i:i + size]))
+                if candidates:
+                    return min(candidates, key=lambda p: PLACE_KINDS.index(p['kind']))
+        return None
+
+    def nearest(self, coords):
+        place_id, km = self.grid.nearest(coords)
+        return None if place_id is None else dict(self.place(place_id), km=round(km, 2))
+
+
+@versioned('cities')
+def hub_grid():
+    return list(ASSAM_CITIES), SpatialGrid.build(list(ASSAM_CITIES.values()), HUB_GRID_CELL_DEG)
+
+
+def nearest_hub(coords):
+    """Name of the ASSAM_CITIES hub closest to `coords`."""
+    names, grid = hub_grid()
+    hub, _ = grid.nearest(coords)
+    return names[hub]
+
+
+def open_gazetteer(csv_path=PLACES_PATH):
+    index_path = index_path_for(csv_path)
+    if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(csv_path):
+        build_index(csv_path, index_path)
+    return Gazetteer(index_path)
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = open_gazetteer()
+    return _gazetteer
@@ -0,0 +1,314 @@
+import bisect
+import heapq
+import math
+import threading
+
+from distances import ASSAM_CITIES, DEFAULT_COORDINATES
+from repository import get_repositories
+
+VEHICLE_CAPACITIES = {
+    "Mini Truck (1 Ton)": (1000, 10),
+    "Medium Truck (3 Ton)": (3000, 20),
+    "Large Truck (5 Ton)": (5000, 30),
+    "Extra Large Truck (10 Ton)": (10000, 50)
+}
+
+CELL_KM = 20.0
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON_EQUATOR = 111.320
+REFERENCE_LAT = 26.2
+
+_CLASS_LIMITS = sorted(VEHICLE_CAPACITIES.values())
+
+
+def load_class(weight_kg, volume_m3):
+    """Smallest vehicle class that can carry the load, or len(classes) if none can."""
+    for i, (capacity_kg, capacity_m3) in enumerate(_CLASS_LIMITS):
+        if weight_kg <= capacity_kg and volume_m3 <= capacity_m3:
+            return i
+    return len(_CLASS_LIMITS)
+
+
+def vehicle_class(capacity_kg, capacity_m3):
+    """Largest vehicle class whose limits fit inside the given capacity, or -1."""
+    result = -1
+    for i, (class_kg, class_m3) in enumerate(_CLASS_LIMITS):
+        if class_kg <= capacity_kg and class_m3 <= capacity_m3:
+            result = i
+    return result
+
+
+def _project(coords):
+    lat, lon = coords
+    return (
+        lon * KM_PER_DEG_LON_EQUATOR * math.cos(math.radians(REFERENCE_LAT)),
+        lat * KM_PER_DEG_LAT
+    )
+
+
+def planar_km(from_coords, to_coords):
+    x1, y1 = _project(from_coords)
+    x2, y2 = _project(to_coords)
+    return math.hypot(x2 - x1, y2 - y1)
+
+
+class SpatialGrid:
+    """Uniform grid of `cell_km` cells over an equirectangular projection.
+
+    Distances are planar km in that projection, which stays within about 1%
+    of geodesic across Assam and gives an exact lower bound for ring search.
+    """
+
+    def __init__(self, cell_km=CELL_KM):
+        self.cell_km = cell_km
+        self._cells = {}
+        self._points = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, xy):
+        return (math.floor(xy[0] / self.cell_km), math.floor(xy[1] / self.cell_km))
+
+    def add(self, point):
+        if point in self._points:
+            return
+        xy = _project(point)
+        self._points[point] = xy
+        self._cells.setdefault(self._cell(xy), set()).add(point)
+
+    def remove(self, point):
+        xy = self._points.pop(point, None)
+        if xy is None:
+            return
+        cell = self._cell(xy)
+        self._cells[cell].discard(point)
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    def _ring(self, cx, cy, r):
+        if r == 0:
+            yield (cx, cy)
+            return
+        for dx in range(-r, r + 1):
+            yield (cx + dx, cy - r)
+            yield (cx + dx, cy + r)
+        for dy in range(-r + 1, r):
+            yield (cx - r, cy + dy)
+            yield (cx + r, cy + dy)
+
+    def nearest(self, coords, max_km=None):
+        """Yield (distance_km, point) in non-decreasing distance order."""
+        if not self._cells:
+            return
+        qx, qy = _project(coords)
+        cx, cy = self._cell((qx, qy))
+        max_ring = max(
+            max(abs(x - cx), abs(y - cy)) for x, y in self._cells
+        )
+        if max_km is not None:
+            max_ring = min(max_ring, int(max_km // self.cell_km) + 1)
+        heap = []
+        for r in range(max_ring + 1):
+            for cell in self._ring(cx, cy, r):
+                for point in self._cells.get(cell, ()):
+                    px, py = self._points[point]
+                    heapq.heappush(heap, (math.hypot(px - qx, py - qy), point))
+            # Anything in ring r + 1 or beyond is at least r cells away.
+            bound = r * self.cell_km
+            while heap and heap[0][0] <= bound:
+                distance, point = heapq.heappop(heap)
+                if max_km is not None and distance > max_km:
+                    return
+                yield distance, point
+        while heap:
+            distance, point = heapq.heappop(heap)
+            if max_km is not None and distance > max_km:
+                return
+            yield distance, point
+
+
+class MatchingEngine:
+    """Matches open orders and available drivers by location and capacity.
+
+    Orders are grouped by pickup point and by the smallest vehicle class that
+    can carry them, kept sorted by fee per km. Drivers are grouped by location
+    point and vehicle class. Queries walk points outward from the query
+    location and stop as soon as enough matches are found.
+    """
+
+    def __init__(self, repos, cell_km=CELL_KM):
+        self.repos = repos
+        self._lock = threading.RLock()
+        self._order_grid = SpatialGrid(cell_km)
+        self._driver_grid = SpatialGrid(cell_km)
+        self._orders_at = {}
+        self._order_keys = {}
+        self._drivers_at = {}
+        self._driver_keys = {}
+        repos.orders.subscribe(self.on_order_event)
+        repos.drivers.subscribe(self.on_driver_event)
+        self.rebuild()
+
+    def rebuild(self):
+        with self._lock:
+            self._order_grid = SpatialGrid(self._order_grid.cell_km)
+            self._driver_grid = SpatialGrid(self._driver_grid.cell_km)
+            self._orders_at.clear()
+            self._order_keys.clear()
+            self._drivers_at.clear()
+            self._driver_keys.clear()
+            for order in self.repos.orders.list(status='Order Placed'):
+                self.add_order(order)
+            for driver in self.repos.drivers.list(available=True):
+                self.add_driver(driver)
+
+    def pickup_coordinates(self, order):
+        product = self.repos.products.get(order['product_id'])
+        if product is not None and product['location'] == order['pickup_location']:
+            return tuple(product['coordinates'])
+        return ASSAM_CITIES.get(order['pickup_location'], DEFAULT_COORDINATES)
+
+    @staticmethod
+    def fee_per_km(order):
+        return order['delivery_charge'] / max(order['distance_km'], 1)
+
+    # Orders
+
+    def add_order(self, order):
+        # A cart shipment is one job, filed under its first line.
+        order = self.repos.orders.as_job(order)
+        if order is None:
+            return
+        with self._lock:
+            self.remove_order(order['id'])
+            point = self.pickup_coordinates(order)
+            klass = load_class(order['weight_kg'], order['volume_m3'])
+            entry = (-self.fee_per_km(order), order['id'])
+            bisect.insort(self._orders_at.setdefault(point, {}).setdefault(klass, []), entry)
+            self._order_grid.add(point)
+            self._order_keys[order['id']] = (point, klass, entry)
+
+    def remove_order(self, order_id):
+        with self._lock:
+            key = self._order_keys.pop(order_id, None)
+            if key is None:
+                return
+            point, klass, entry = key
+            bucket = self._orders_at[point][klass]
+            del bucket[bisect.bisect_left(bucket, entry)]
+            if not bucket:
+                del self._orders_at[point][klass]
+                if not self._orders_at[point]:
+                    del self._orders_at[point]
+                    self._order_grid.remove(point)
+
+    def on_order_event(self, event, old, new):
+        if new is not None and new['status'] == 'Order Placed':
+            self.add_order(new)
+        elif old is not None:
+            self.remove_order(old['id'])
+
+    # Drivers
+
+    def add_driver(self, driver):
+        with self._lock:
+            self.remove_driver(driver['id'])
+            if not driver.get('available', True):
+                return
+            point = tuple(driver['coordinates'])
+            klass = vehicle_class(driver['capacity_kg'], driver['capacity_m3'])
+            self._drivers_at.setdefault(point, {}).setdefault(klass, {})[driver['id']] = None
+            self._driver_grid.add(point)
+            self._driver_keys[driver['id']] = (point, klass)
+
+    def remove_driver(self, driver_id):
+        with self._lock:
+            key = self._driver_keys.pop(driver_id, None)
+            if key is None:
+                return
+            point, klass = key
+            bucket = self._drivers_at[point][klass]
+            bucket.pop(driver_id, None)
+            if not bucket:
+                del self._drivers_at[point][klass]
+                if not self._drivers_at[point]:
+                    del self._drivers_at[point]
+                    self._driver_grid.remove(point)
+
+    def on_driver_event(self, event, old, new):
+        if new is not None:
+            self.add_driver(new)
+        elif old is not None:
+            self.remove_driver(old['id'])
+
+    # Queries
+
+    def drivers_for_order(self, order, k=5, max_km=None):
+        """The k nearest available drivers whose vehicle can carry `order`, as (driver, deadhead_km)."""
+        order = self.repos.orders.as_job(order) or order
+        needed = load_class(order['weight_kg'], order['volume_m3'])
+        matches = []
+        with self._lock:
+            for distance, point in self._driver_grid.nearest(self.pickup_coordinates(order), max_km):
+                for klass, driver_ids in sorted(self._drivers_at[point].items()):
+                    if klass < needed:
+                        continue
+                    for driver_id in driver_ids:
+                        driver = self.repos.drivers.get(driver_id)
+                        if driver is None or driver['capacity_kg'] < order['weight_kg'] or driver['capacity_m3'] < order['volume_m3']:
+                            continue
+                        matches.append((driver, round(distance, 2)))
+                        if len(matches) >= k:
+                            return matches
+        return matches
+
+    def match_job(self, driver, order):
+        """The jobs_for_driver entry for a single order, or None if the driver cannot take it."""
+        order = self.repos.orders.as_job(order)
+        if order is None or order['status'] != 'Order Placed':
+            return None
+        if load_class(order['weight_kg'], order['volume_m3']) > vehicle_class(driver['capacity_kg'], driver['capacity_m3']):
+            return None
+        return {
+            'order': order,
+            'deadhead_km': round(planar_km(tuple(driver['coordinates']), self.pickup_coordinates(order)), 2),
+            'fee_per_km': round(self.fee_per_km(order), 2)
+        }
+
+    def jobs_for_driver(self, driver, limit=20, max_km=None):
+        """Open jobs the driver's vehicle can carry, nearest pickup first and best fee per km within a pickup.
+
+        Returns dicts with the order, `deadhead_km` to the pickup and `fee_per_km`.
+        Pass limit=None for every eligible job.
+        """
+        klass = vehicle_class(driver['capacity_kg'], driver['capacity_m3'])
+        matches = []
+        with self._lock:
+            for distance, point in self._order_grid.nearest(tuple(driver['coordinates']), max_km):
+                buckets = [bucket for bucket_class, bucket in self._orders_at[point].items() if bucket_class <= klass]
+                for neg_fee_per_km, order_id in heapq.merge(*buckets):
+                    order = self.repos.orders.get(order_id)
+                    if order is None or order['status'] != 'Order Placed':
+                        continue
+                    matches.append({
+                        'order': self.repos.orders.as_job(order) or order,
+                        'deadhead_km': round(distance, 2),
+                        'fee_per_km': round(-neg_fee_per_km, 2)
+                    })
+                    if limit is not None and len(matches) >= limit:
+                        return matches
+        return matches
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_matching_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = MatchingEngine(get_repositories())
+    return _engine
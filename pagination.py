@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+
+PAGE_SIZES = [10, 25, 50, 100]
+
+
+class Page:
+    def __init__(self, items, number, page_size, total):
+        self.items = items
+        self.number = number
+        self.page_size = page_size
+        self.total = total
+
+    @property
+    def page_count(self):
+        return max(1, math.ceil(self.total / self.page_size))
+
+    @property
+    def start(self):
+        return (self.number - 1) * self.page_size
+
+    @property
+    def end(self):
+        return self.start + len(self.items)
+
+
+def page_count(total, page_size):
+    return max(1, math.ceil(total / page_size))
+
+
+def clamp_page(page, total, page_size):
+    return min(max(1, int(page)), page_count(total, page_size))
+
+
+def paginate(rows, page, page_size, sort_values=None, descending=False):
+    """Return only the rows on `page`, optionally ordered by `sort_values`.
+
+    `sort_values` is a numeric sequence aligned with `rows`; it is argsorted in
+    NumPy and only the selected slice of rows is materialized.
+    """
+    total = len(rows)
+    page = clamp_page(page, total, page_size)
+    start = (page - 1) * page_size
+    end = min(start + page_size, total)
+
+    if sort_values is None:
+        return Page(list(rows[start:end]), page, page_size, total)
+
+    keys = np.asarray(sort_values, dtype=float)
+    if len(keys) != total:
+        raise ValueError("sort_values must have one entry per row")
+    if descending:
+        keys = -keys
+    # A stable sort keeps ties in catalog order, so pages never overlap.
+    order = np.argsort(keys, kind='stable')
+    return Page([rows[i] for i in order[start:end]], page, page_size, total)
@@ -0,0 +1,282 @@
+import os
+
+import numpy as np
+
+from cache import VERSIONS, VersionedCache
+from distances import ASSAM_CITIES, DEFAULT_COORDINATES, DISTANCES
+from gazetteer import get_gazetteer, nearest_hub
+from profiling import instrumented
+from routing import get_road_distances
+from tariff import get_tariffs
+
+DISTANCE_ENGINES = ['road', 'geodesic']
+DISTANCE_ENGINE = os.getenv("INDE_DISTANCE_ENGINE", "road")
+
+QUOTE_CACHE_ENTRIES = 4096
+
+QUOTE_COLUMNS = ['product_id', 'quantity', 'delivery_location', 'product_total', 'delivery_charge', 'distance_km', 'grand_total']
+
+
+def distance_matrix(engine=None):
+    """The distance matrix behind `engine`: 'road' (graph routes) or 'geodesic'."""
+    engine = engine or DISTANCE_ENGINE
+    if engine == 'road':
+        return get_road_distances()
+    if engine == 'geodesic':
+        return DISTANCES
+    raise ValueError(f"Unknown distance engine: {engine}")
+
+
+def delivery_coordinates(delivery_location):
+    """Coordinates for a hub name, or a gazetteer place label, name or PIN."""
+    coords = ASSAM_CITIES.get(delivery_location)
+    if coords is None:
+        place = get_gazetteer().resolve(delivery_location) if delivery_location else None
+        coords = place['coordinates'] if place else DEFAULT_COORDINATES
+    return coords
+
+
+@instrumented('pricing.calculate_distance')
+def calculate_distance(from_coords, to_coords, engine=None):
+    return distance_matrix(engine).between(from_coords, to_coords)
+
+
+@instrumented('pricing.calculate_delivery_price')
+def calculate_delivery_price(weight_kg, volume_m3, quantity, distance_km, surcharge=0.0):
+    return round(get_tariffs().active().charge(weight_kg, volume_m3, quantity, distance_km, surcharge), 2)
+
+
+def region_surcharge(tariff, delivery_location):
+    """The tariff's surcharge for the hub a delivery location belongs to."""
+    if not tariff.surcharges:
+        return 0.0
+    if delivery_location in ASSAM_CITIES:
+        return tariff.surcharge(delivery_location)
+    return tariff.surcharge(nearest_hub(delivery_coordinates(delivery_location)))
+
+
+# Memoized per (tariff version, product, quantity, route). Product fields are
+# part of the key, so edits to a product never serve a stale quote.
+QUOTES = VersionedCache(VERSIONS, max_entries=QUOTE_CACHE_ENTRIES)
+
+
+@instrumented('pricing.calculate_total_price')
+def calculate_total_price(product, quantity, delivery_location, engine=None):
+    key = (
+        product['id'],
+        product['price'],
+        product['weight_kg'],
+        product['volume_m3'],
+        tuple(product['coordinates']),
+        quantity,
+        delivery_location,
+        engine or DISTANCE_ENGINE
+    )
+    return dict(QUOTES.get_or_compute('calculate_total_price', ('tariff', 'cities'), key, lambda: _total_price(product, quantity, delivery_location, engine)))
+
+
+def _total_price(product, quantity, delivery_location, engine):
+    product_total = product['price'] * quantity
+
+    distance = calculate_distance(product['coordinates'], delivery_coordinates(delivery_location), engine)
+
+    delivery_charge = calculate_delivery_price(
+        product['weight_kg'],
+        product['volume_m3'],
+        quantity,
+        distance,
+        region_surcharge(get_tariffs().active(), delivery_location)
+    )
+
+    return {
+        'product_total': product_total,
+        'delivery_charge': delivery_charge,
+        'distance_km': round(distance, 2),
+        'grand_total': product_total + delivery_charge
+    }
+
+
+def _round2(values):
+    # Python's round() is correctly rounded on the decimal value while
+    # np.round scales by 100 first; keep the scalar path's results bit-for-bit.
+    return np.fromiter((round(v, 2) for v in values.tolist()), dtype=float, count=values.size)
+
+
+@instrumented('pricing.calculate_delivery_prices')
+def calculate_delivery_prices(weight_kg, volume_m3, quantity, distance_km, surcharge=0.0, tariff=None):
+    charges = (tariff or get_tariffs().active()).charges(weight_kg, volume_m3, quantity, distance_km, surcharge)
+    return _round2(charges.ravel()).reshape(charges.shape)
+
+
+def _quote_rows(products, product_ids, quantities, delivery_locations, engine, tariff=None):
+    # Per-row arrays behind batch_quote and quote_cart.
+    catalog = products if isinstance(products, dict) else {p['id']: p for p in products}
+    distances = distance_matrix(engine)
+
+    product_ids, quantities, delivery_locations = np.broadcast_arrays(
+        np.asarray(product_ids),
+        np.asarray(quantities),
+        np.asarray(delivery_locations, dtype=object)
+    )
+    product_ids = product_ids.ravel()
+    quantities = quantities.ravel()
+    delivery_locations = delivery_locations.ravel()
+
+    unique_ids, product_rows = np.unique(product_ids, return_inverse=True)
+    missing = [pid for pid in unique_ids.tolist() if pid not in catalog]
+    if missing:
+        raise KeyError(f"Unknown product id(s): {missing}")
+    unique_products = [catalog[pid] for pid in unique_ids.tolist()]
+
+    price = np.array([p['price'] for p in unique_products])[product_rows]
+    weight_kg = np.array([p['weight_kg'] for p in unique_products], dtype=float)[product_rows]
+    volume_m3 = np.array([p['volume_m3'] for p in unique_products], dtype=float)[product_rows]
+    origin = np.array([distances.index_of(p['coordinates']) for p in unique_products], dtype=np.intp)[product_rows]
+
+    unique_locations, location_rows = np.unique(delivery_locations.astype(str), return_inverse=True)
+    destination = np.array(
+        [distances.index_of(delivery_coordinates(name)) for name in unique_locations.tolist()],
+        dtype=np.intp
+    )[location_rows]
+
+    tariff = tariff or get_tariffs().active()
+    surcharge = np.array([region_surcharge(tariff, name) for name in unique_locations.tolist()], dtype=float)[location_rows]
+
+    return {
+        'catalog': catalog,
+        'product_ids': product_ids,
+        'quantities': quantities,
+        'delivery_locations': delivery_locations,
+        'product_total': price * quantities,
+        'weight_kg': weight_kg,
+        'volume_m3': volume_m3,
+        'surcharge': surcharge,
+        'tariff': tariff,
+        'distance': distances.lookup(origin, destination)
+    }
+
+
+@instrumented('pricing.batch_quote')
+def batch_quote(products, product_ids, quantities, delivery_locations, engine=None, tariff=None):
+    """Price every (product_id, quantity, delivery_location) row in one pass.
+
+    The three inputs broadcast against each other. `products` is either a
+    list of product dicts or a mapping of id to product. Returns a DataFrame
+    with the same figures calculate_total_price gives for each row. `tariff`
+    is a CompiledTariff to price with instead of the active one.
+    """
+    rows = _quote_rows(products, product_ids, quantities, delivery_locations, engine, tariff)
+    delivery_charge = calculate_delivery_prices(rows['weight_kg'], rows['volume_m3'], rows['quantities'], rows['distance'], rows['surcharge'], rows['tariff'])
+
+    # pandas is imported on first use so pages that never batch-quote do not pay for it.
+    import pandas as pd
+
+    return pd.DataFrame({
+        'product_id': rows['product_ids'],
+        'quantity': rows['quantities'],
+        'delivery_location': rows['delivery_locations'],
+        'product_total': rows['product_total'],
+        'delivery_charge': delivery_charge,
+        'distance_km': _round2(rows['distance']),
+        'grand_total': rows['product_total'] + delivery_charge
+    }, columns=QUOTE_COLUMNS)
+
+
+@instrumented('pricing.quote_cart')
+def quote_cart(products, lines, delivery_location, engine=None):
+    """Price a cart of (product_id, quantity) lines going to one delivery location.
+
+    Every line is priced in one batched pass. Lines are then grouped into
+    shipments by pickup location: a shipment is one load, charged once on
+    its combined weight and volume over the longest of its lines' routes,
+    and its charge is split over its lines by weight. Shipments are listed
+    in the order their first line appears in the cart.
+
+    Returns the per-line figures, the shipments (pickup location, line
+    indexes, load, distance and charge), the cart totals and what the
+    lines would have cost to deliver one by one.
+    """
+    if not lines:
+        raise ValueError("Cart is empty")
+    product_ids = [product_id for product_id, _ in lines]
+    quantities = [quantity for _, quantity in lines]
+    rows = _quote_rows(products, product_ids, quantities, [delivery_location], engine)
+    catalog = rows['catalog']
+
+    pickups = np.array([catalog[product_id]['location'] for product_id in product_ids], dtype=object).astype(str)
+    names, first, shipment = np.unique(pickups, return_index=True, return_inverse=True)
+    by_appearance = np.argsort(first)
+    rank = np.empty_like(by_appearance)
+    rank[by_appearance] = np.arange(len(by_appearance))
+    shipment = rank[shipment]
+    names = names[by_appearance]
+
+    load_kg = rows['weight_kg'] * rows['quantities']
+    load_m3 = rows['volume_m3'] * rows['quantities']
+    shipment_kg = np.bincount(shipment, weights=load_kg, minlength=len(names))
+    shipment_m3 = np.bincount(shipment, weights=load_m3, minlength=len(names))
+    shipment_km = np.zeros(len(names))
+    np.maximum.at(shipment_km, shipment, rows['distance'])
+    shipment_lines = np.bincount(shipment, minlength=len(names))
+    surcharge = rows['surcharge'][0]
+
+    shipment_charge = calculate_delivery_prices(shipment_kg, shipment_m3, 1, shipment_km, surcharge, rows['tariff'])
+    separate_charge = calculate_delivery_prices(rows['weight_kg'], rows['volume_m3'], rows['quantities'], rows['distance'], surcharge, rows['tariff'])
+
+    # Split by weight, or evenly for weightless loads; the shipment's first
+    # line takes the rounding remainder so the shares add up exactly.
+    share = np.where(shipment_kg[shipment] > 0, load_kg / np.where(shipment_kg > 0, shipment_kg, 1)[shipment], 1 / shipment_lines[shipment])
+    line_charge = _round2(shipment_charge[shipment] * share)
+    leads = first[by_appearance]
+    line_charge[leads] += _round2(shipment_charge - np.bincount(shipment, weights=line_charge, minlength=len(names)))
+
+    line_quotes = [
+        {
+            'product_id': product_id,
+            'quantity': quantity,
+            'pickup_location': pickup,
+            'product_total': catalog[product_id]['price'] * quantity,
+            'delivery_charge': charge,
+            'distance_km': distance,
+            'grand_total': catalog[product_id]['price'] * quantity + charge,
+            'shipment': group
+        }
+        for product_id, quantity, pickup, charge, distance, group in zip(
+            product_ids, quantities, pickups.tolist(), _round2(line_charge).tolist(), _round2(rows['distance']).tolist(), shipment.tolist()
+        )
+    ]
+    shipments = [
+        {
+            'pickup_location': name,
+            'lines': np.flatnonzero(shipment == i).tolist(),
+            'weight_kg': weight,
+            'volume_m3': volume,
+            'distance_km': distance,
+            'delivery_charge': charge
+        }
+        for i, (name, weight, volume, distance, charge) in enumerate(zip(
+            names.tolist(), shipment_kg.tolist(), shipment_m3.tolist(), _round2(shipment_km).tolist(), shipment_charge.tolist()
+        ))
+    ]
+    product_total = sum(line['product_total'] for line in line_quotes)
+    delivery_charge = round(sum(shipment['delivery_charge'] for shipment in shipments), 2)
+    return {
+        'lines': line_quotes,
+        'shipments': shipments,
+        'product_total': product_total,
+        'delivery_charge': delivery_charge,
+        'grand_total': product_total + delivery_charge,
+        'separate_delivery_charge': round(float(separate_charge.sum()), 2)
+    }
+
+
+@instrumented('pricing.quote_grid')
+def quote_grid(products, product_ids, quantities, delivery_locations, engine=None):
+    """Quote the full cross product of product ids, quantity tiers and destinations."""
+    grid_ids, grid_quantities, grid_locations = np.meshgrid(
+        np.asarray(product_ids),
+        np.asarray(quantities),
+        np.asarray(delivery_locations, dtype=object),
+        indexing='ij'
+    )
+    return batch_quote(products, grid_ids, grid_quantities, grid_locations, engine)
@@ -0,0 +1,215 @@
+import cProfile
+import functools
+import heapq
+import io
+import itertools
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+RING_SIZE = 2048
+RERUN_HISTORY = 200
+SLOWEST_PROFILES = 5
+PROFILE_LINES = 30
+METRICS_INTERVAL_SECONDS = 10
+METRICS_PATH = os.getenv("INDE_METRICS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "inde_metrics.prom"))
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _RerunState(threading.local):
+    sections = None
+
+
+class Section:
+    __slots__ = ('samples', 'calls', 'total_seconds')
+
+    def __init__(self, ring_size):
+        self.samples = deque(maxlen=ring_size)
+        self.calls = 0
+        self.total_seconds = 0.0
+
+
+class PerfRegistry:
+    """Named wall-clock timers with a bounded sample ring per section.
+
+    Sections are timed with `timed` blocks or `instrumented` functions.
+    `rerun` marks one script or fragment run: it times the page section,
+    collects the call counts of everything timed inside it on the same
+    thread, and, when profiling is switched on, keeps cProfile output for
+    the slowest reruns.
+    """
+
+    def __init__(self, ring_size=RING_SIZE, rerun_history=RERUN_HISTORY, metrics_path=METRICS_PATH):
+        self.ring_size = ring_size
+        self.metrics_path = metrics_path
+        self.profiling = os.getenv("INDE_PROFILE", "") == "1"
+        self.reruns = deque(maxlen=rerun_history)
+        self._sections = {}
+        self._profiles = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._local = _RerunState()
+        self._metrics_written_at = 0.0
+
+    def section(self, name):
+        section = self._sections.get(name)
+        if section is None:
+            with self._lock:
+                section = self._sections.setdefault(name, Section(self.ring_size))
+        return section
+
+    def record(self, name, seconds, section=None):
+        section = section or self.section(name)
+        with self._lock:
+            section.samples.append(seconds)
+            section.calls += 1
+            section.total_seconds += seconds
+        current = self._local.sections
+        if current is not None:
+            entry = current.get(name)
+            if entry is None:
+                entry = current[name] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += seconds
+
+    @contextmanager
+    def timed(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def instrumented(self, name):
+        def decorator(fn):
+            section = self.section(name)
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - started, section)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def rerun(self, name):
+        if self._local.sections is not None:
+            # A fragment running inside a full script run is just a section of it;
+            # on its own fragment reruns it is recorded as a rerun.
+            with self.timed(name):
+                yield
+            return
+        self._local.sections = sections = {}
+        profiler = cProfile.Profile() if self.profiling else None
+        started = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            seconds = time.perf_counter() - started
+            self._local.sections = None
+            self.record(name, seconds)
+            self.reruns.append({
+                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+                'page': name,
+                'seconds': seconds,
+                'sections': sections
+            })
+            if profiler is not None:
+                self._keep_profile(name, seconds, profiler)
+            if time.monotonic() - self._metrics_written_at >= METRICS_INTERVAL_SECONDS:
+                self.write_metrics()
+
+    def _keep_profile(self, name, seconds, profiler):
+        with self._lock:
+            if len(self._profiles) >= SLOWEST_PROFILES and seconds <= self._profiles[0][0]:
+                return
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        entry = (seconds, next(self._sequence), {
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'page': name,
+            'seconds': seconds,
+            'stats': out.getvalue()
+        })
+        with self._lock:
+            if len(self._profiles) < SLOWEST_PROFILES:
+                heapq.heappush(self._profiles, entry)
+            else:
+                heapq.heappushpop(self._profiles, entry)
+
+    def slowest_profiles(self):
+        with self._lock:
+            return [entry[2] for entry in sorted(self._profiles, reverse=True)]
+
+    def summary(self):
+        """Per-section call counts and p50/p95/p99 wall time in ms over the sample ring."""
+        with self._lock:
+            sections = {name: (list(s.samples), s.calls, s.total_seconds) for name, s in self._sections.items()}
+        rows = []
+        for name, (samples, calls, total_seconds) in sorted(sections.items()):
+            if not samples:
+                continue
+            p50, p95, p99 = np.percentile(samples, [q * 100 for q in QUANTILES]) * 1000
+            rows.append({
+                'section': name,
+                'calls': calls,
+                'total_s': round(total_seconds, 3),
+                'p50_ms': round(float(p50), 3),
+                'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3),
+                'max_ms': round(max(samples) * 1000, 3)
+            })
+        return rows
+
+    def prometheus_text(self):
+        with self._lock:
+            sections = {name: (list(s.samples), s.calls, s.total_seconds) for name, s in self._sections.items()}
+        lines = [
+            "# HELP inde_section_seconds Wall time of instrumented sections over the recent sample window.",
+            "# TYPE inde_section_seconds summary"
+        ]
+        for name, (samples, calls, total_seconds) in sorted(sections.items()):
+            if not samples:
+                continue
+            values = np.percentile(samples, [q * 100 for q in QUANTILES])
+            for quantile, value in zip(QUANTILES, values):
+                lines.append(f'inde_section_seconds{{section="{name}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'inde_section_seconds_sum{{section="{name}"}} {total_seconds:.6f}')
+            lines.append(f'inde_section_seconds_count{{section="{name}"}} {calls}')
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self, path=None):
+        path = path or self.metrics_path
+        self._metrics_written_at = time.monotonic()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+        return path
+
+    def reset(self):
+        # Sections are cleared in place: instrumented functions hold on to theirs.
+        with self._lock:
+            for section in self._sections.values():
+                section.samples.clear()
+                section.calls = 0
+                section.total_seconds = 0.0
+            self._profiles.clear()
+            self.reruns.clear()
+
+
+PERF = PerfRegistry()
+timed = PERF.timed
+instrumented = PERF.instrumented
@@ -0,0 +1,757 @@
+import itertools
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from analytics import OrderAggregates
+from cache import VERSIONS
+from columnar import CATEGORY, INITIAL_CAPACITY, INT, MISSING, NUMERIC, OPTIONAL_INT, POINT, TEXT, TIMESTAMP, ColumnStore
+from feed import ChangeFeed
+from search import SearchIndex
+from storage import get_storage
+from timeline import Rollups, TimeIndex
+
+
+log = logging.getLogger(__name__)
+
+ORDER_STATUSES = ["Order Placed", "Driver Assigned", "Picked Up", "In Transit", "Delivered"]
+
+LOAD_BATCH_SIZE = 5000
+
+# Order ids reserved from the store at a time.
+ID_BLOCK = 100
+
+# Delivered orders move to the archive this many seconds after delivery,
+# checked every ARCHIVE_INTERVAL seconds (0 turns the archiver off).
+ARCHIVE_AFTER = int(os.getenv("INDE_ARCHIVE_AFTER", "3600"))
+ARCHIVE_INTERVAL = int(os.getenv("INDE_ARCHIVE_INTERVAL", "600"))
+
+PRODUCT_COLUMNS = {
+    'id': INT,
+    'name': TEXT,
+    'category': CATEGORY,
+    'price': NUMERIC,
+    'weight_kg': NUMERIC,
+    'volume_m3': NUMERIC,
+    'min_quantity': INT,
+    'unit': CATEGORY,
+    'supplier': CATEGORY,
+    'location': CATEGORY,
+    'description': TEXT,
+    'stock': INT,
+    'coordinates': POINT
+}
+
+# Buyers reorder, so their names and addresses repeat like the cities do.
+ORDER_COLUMNS = {
+    'id': INT,
+    'product_id': INT,
+    'product_name': CATEGORY,
+    'buyer_name': CATEGORY,
+    'buyer_phone': TEXT,
+    'quantity': INT,
+    'delivery_location': CATEGORY,
+    'delivery_address': CATEGORY,
+    'pickup_location': CATEGORY,
+    'product_total': NUMERIC,
+    'delivery_charge': NUMERIC,
+    'grand_total': NUMERIC,
+    'distance_km': NUMERIC,
+    'status': CATEGORY,
+    'driver_id': OPTIONAL_INT,
+    'timestamp': TIMESTAMP,
+    'weight_kg': NUMERIC,
+    'volume_m3': NUMERIC,
+    'placed_at': INT,
+    'delivered_at': OPTIONAL_INT,
+    'parent_id': OPTIONAL_INT,
+    'shipment_id': OPTIONAL_INT
+}
+
+
+def new_order(product, quantity, delivery_location, pricing, buyer_name, buyer_phone, delivery_address):
+    placed_at = int(time.time())
+    return {
+        'product_id': product['id'],
+        'product_name': product['name'],
+        'buyer_name': buyer_name,
+        'buyer_phone': buyer_phone,
+        'quantity': quantity,
+        'delivery_location': delivery_location,
+        'delivery_address': delivery_address,
+        'pickup_location': product['location'],
+        'product_total': pricing['product_total'],
+        'delivery_charge': pricing['delivery_charge'],
+        'grand_total': pricing['grand_total'],
+        'distance_km': pricing['distance_km'],
+        'status': 'Order Placed',
+        'driver_id': None,
+        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(placed_at)),
+        'weight_kg': product['weight_kg'] * quantity,
+        'volume_m3': product['volume_m3'] * quantity,
+        'placed_at': placed_at,
+        'delivered_at': None,
+        'parent_id': None,
+        'shipment_id': None
+    }
+
+
+def new_parent_order(catalog, quote, delivery_location, buyer_name, buyer_phone, delivery_address):
+    """A parent order and its shipments, each a list of line orders, from a `quote_cart` quote."""
+    lines = [
+        new_order(catalog[line['product_id']], line['quantity'], delivery_location, line, buyer_name, buyer_phone, delivery_address)
+        for line in quote['lines']
+    ]
+    parent = {
+        'buyer_name': buyer_name,
+        'buyer_phone': buyer_phone,
+        'delivery_location': delivery_location,
+        'delivery_address': delivery_address,
+        'product_total': quote['product_total'],
+        'delivery_charge': quote['delivery_charge'],
+        'grand_total': quote['grand_total'],
+        'timestamp': lines[0]['timestamp'],
+        'placed_at': lines[0]['placed_at']
+    }
+    return parent, [[lines[i] for i in shipment['lines']] for shipment in quote['shipments']]
+
+
+class IndexedTable:
+    """Rows keyed by id with secondary indexes on a fixed set of fields.
+
+    Rows are treated as immutable: updates store a new dict, so a row handed
+    out to a reader never changes underneath it.
+    """
+
+    def __init__(self, indexed_fields):
+        self.indexed_fields = tuple(indexed_fields)
+        self._rows = {}
+        self._indexes = {field: {} for field in self.indexed_fields}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, row_id):
+        return row_id in self._rows
+
+    def _index(self, row):
+        for field in self.indexed_fields:
+            self._indexes[field].setdefault(row.get(field), {})[row['id']] = None
+
+    def _unindex(self, row):
+        for field in self.indexed_fields:
+            bucket = self._indexes[field].get(row.get(field))
+            if bucket is not None:
+                bucket.pop(row['id'], None)
+                if not bucket:
+                    del self._indexes[field][row.get(field)]
+
+    def load(self, rows):
+        with self._lock:
+            self._rows.clear()
+            for index in self._indexes.values():
+                index.clear()
+            for row in rows:
+                self._rows[row['id']] = row
+                self._index(row)
+
+    def insert(self, row):
+        with self._lock:
+            if row['id'] in self._rows:
+                raise KeyError(f"Duplicate id: {row['id']}")
+            self._rows[row['id']] = row
+            self._index(row)
+        return row
+
+    def change(self, row_id, **fields):
+        with self._lock:
+            old = self._rows[row_id]
+            new = dict(old, **fields)
+            if any(old.get(field) != new.get(field) for field in self.indexed_fields):
+                self._unindex(old)
+                self._index(new)
+            self._rows[row_id] = new
+        return old, new
+
+    def update(self, row_id, **fields):
+        return self.change(row_id, **fields)[1]
+
+    def increment(self, row_id, field, delta):
+        with self._lock:
+            return self.change(row_id, **{field: self._rows[row_id][field] + delta})
+
+    def delete(self, row_id):
+        with self._lock:
+            row = self._rows.pop(row_id, None)
+            if row is not None:
+                self._unindex(row)
+        return row
+
+    def get(self, row_id):
+        return self._rows.get(row_id)
+
+    def ids(self, **criteria):
+        with self._lock:
+            if not criteria:
+                return list(self._rows)
+            buckets = []
+            for field, value in criteria.items():
+                if field not in self._indexes:
+                    raise KeyError(f"Field is not indexed: {field}")
+                bucket = self._indexes[field].get(value)
+                if not bucket:
+                    return []
+                buckets.append(bucket)
+            buckets.sort(key=len)
+            smallest, rest = buckets[0], buckets[1:]
+            return [row_id for row_id in smallest if all(row_id in bucket for bucket in rest)]
+
+    def find(self, **criteria):
+        with self._lock:
+            return [self._rows[row_id] for row_id in sorted(self.ids(**criteria))]
+
+    def count(self, **criteria):
+        if not criteria:
+            return len(self._rows)
+        if len(criteria) == 1:
+            (field, value), = criteria.items()
+            return len(self._indexes[field].get(value, ()))
+        return len(self.ids(**criteria))
+
+    def counts(self, field):
+        with self._lock:
+            return {value: len(ids) for value, ids in self._indexes[field].items()}
+
+    def values(self):
+        with self._lock:
+            return [self._rows[row_id] for row_id in sorted(self._rows)]
+
+    def distinct(self, field):
+        with self._lock:
+            return sorted(value for value in self._indexes[field] if value is not None)
+
+
+class ColumnTable(IndexedTable):
+    """IndexedTable whose rows live in a ColumnStore rather than in dicts.
+
+    `_rows` maps each id to its slot in the store. Reads materialize a fresh
+    dict, so readers still get rows that never change underneath them;
+    updates patch the column arrays in place. `view` gives the admin tables
+    zero-copy access to whole columns.
+
+    With `cache_rows` the materialized dicts are kept until the row changes,
+    for small tables that are read far more often than they are written.
+    """
+
+    def __init__(self, schema, indexed_fields, cache_rows=False):
+        super().__init__(indexed_fields)
+        self.store = ColumnStore(schema)
+        self._cache = {} if cache_rows else None
+
+    def _row(self, row_id):
+        if self._cache is None:
+            return self.store.row(self._rows[row_id])
+        row = self._cache.get(row_id)
+        if row is None:
+            row = self._cache[row_id] = self.store.row(self._rows[row_id])
+        return row
+
+    def _many(self, row_ids):
+        if self._cache is None:
+            return self.store.rows([self._rows[row_id] for row_id in row_ids])
+        return [self._row(row_id) for row_id in row_ids]
+
+    def load(self, rows):
+        with self._lock:
+            self._rows.clear()
+            for index in self._indexes.values():
+                index.clear()
+            if self._cache is not None:
+                self._cache.clear()
+            self.store = ColumnStore(self.store.schema)
+            rows = iter(rows)
+            while True:
+                batch = list(itertools.islice(rows, LOAD_BATCH_SIZE))
+                if not batch:
+                    break
+                for row, slot in zip(batch, self.store.extend(batch)):
+                    self._rows[row['id']] = slot
+                    self._index(row)
+
+    def insert(self, row):
+        with self._lock:
+            if row['id'] in self._rows:
+                raise KeyError(f"Duplicate id: {row['id']}")
+            self._rows[row['id']] = self.store.append(row)
+            self._index(row)
+            return self._row(row['id'])
+
+    def change(self, row_id, **fields):
+        with self._lock:
+            old = self._row(row_id)
+            self.store.patch(self._rows[row_id], **fields)
+            if self._cache is not None:
+                del self._cache[row_id]
+            new = self._row(row_id)
+            if any(old.get(field) != new.get(field) for field in self.indexed_fields):
+                self._unindex(old)
+                self._index(new)
+        return old, new
+
+    def increment(self, row_id, field, delta):
+        with self._lock:
+            return self.change(row_id, **{field: self.store.value(self._rows[row_id], field) + delta})
+
+    def delete(self, row_id):
+        with self._lock:
+            if row_id not in self._rows:
+                return None
+            row = self._row(row_id)
+            self.store.remove(self._rows.pop(row_id))
+            if self._cache is not None:
+                del self._cache[row_id]
+            self._unindex(row)
+        return row
+
+    def get(self, row_id):
+        with self._lock:
+            return self._row(row_id) if row_id in self._rows else None
+
+    def find(self, **criteria):
+        with self._lock:
+            return self._many(sorted(self.ids(**criteria)))
+
+    def values(self):
+        with self._lock:
+            return self._many(sorted(self._rows))
+
+    def view(self, *fields):
+        with self._lock:
+            return self.store.view(fields or None)
+
+    def slots(self, row_ids):
+        """The store and the slots in it of the rows still present among `row_ids`, in the same order."""
+        with self._lock:
+            return self.store, np.array([self._rows[row_id] for row_id in np.asarray(row_ids).tolist() if row_id in self._rows], dtype=np.intp)
+
+    def compact(self):
+        """Copy the present rows into a fresh store, dropping removed rows and unused categories.
+
+        The old store is left as it was, so a reader still holding it (or a
+        view of it) keeps a consistent snapshot.
+        """
+        with self._lock:
+            old = self.store
+            slots = np.flatnonzero(old.live[:old.size])
+            self.store = ColumnStore(old.schema, max(INITIAL_CAPACITY, 2 * len(slots)))
+            self.store.extend_columns(old.export(slots))
+            self._rows = dict(zip(old.columns['id'][slots].tolist(), range(len(slots))))
+
+
+class IdAllocator:
+    """Hands out order ids from blocks reserved in the store.
+
+    Each block of ID_BLOCK ids is reserved once under the database's writer
+    lock, so several processes on one database never hand out the same id.
+    Within a process ids increase.
+    """
+
+    def __init__(self, storage, block=ID_BLOCK):
+        self.storage = storage
+        self.block = block
+        self._next = self._end = 0
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        with self._lock:
+            if self._next == self._end:
+                self._next = self.storage.reserve_order_ids(self.block)
+                self._end = self._next + self.block
+            self._next += 1
+            return self._next - 1
+
+
+class ProductRepository:
+    def __init__(self, storage):
+        self.storage = storage
+        self.table = ColumnTable(PRODUCT_COLUMNS, ['category', 'location'], cache_rows=True)
+        self.table.load(itertools.chain.from_iterable(storage.iter_products()))
+        self.search_index = SearchIndex()
+        self.search_index.add_many(self.table.values())
+        self.listeners = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, event, old, new):
+        for listener in self.listeners:
+            listener(event, old, new)
+
+    def __len__(self):
+        return len(self.table)
+
+    def get(self, product_id):
+        return self.table.get(product_id)
+
+    def list(self, category=None, location=None, search=None):
+        criteria = {}
+        if category is not None:
+            criteria['category'] = category
+        if location is not None:
+            criteria['location'] = location
+        if not search:
+            return self.table.find(**criteria)
+        candidates = self.table.ids(**criteria) if criteria else None
+        ranked = (self.table.get(product_id) for product_id in self.search_index.search(search, candidates))
+        return [product for product in ranked if product is not None]
+
+    def suggest(self, prefix, limit=5):
+        return self.search_index.complete(prefix, limit)
+
+    def distinct(self, field):
+        return self.table.distinct(field)
+
+    def add(self, product):
+        product = self.storage.add_product(product)
+        self.table.insert(product)
+        self.search_index.add(product)
+        self._notify('created', None, product)
+        return product
+
+    def update(self, product_id, **fields):
+        self.storage.update_product(product_id, **dict(fields))
+        old, new = self.table.change(product_id, **fields)
+        if any(field in self.search_index.fields for field in fields):
+            self.search_index.update(new)
+        self._notify('updated', old, new)
+        return new
+
+    def upsert_many(self, products):
+        """Insert or update products keyed by (supplier, name); returns (product, created) pairs."""
+        results = self.storage.upsert_products(products)
+        for product, created in results:
+            if created:
+                self.table.insert(product)
+                self.search_index.add(product)
+                self._notify('created', None, product)
+            else:
+                old, new = self.table.change(product['id'], **product)
+                self.search_index.update(new)
+                self._notify('updated', old, new)
+        return results
+
+    def adjust_stock(self, product_id, delta):
+        """Mirror a stock change already applied in storage."""
+        if product_id not in self.table:
+            return None
+        old, new = self.table.increment(product_id, 'stock', delta)
+        self._notify('updated', old, new)
+        return new
+
+    def delete(self, product_id):
+        self.storage.delete_product(product_id)
+        self.search_index.remove(product_id)
+        product = self.table.delete(product_id)
+        if product is not None:
+            self._notify('deleted', product, None)
+        return product
+
+
+class OrderRepository:
+    def __init__(self, storage, products):
+        self.storage = storage
+        self.products = products
+        self.table = ColumnTable(ORDER_COLUMNS, ['status', 'driver_id'])
+        self.table.load(itertools.chain.from_iterable(storage.iter_orders()))
+        self.ids = IdAllocator(storage)
+        self.listeners = []
+        self._archive_lock = threading.Lock()
+        # Line orders of live cart shipments, by shipment id (the id of the
+        # shipment's first line); changed only under the table's lock, together with the table.
+        self._shipments = {}
+        columns, live = self.table.view('id', 'shipment_id')
+        grouped = live & (columns['shipment_id'] != MISSING)
+        for order_id, shipment_id in zip(columns['id'][grouped].tolist(), columns['shipment_id'][grouped].tolist()):
+            self._shipments.setdefault(shipment_id, {})[order_id] = None
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, event, old, new):
+        for listener in self.listeners:
+            listener(event, old, new)
+
+    def __len__(self):
+        return len(self.table)
+
+    def get(self, order_id):
+        order = self.table.get(order_id)
+        return order if order is not None else self.storage.archive.get(order_id)
+
+    def list(self, status=None, driver_id=None):
+        criteria = {}
+        if status is not None:
+            criteria['status'] = status
+        if driver_id is not None:
+            criteria['driver_id'] = driver_id
+        return self.table.find(**criteria)
+
+    def active_for_driver(self, driver_id):
+        return [o for o in self.table.find(driver_id=driver_id) if o['status'] != 'Delivered']
+
+    def count_by_status(self):
+        return self.table.counts('status')
+
+    def open_job_count(self):
+        """How many jobs are open, counting a cart shipment once, as as_job does."""
+        return sum(1 for order in self.table.find(status='Order Placed') if order['shipment_id'] in (None, order['id']))
+
+    def shipment(self, order_id):
+        """The live line orders travelling together with `order_id`, first line first."""
+        order = self.table.get(order_id)
+        if order is None:
+            return []
+        if order['shipment_id'] is None:
+            return [order]
+        with self.table._lock:
+            line_ids = sorted(self._shipments.get(order['shipment_id'], ()))
+            lines = [self.table.get(line_id) for line_id in line_ids]
+        return [line for line in lines if line is not None]
+
+    def as_job(self, order):
+        """The job a driver is offered for `order`.
+
+        A cart shipment is one job: its first line, carrying the load and fee
+        of the whole shipment. Its other lines give None.
+        """
+        if order['shipment_id'] is None:
+            return order
+        if order['shipment_id'] != order['id']:
+            return None
+        lines = self.shipment(order['id'])
+        if len(lines) < 2:
+            return order
+        return dict(
+            order,
+            product_name=f"{order['product_name']} + {len(lines) - 1} more",
+            quantity=sum(line['quantity'] for line in lines),
+            weight_kg=sum(line['weight_kg'] for line in lines),
+            volume_m3=sum(line['volume_m3'] for line in lines),
+            delivery_charge=round(sum(line['delivery_charge'] for line in lines), 2),
+            distance_km=max(line['distance_km'] for line in lines)
+        )
+
+    def _shipment_ids(self, order_id):
+        return [order['id'] for order in self.shipment(order_id)] or [order_id]
+
+    def _remove(self, order_id):
+        with self.table._lock:
+            order = self.table.delete(order_id)
+            lines = self._shipments.get(order['shipment_id']) if order is not None else None
+            if lines is not None:
+                lines.pop(order_id, None)
+                if not lines:
+                    del self._shipments[order['shipment_id']]
+        return order
+
+    def place(self, order):
+        if order.get('id') is None:
+            order = dict(order, id=self.ids.next_id())
+        order = self.storage.place_order(order)
+        self.products.adjust_stock(order['product_id'], -order['quantity'])
+        self.table.insert(order)
+        self._notify('created', None, order)
+        return order
+
+    def place_parent(self, parent, shipments):
+        """Place a cart: one parent order and the line orders of each of its shipments.
+
+        All lines are stored, and their stock taken, in one transaction, so
+        either the whole cart is placed or InsufficientStockError is raised
+        and nothing is. Returns the parent and the placed lines.
+        """
+        lines = []
+        for shipment in shipments:
+            ids = [self.ids.next_id() for _ in shipment]
+            lines.extend(dict(order, id=order_id, shipment_id=ids[0]) for order, order_id in zip(shipment, ids))
+        parent, lines = self.storage.place_parent_order(parent, lines)
+        for order in lines:
+            self.products.adjust_stock(order['product_id'], -order['quantity'])
+        with self.table._lock:
+            for order in lines:
+                self._shipments.setdefault(order['shipment_id'], {})[order['id']] = None
+                self.table.insert(order)
+        for order in lines:
+            self._notify('created', None, order)
+        return parent, lines
+
+    def get_parent(self, parent_id):
+        """A parent order with its line orders under 'orders', or None."""
+        parent = self.storage.get_parent_order(parent_id)
+        if parent is None:
+            return None
+        return dict(parent, orders=[self.get(order_id) for order_id in parent['order_ids']])
+
+    def claim(self, order_id, driver_id):
+        # A driver takes a whole shipment or none of it.
+        order_ids = self._shipment_ids(order_id)
+        if not self.storage.claim_orders(order_ids, driver_id):
+            return False
+        for line_id in order_ids:
+            old, new = self.table.change(line_id, status='Driver Assigned', driver_id=driver_id)
+            self._notify('updated', old, new)
+        return True
+
+    def update_status(self, order_id, status):
+        delivered_at = int(time.time()) if status == 'Delivered' else None
+        order_ids = self._shipment_ids(order_id)
+        self.storage.update_orders_status(order_ids, status, delivered_at)
+        for line_id in order_ids:
+            old, new = self.table.change(line_id, status=status, delivered_at=delivered_at)
+            self._notify('updated', old, new)
+        return self.table.get(order_id)
+
+    def delete(self, order_id):
+        self.storage.delete_order(order_id)
+        order = self._remove(order_id)
+        if order is not None:
+            self._notify('deleted', order, None)
+        return order
+
+    def archive_delivered(self, delivered_before):
+        """Move orders delivered before `delivered_before` out of the live set; returns how many moved.
+
+        Listeners get an 'archived' event: the order is gone from the live
+        set but still part of the order history.
+        """
+        with self._archive_lock:
+            orders = [o for o in self.table.find(status='Delivered') if o['delivered_at'] is not None and o['delivered_at'] < delivered_before]
+            if not orders:
+                return 0
+            self.storage.archive_orders(orders)
+            for order in orders:
+                if self._remove(order['id']) is not None:
+                    self._notify('archived', order, None)
+            if self.table.store.removed > len(self.table):
+                self.table.compact()
+        return len(orders)
+
+    def history(self):
+        """Every order, archived ones first, one row at a time."""
+        for batch in self.storage.iter_order_history():
+            yield from batch
+
+    def history_store(self):
+        """A ColumnStore of every order, archived and live, for rebuilding aggregates."""
+        archive, live = self.storage.archive, self.table.store
+        if len(archive) == 0:
+            return live
+        slots = np.flatnonzero(live.view(())[1])
+        store = ColumnStore(live.schema, len(archive) + len(slots))
+        for columns in archive.iter_columns():
+            store.extend_columns(columns)
+        store.extend_columns(live.export(slots))
+        return store
+
+
+class DriverRepository:
+    def __init__(self, storage):
+        self.storage = storage
+        self.table = IndexedTable(['location', 'available'])
+        self.table.load(storage.list_drivers())
+        self.listeners = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, event, old, new):
+        for listener in self.listeners:
+            listener(event, old, new)
+
+    def __len__(self):
+        return len(self.table)
+
+    def get(self, driver_id):
+        return self.table.get(driver_id)
+
+    def list(self, location=None, available=None):
+        criteria = {}
+        if location is not None:
+            criteria['location'] = location
+        if available is not None:
+            criteria['available'] = available
+        return self.table.find(**criteria)
+
+    def add(self, driver):
+        driver = self.storage.add_driver(driver)
+        self.table.insert(driver)
+        self._notify('created', None, driver)
+        return driver
+
+    def update(self, driver_id, **fields):
+        self.storage.update_driver(driver_id, **dict(fields))
+        old, new = self.table.change(driver_id, **fields)
+        self._notify('updated', old, new)
+        return new
+
+
+class Repositories:
+    def __init__(self, storage):
+        self.storage = storage
+        self.products = ProductRepository(storage)
+        self.orders = OrderRepository(storage, self.products)
+        self.drivers = DriverRepository(storage)
+        # Aggregates cover the whole history; the time index only live orders.
+        history = self.orders.history_store()
+        self.analytics = OrderAggregates()
+        self.analytics.rebuild_from_columns(history)
+        self.order_times = TimeIndex()
+        self.order_times.rebuild_from_columns(self.orders.table.store)
+        self.rollups = Rollups(self.products)
+        self.rollups.rebuild_from_columns(history)
+        self.feed = ChangeFeed()
+        self.orders.subscribe(self.analytics.on_order_event)
+        self.orders.subscribe(self.feed.on_order_event)
+        self.orders.subscribe(self.order_times.on_order_event)
+        self.orders.subscribe(self.rollups.on_order_event)
+        self.products.subscribe(self.feed.on_product_event)
+        self.products.subscribe(lambda event, old, new: VERSIONS.bump('catalog'))
+        self.drivers.subscribe(lambda event, old, new: VERSIONS.bump('drivers'))
+        self._archiver = None
+        self._archiver_lock = threading.Lock()
+
+    def start_archiver(self, interval=ARCHIVE_INTERVAL, after=ARCHIVE_AFTER):
+        """Archive orders delivered more than `after` seconds ago every `interval` seconds, from a daemon thread.
+
+        A failed pass is logged and retried on the next interval.
+        """
+        def run():
+            while True:
+                try:
+                    self.orders.archive_delivered(int(time.time()) - after)
+                except Exception:
+                    log.exception("Archiving delivered orders failed; retrying in %ss", interval)
+                time.sleep(interval)
+
+        with self._archiver_lock:
+            if self._archiver is None:
+                self._archiver = threading.Thread(target=run, name="inde-archiver", daemon=True)
+                self._archiver.start()
+        return self._archiver
+
+
+_repositories = None
+_repositories_lock = threading.Lock()
+
+
+def get_repositories():
+    global _repositories
+    if _repositories is None:
+        with _repositories_lock:
+            if _repositories is None:
+                _repositories = Repositories(get_storage())
+    return _repositories
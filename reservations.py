@@ -0,0 +1,220 @@
+import itertools
+import threading
+import time
+from contextlib import ExitStack
+
+from repository import get_repositories
+from storage import InsufficientStockError
+
+HOLD_SECONDS = 600
+LOCK_STRIPES = 64
+
+
+class ReservationError(Exception):
+    pass
+
+
+class Reservation:
+    __slots__ = ('id', 'product_id', 'quantity', 'holder', 'expires_at')
+
+    def __init__(self, reservation_id, product_id, quantity, holder, expires_at):
+        self.id = reservation_id
+        self.product_id = product_id
+        self.quantity = quantity
+        self.holder = holder
+        self.expires_at = expires_at
+
+    def expired(self, now=None):
+        return (time.monotonic() if now is None else now) >= self.expires_at
+
+
+class ReservationService:
+    """Stock holds with expiry, guarded by per-product lock stripes.
+
+    A hold reserves `quantity` units of a product for a holder (a buyer
+    session) until it expires or is confirmed into an order. Products hash to
+    one of `lock_stripes` locks, so reservations on different SKUs never wait
+    on each other and there is no global lock. The conditional stock UPDATE in
+    the store stays the final guard against overselling.
+    """
+
+    def __init__(self, repos, hold_seconds=HOLD_SECONDS, lock_stripes=LOCK_STRIPES, clock=time.monotonic):
+        self.repos = repos
+        self.hold_seconds = hold_seconds
+        self.clock = clock
+        self._locks = [threading.Lock() for _ in range(lock_stripes)]
+        self._ids = itertools.count(1)
+        self._holds = {}
+        self._held = {}
+        self._by_id = {}
+
+    def _lock(self, product_id):
+        return self._locks[hash(product_id) % len(self._locks)]
+
+    def _locked(self, product_ids):
+        # Several stripes are always taken in index order, so two carts can never deadlock.
+        stack = ExitStack()
+        for i in sorted({hash(product_id) % len(self._locks) for product_id in product_ids}):
+            stack.enter_context(self._locks[i])
+        return stack
+
+    def _purge_expired(self, product_id, now):
+        holds = self._holds.get(product_id)
+        if not holds:
+            return
+        for reservation in [r for r in holds.values() if r.expired(now)]:
+            self._drop(reservation)
+
+    def _drop(self, reservation):
+        holds = self._holds.get(reservation.product_id, {})
+        if holds.pop(reservation.holder, None) is reservation:
+            self._held[reservation.product_id] -= reservation.quantity
+        self._by_id.pop(reservation.id, None)
+
+    def _stock(self, product_id):
+        product = self.repos.products.get(product_id)
+        if product is None:
+            raise ReservationError(f"Unknown product #{product_id}")
+        return product['stock']
+
+    def held(self, product_id):
+        return self._held.get(product_id, 0)
+
+    def available(self, product_id, holder=None):
+        with self._lock(product_id):
+            self._purge_expired(product_id, self.clock())
+            own = self._holds.get(product_id, {}).get(holder)
+            return self._stock(product_id) - self.held(product_id) + (own.quantity if own else 0)
+
+    def reserve(self, product_id, quantity, holder=None, hold_seconds=None):
+        """Hold `quantity` units for `holder`, replacing that holder's previous hold on the product."""
+        if quantity <= 0:
+            raise ReservationError("Quantity must be positive")
+        holder = holder if holder is not None else object()
+        now = self.clock()
+        with self._lock(product_id):
+            self._check_free(product_id, quantity, holder, now)
+            return self._hold(product_id, quantity, holder, now, hold_seconds)
+
+    def _check_free(self, product_id, quantity, holder, now):
+        self._purge_expired(product_id, now)
+        previous = self._holds.get(product_id, {}).get(holder)
+        free = self._stock(product_id) - self.held(product_id) + (previous.quantity if previous else 0)
+        if quantity > free:
+            raise InsufficientStockError(f"Only {max(free, 0)} units of product #{product_id} are available")
+
+    def _hold(self, product_id, quantity, holder, now, hold_seconds):
+        holds = self._holds.setdefault(product_id, {})
+        previous = holds.get(holder)
+        if previous is not None:
+            self._drop(previous)
+        reservation = Reservation(
+            next(self._ids),
+            product_id,
+            quantity,
+            holder,
+            now + (self.hold_seconds if hold_seconds is None else hold_seconds)
+        )
+        holds[holder] = reservation
+        self._held[product_id] = self.held(product_id) + quantity
+        self._by_id[reservation.id] = reservation
+        return reservation
+
+    def reserve_many(self, lines, holder=None, hold_seconds=None):
+        """Hold stock for every (product_id, quantity) line of a cart, or for none of them.
+
+        Lines for the same product are held together. The holder's previous
+        holds on these products are replaced. Returns one reservation per
+        product, in the order the products first appear.
+        """
+        wanted = {}
+        for product_id, quantity in lines:
+            if quantity <= 0:
+                raise ReservationError("Quantity must be positive")
+            wanted[product_id] = wanted.get(product_id, 0) + quantity
+        holder = holder if holder is not None else object()
+        now = self.clock()
+        with self._locked(wanted):
+            for product_id, quantity in wanted.items():
+                self._check_free(product_id, quantity, holder, now)
+            return [self._hold(product_id, quantity, holder, now, hold_seconds) for product_id, quantity in wanted.items()]
+
+    def get(self, reservation_id):
+        reservation = self._by_id.get(reservation_id)
+        if reservation is None or reservation.expired(self.clock()):
+            return None
+        return reservation
+
+    def release(self, reservation_id):
+        reservation = self._by_id.get(reservation_id)
+        if reservation is None:
+            return False
+        with self._lock(reservation.product_id):
+            if self._by_id.get(reservation_id) is not reservation:
+                return False
+            self._drop(reservation)
+            return True
+
+    def confirm(self, reservation_id, order):
+        """Turn a live hold into a placed order; the hold is consumed either way."""
+        reservation = self._by_id.get(reservation_id)
+        if reservation is None:
+            raise ReservationError("Reservation has expired or was already used")
+        with self._lock(reservation.product_id):
+            if self._by_id.get(reservation_id) is not reservation or reservation.expired(self.clock()):
+                self._drop(reservation)
+                raise ReservationError("Reservation has expired or was already used")
+            if order['product_id'] != reservation.product_id or order['quantity'] != reservation.quantity:
+                raise ReservationError("Order does not match the reservation")
+            self._drop(reservation)
+            return self.repos.orders.place(order)
+
+    def place(self, order, holder=None):
+        reservation = self.reserve(order['product_id'], order['quantity'], holder)
+        return self.confirm(reservation.id, order)
+
+    def confirm_many(self, reservation_ids, parent, shipments):
+        """Turn a cart's holds into a parent order and its shipments; the holds are consumed either way."""
+        reservations = [self._by_id.get(reservation_id) for reservation_id in reservation_ids]
+        if not reservations or None in reservations:
+            raise ReservationError("Reservation has expired or was already used")
+        wanted = {}
+        for order in itertools.chain.from_iterable(shipments):
+            wanted[order['product_id']] = wanted.get(order['product_id'], 0) + order['quantity']
+        with self._locked(wanted.keys() | {reservation.product_id for reservation in reservations}):
+            now = self.clock()
+            live = all(self._by_id.get(r.id) is r and not r.expired(now) for r in reservations)
+            if not live:
+                for reservation in reservations:
+                    if self._by_id.get(reservation.id) is reservation:
+                        self._drop(reservation)
+                raise ReservationError("Reservation has expired or was already used")
+            if wanted != {reservation.product_id: reservation.quantity for reservation in reservations}:
+                raise ReservationError("Order does not match the reservation")
+            for reservation in reservations:
+                self._drop(reservation)
+            return self.repos.orders.place_parent(parent, shipments)
+
+    def place_parent(self, parent, shipments, holder=None):
+        lines = [(order['product_id'], order['quantity']) for order in itertools.chain.from_iterable(shipments)]
+        reservations = self.reserve_many(lines, holder)
+        return self.confirm_many([reservation.id for reservation in reservations], parent, shipments)
+
+    def sweep(self):
+        now = self.clock()
+        for product_id in list(self._holds):
+            with self._lock(product_id):
+                self._purge_expired(product_id, now)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_reservations():
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ReservationService(get_repositories())
+    return _service
@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from distances import ASSAM_CITIES, DistanceMatrix, haversine_km
+
+ROAD_GRAPH_PATH = os.getenv("INDE_ROAD_GRAPH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "assam_roads.json"))
+
+# Points further than this from every graph node are treated as off-network
+# and priced on geodesic distance instead.
+MAX_SNAP_KM = 40
+# Straight-line access legs are stretched by this much to approximate the
+# local roads between a point and the node it snaps to.
+ACCESS_CIRCUITY = 1.3
+
+
+class RoadGraph:
+    """Undirected road graph with all-pairs shortest path distances in km.
+
+    Shortest paths are precomputed once with a vectorised Floyd-Warshall, so
+    a node-to-node query is a single array read. Unreachable pairs are inf.
+    """
+
+    def __init__(self, nodes, edges):
+        self.names = [node['name'] for node in nodes]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        if len(self.index) != len(self.names):
+            raise ValueError("road graph has duplicate node names")
+        self.coordinates = np.array([(node['lat'], node['lon']) for node in nodes], dtype=float).reshape(-1, 2)
+
+        n = len(self.names)
+        dist = np.full((n, n), np.inf)
+        np.fill_diagonal(dist, 0.0)
+        for a, b, km in edges:
+            if a not in self.index or b not in self.index:
+                raise ValueError(f"road graph edge {a} - {b} references an unknown node")
+            if km < 0:
+                raise ValueError(f"road graph edge {a} - {b} has negative length")
+            i, j = self.index[a], self.index[b]
+            dist[i, j] = dist[j, i] = min(dist[i, j], float(km))
+        for k in range(n):
+            np.minimum(dist, dist[:, k, None] + dist[None, k, :], out=dist)
+        self.distances = dist
+        self.edge_count = len(edges)
+
+    @classmethod
+    def load(cls, path=ROAD_GRAPH_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['nodes'], data['edges'])
+
+    def __len__(self):
+        return len(self.names)
+
+    def route_km(self, a, b):
+        return float(self.distances[self.index[a], self.index[b]])
+
+    def snap(self, coords):
+        """Nearest node to `coords` and the road length of the access leg to it."""
+        straight = haversine_km(self.coordinates, coords)
+        node = int(np.argmin(straight))
+        return node, float(straight[node]) * ACCESS_CIRCUITY
+
+
+class RoadDistanceMatrix(DistanceMatrix):
+    """DistanceMatrix whose entries are road distances over a RoadGraph.
+
+    Each point is snapped to its nearest graph node once, when it is added;
+    the pair distance is access leg + shortest path + access leg. Pairs where
+    either point is off-network, or the nodes are not connected, keep the
+    geodesic distance. A road distance is never shorter than the geodesic one.
+    """
+
+    def __init__(self, graph, points=()):
+        self.graph = graph
+        self._nodes = []
+        self._access = []
+        super().__init__(points)
+
+    def _row(self, key):
+        geodesic_row = super()._row(key)
+        node, access = self.graph.snap(key)
+        on_network = access <= MAX_SNAP_KM * ACCESS_CIRCUITY
+        nodes = np.array(self._nodes, dtype=np.intp)
+        others = np.array(self._access, dtype=float)
+        self._nodes.append(node)
+        self._access.append(access if on_network else np.inf)
+        if not on_network or not len(nodes):
+            return geodesic_row
+        road = access + self.graph.distances[node, nodes] + others
+        return np.where(np.isfinite(road), np.maximum(road, geodesic_row), geodesic_row)
+
+    def copy(self):
+        other = super().copy()
+        # A concurrent add may have snapped a point that had not been indexed yet.
+        other._nodes = self._nodes[:len(other._coords)]
+        other._access = self._access[:len(other._coords)]
+        return other
+
+    def off_network(self):
+        return [coords for coords, access in zip(self._coords, self._access) if not np.isfinite(access)]
+
+
+_road_distances = None
+_road_distances_lock = threading.Lock()
+
+
+def get_road_distances():
+    global _road_distances
+    if _road_distances is None:
+        with _road_distances_lock:
+            if _road_distances is None:
+                _road_distances = RoadDistanceMatrix(RoadGraph.load(), ASSAM_CITIES.values())
+    return _road_distances
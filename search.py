@@ -0,0 +1,126 @@
+import bisect
+import math
+import re
+import threading
+
+TOKEN_RE = re.compile(r"\w+")
+
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'category': 2.0,
+    'supplier': 1.5,
+    'description': 1.0
+}
+
+PREFIX_MATCH_FACTOR = 0.6
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.casefold())
+
+
+class SearchIndex:
+    """Inverted index over product text with prefix (typeahead) matching.
+
+    Every query term is matched as a prefix of the indexed terms and all
+    terms must match (AND). Results are ranked by field-weighted tf-idf,
+    with exact term matches scoring above prefix matches.
+    """
+
+    def __init__(self, fields=FIELD_WEIGHTS):
+        self.fields = dict(fields)
+        self._postings = {}
+        self._doc_terms = {}
+        self._terms = []
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def _weights(self, doc):
+        weights = {}
+        for field, field_weight in self.fields.items():
+            for term in tokenize(str(doc.get(field) or '')):
+                weights[term] = weights.get(term, 0.0) + field_weight
+        return weights
+
+    def add(self, doc):
+        with self._lock:
+            if doc['id'] in self._doc_terms:
+                self.remove(doc['id'])
+            weights = self._weights(doc)
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    bisect.insort(self._terms, term)
+                postings[doc['id']] = weight
+            self._doc_terms[doc['id']] = tuple(weights)
+
+    def add_many(self, docs):
+        for doc in docs:
+            self.add(doc)
+
+    def remove(self, doc_id):
+        with self._lock:
+            for term in self._doc_terms.pop(doc_id, ()):
+                postings = self._postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+                    del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def update(self, doc):
+        self.add(doc)
+
+    def prefix_terms(self, prefix):
+        with self._lock:
+            start = bisect.bisect_left(self._terms, prefix)
+            end = bisect.bisect_left(self._terms, prefix + '\U0010ffff')
+            return self._terms[start:end]
+
+    def complete(self, prefix, limit=10):
+        terms = tokenize(prefix)
+        if not terms:
+            return []
+        candidates = self.prefix_terms(terms[-1])
+        candidates.sort(key=lambda term: -len(self._postings.get(term, ())))
+        return candidates[:limit]
+
+    def search(self, query, candidates=None, limit=None):
+        """Return ids of documents matching every term of `query`, best first.
+
+        `candidates` restricts the result to a given set of ids, which is how
+        category/location filters are combined with text search.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            total_docs = len(self._doc_terms) or 1
+            term_scores = []
+            for term in dict.fromkeys(terms):
+                scores = {}
+                for match in self.prefix_terms(term):
+                    postings = self._postings[match]
+                    factor = 1.0 if match == term else PREFIX_MATCH_FACTOR
+                    idf = math.log(1 + total_docs / len(postings))
+                    for doc_id, weight in postings.items():
+                        score = weight * idf * factor
+                        if score > scores.get(doc_id, 0.0):
+                            scores[doc_id] = score
+                if not scores:
+                    return []
+                term_scores.append(scores)
+
+        term_scores.sort(key=len)
+        matched = set(term_scores[0])
+        if candidates is not None:
+            matched.intersection_update(candidates)
+        for scores in term_scores[1:]:
+            matched.intersection_update(scores)
+            if not matched:
+                return []
+
+        ranked = sorted(matched, key=lambda doc_id: (-sum(scores[doc_id] for scores in term_scores), doc_id))
+        return ranked if limit is None else ranked[:limit]
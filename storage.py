@@ -0,0 +1,694 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from archive import OrderArchive
+
+DB_PATH = os.getenv("INDE_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "inde.db"))
+POOL_SIZE = int(os.getenv("INDE_DB_POOL_SIZE", "8"))
+# Defaults to a directory named after the database file.
+ARCHIVE_DIR = os.getenv("INDE_ARCHIVE_DIR")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    price NUMERIC NOT NULL,
+    weight_kg NUMERIC NOT NULL,
+    volume_m3 NUMERIC NOT NULL,
+    min_quantity INTEGER NOT NULL,
+    unit TEXT NOT NULL,
+    supplier TEXT NOT NULL,
+    location TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    description TEXT NOT NULL,
+    stock INTEGER NOT NULL CHECK (stock >= 0)
+);
+CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
+CREATE INDEX IF NOT EXISTS idx_products_location ON products(location);
+CREATE INDEX IF NOT EXISTS idx_products_supplier_name ON products(supplier, name);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL,
+    product_name TEXT NOT NULL,
+    buyer_name TEXT NOT NULL,
+    buyer_phone TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    delivery_location TEXT NOT NULL,
+    delivery_address TEXT NOT NULL,
+    pickup_location TEXT NOT NULL,
+    product_total NUMERIC NOT NULL,
+    delivery_charge NUMERIC NOT NULL,
+    grand_total NUMERIC NOT NULL,
+    distance_km NUMERIC NOT NULL,
+    status TEXT NOT NULL,
+    driver_id INTEGER,
+    timestamp TEXT NOT NULL,
+    weight_kg NUMERIC NOT NULL,
+    volume_m3 NUMERIC NOT NULL,
+    placed_at INTEGER NOT NULL,
+    delivered_at INTEGER,
+    parent_id INTEGER,
+    shipment_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
+CREATE INDEX IF NOT EXISTS idx_orders_driver_id ON orders(driver_id);
+
+CREATE TABLE IF NOT EXISTS parent_orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    buyer_name TEXT NOT NULL,
+    buyer_phone TEXT NOT NULL,
+    delivery_location TEXT NOT NULL,
+    delivery_address TEXT NOT NULL,
+    product_total NUMERIC NOT NULL,
+    delivery_charge NUMERIC NOT NULL,
+    grand_total NUMERIC NOT NULL,
+    timestamp TEXT NOT NULL,
+    placed_at INTEGER NOT NULL,
+    order_ids TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS drivers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    vehicle_type TEXT NOT NULL,
+    capacity_kg NUMERIC NOT NULL,
+    capacity_m3 NUMERIC NOT NULL,
+    location TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    available INTEGER NOT NULL DEFAULT 1
+);
+"""
+
+PRODUCT_CATEGORIES = ["Plants", "Furniture", "Fertilizers", "Building Materials", "Agricultural Supplies", "Hardware"]
+
+PRODUCT_FIELDS = ['name', 'category', 'price', 'weight_kg', 'volume_m3', 'min_quantity', 'unit', 'supplier', 'location', 'description', 'stock']
+ORDER_FIELDS = ['product_id', 'product_name', 'buyer_name', 'buyer_phone', 'quantity', 'delivery_location', 'delivery_address', 'pickup_location', 'product_total', 'delivery_charge', 'grand_total', 'distance_km', 'status', 'driver_id', 'timestamp', 'weight_kg', 'volume_m3', 'placed_at', 'delivered_at', 'parent_id', 'shipment_id']
+PARENT_ORDER_FIELDS = ['buyer_name', 'buyer_phone', 'delivery_location', 'delivery_address', 'product_total', 'delivery_charge', 'grand_total', 'timestamp', 'placed_at']
+DRIVER_FIELDS = ['name', 'phone', 'vehicle_type', 'capacity_kg', 'capacity_m3', 'location']
+
+DEMO_PRODUCTS = [
+    {
+        'name': 'Organic Tea Plants (50 saplings)',
+        'category': 'Plants',
+        'price': 5000,
+        'weight_kg': 25,
+        'volume_m3': 2.0,
+        'min_quantity': 50,
+        'unit': 'saplings',
+        'supplier': 'Assam Tea Nursery',
+        'location': 'Guwahati',
+        'coordinates': (26.1445, 91.7362),
+        'description': 'Premium Assam tea saplings, ready for plantation',
+        'stock': 500
+    },
+    {
+        'name': 'Teak Wood Furniture Set',
+        'category': 'Furniture',
+        'price': 45000,
+        'weight_kg': 150,
+        'volume_m3': 8.0,
+        'min_quantity': 1,
+        'unit': 'set',
+        'supplier': 'Jorhat Woodworks',
+        'location': 'Jorhat',
+        'coordinates': (26.7509, 94.2037),
+        'description': 'Complete office furniture set - 4 tables, 8 chairs',
+        'stock': 20
+    },
+    {
+        'name': 'Organic Fertilizer (50kg bags)',
+        'category': 'Fertilizers',
+        'price': 800,
+        'weight_kg': 50,
+        'volume_m3': 0.5,
+        'min_quantity': 10,
+        'unit': 'bags',
+        'supplier': 'Green Farm Supplies',
+        'location': 'Dibrugarh',
+        'coordinates': (27.4728, 94.9120),
+        'description': 'Premium organic compost for all crops',
+        'stock': 1000
+    },
+    {
+        'name': 'Cement (50kg bags)',
+        'category': 'Building Materials',
+        'price': 350,
+        'weight_kg': 50,
+        'volume_m3': 0.4,
+        'min_quantity': 50,
+        'unit': 'bags',
+        'supplier': 'Assam Cement Co.',
+        'location': 'Silchar',
+        'coordinates': (24.8333, 92.7789),
+        'description': 'High-grade cement for construction projects',
+        'stock': 5000
+    },
+    {
+        'name': 'Steel Rods (12mm x 12m)',
+        'category': 'Building Materials',
+        'price': 550,
+        'weight_kg': 10.6,
+        'volume_m3': 0.1,
+        'min_quantity': 100,
+        'unit': 'rods',
+        'supplier': 'Tezpur Steel',
+        'location': 'Tezpur',
+        'coordinates': (26.6338, 92.8000),
+        'description': 'TMT steel rods for construction',
+        'stock': 2000
+    },
+    {
+        'name': 'Bamboo Plants (10ft height)',
+        'category': 'Plants',
+        'price': 200,
+        'weight_kg': 15,
+        'volume_m3': 1.5,
+        'min_quantity': 20,
+        'unit': 'plants',
+        'supplier': 'Bamboo Growers Assam',
+        'location': 'Nagaon',
+        'coordinates': (26.3467, 92.6833),
+        'description': 'Mature bamboo plants for landscaping and construction',
+        'stock': 300
+    },
+    {
+        'name': 'Thermocol Carton Boxes',
+        'category': 'Building Materials',
+        'price': 50,
+        'weight_kg': 0.5,
+        'volume_m3': 0.15,
+        'min_quantity': 20,
+        'unit': 'boxes',
+        'supplier': 'Packaging Solutions',
+        'location': 'Barpeta Road',
+        'coordinates': (26.5005, 90.9664),
+        'description': 'Lightweight thermocol boxes for packaging and insulation',
+        'stock': 500
+    }
+]
+
+DEMO_DRIVERS = [
+    {
+        'name': 'Raju Kumar',
+        'phone': '9876543210',
+        'vehicle_type': 'Mini Truck (1 Ton)',
+        'capacity_kg': 1000,
+        'capacity_m3': 10,
+        'location': 'Guwahati',
+        'coordinates': (26.1445, 91.7362),
+        'available': True
+    },
+    {
+        'name': 'Sanjay Sharma',
+        'phone': '9876543211',
+        'vehicle_type': 'Large Truck (5 Ton)',
+        'capacity_kg': 5000,
+        'capacity_m3': 30,
+        'location': 'Jorhat',
+        'coordinates': (26.7509, 94.2037),
+        'available': True
+    }
+]
+
+
+class InsufficientStockError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared by every session and thread."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self._connections = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(None)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get()
+        try:
+            if conn is None:
+                conn = self._connect()
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        while not self._connections.empty():
+            conn = self._connections.get_nowait()
+            if conn is not None:
+                conn.close()
+
+
+def _product_from_row(row):
+    product = {key: row[key] for key in row.keys() if key not in ('lat', 'lon')}
+    product['coordinates'] = (row['lat'], row['lon'])
+    return product
+
+
+def _order_from_row(row):
+    return dict(row)
+
+
+def _parent_order_from_row(row):
+    parent = dict(row)
+    parent['order_ids'] = json.loads(row['order_ids'])
+    return parent
+
+
+def _driver_from_row(row):
+    driver = {key: row[key] for key in row.keys() if key not in ('lat', 'lon')}
+    driver['coordinates'] = (row['lat'], row['lon'])
+    driver['available'] = bool(row['available'])
+    return driver
+
+
+class Storage:
+    def __init__(self, path=DB_PATH, pool_size=POOL_SIZE, seed=True, archive_dir=ARCHIVE_DIR):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+        self.migrate()
+        self.archive = OrderArchive(archive_dir or f"{os.path.splitext(path)[0]}_archive", ['id'] + ORDER_FIELDS)
+        # Held while orders move to the archive, so a reader sees each order in exactly one tier.
+        self._archive_lock = threading.Lock()
+        self.drop_archived_orders()
+        if seed:
+            self.seed_demo_data()
+
+    @contextmanager
+    def read(self):
+        with self.pool.connection() as conn:
+            yield conn
+
+    @contextmanager
+    def write(self):
+        # BEGIN IMMEDIATE takes the single WAL writer lock up front so two
+        # writers never deadlock upgrading from a shared lock.
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def migrate(self):
+        with self.write() as conn:
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(orders)")}
+            if 'placed_at' not in columns:
+                # Order times used to be kept only as local-time text.
+                conn.execute("ALTER TABLE orders ADD COLUMN placed_at INTEGER NOT NULL DEFAULT 0")
+                conn.execute("UPDATE orders SET placed_at = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)")
+            if 'delivered_at' not in columns:
+                # Delivery times were never recorded; count past deliveries at their order time.
+                conn.execute("ALTER TABLE orders ADD COLUMN delivered_at INTEGER")
+                conn.execute("UPDATE orders SET delivered_at = placed_at WHERE status = 'Delivered'")
+            for column in ('parent_id', 'shipment_id'):
+                # Orders placed before carts existed have neither.
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE orders ADD COLUMN {column} INTEGER")
+
+    def seed_demo_data(self):
+        with self.write() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'seeded'").fetchone():
+                return
+            for product in DEMO_PRODUCTS:
+                self._insert_product(conn, product)
+            for driver in DEMO_DRIVERS:
+                self._insert_driver(conn, driver)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('seeded', '1')")
+
+    # Settings
+
+    def get_meta(self, key, default=None):
+        with self.read() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.write() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # Products
+
+    def _insert_product(self, conn, product):
+        lat, lon = product['coordinates']
+        cursor = conn.execute(
+            f"INSERT INTO products ({', '.join(PRODUCT_FIELDS)}, lat, lon) VALUES ({', '.join('?' * (len(PRODUCT_FIELDS) + 2))})",
+            [product[field] for field in PRODUCT_FIELDS] + [lat, lon]
+        )
+        return cursor.lastrowid
+
+    def add_product(self, product):
+        with self.write() as conn:
+            product_id = self._insert_product(conn, product)
+        return dict(product, id=product_id)
+
+    def update_product(self, product_id, **fields):
+        if 'coordinates' in fields:
+            fields['lat'], fields['lon'] = fields.pop('coordinates')
+        if not fields:
+            return
+        assignments = ', '.join(f"{field} = ?" for field in fields)
+        with self.write() as conn:
+            conn.execute(f"UPDATE products SET {assignments} WHERE id = ?", [*fields.values(), product_id])
+
+    def upsert_products(self, products):
+        """Insert or update products keyed by (supplier, name) in one transaction.
+
+        Returns (product, created) pairs in input order.
+        """
+        assignments = ', '.join(f"{field} = ?" for field in PRODUCT_FIELDS)
+        results = []
+        with self.write() as conn:
+            for product in products:
+                row = conn.execute(
+                    "SELECT id FROM products WHERE supplier = ? AND name = ? ORDER BY id LIMIT 1",
+                    (product['supplier'], product['name'])
+                ).fetchone()
+                if row is None:
+                    results.append((dict(product, id=self._insert_product(conn, product)), True))
+                    continue
+                lat, lon = product['coordinates']
+                conn.execute(
+                    f"UPDATE products SET {assignments}, lat = ?, lon = ? WHERE id = ?",
+                    [product[field] for field in PRODUCT_FIELDS] + [lat, lon, row['id']]
+                )
+                results.append((dict(product, id=row['id']), False))
+        return results
+
+    def iter_products(self, batch_size=5000):
+        yield from self._iter_rows('products', _product_from_row, batch_size)
+
+    def delete_product(self, product_id):
+        with self.write() as conn:
+            conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
+
+    def get_product(self, product_id):
+        with self.read() as conn:
+            row = conn.execute("SELECT * FROM products WHERE id = ?", (product_id,)).fetchone()
+        return _product_from_row(row) if row else None
+
+    def list_products(self, category=None, location=None, search=None):
+        clauses, params = [], []
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        if location is not None:
+            clauses.append("location = ?")
+            params.append(location)
+        if search:
+            clauses.append("(instr(lower(name), ?) > 0 OR instr(lower(description), ?) > 0)")
+            params.extend([search.lower(), search.lower()])
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.read() as conn:
+            rows = conn.execute(f"SELECT * FROM products{where} ORDER BY id", params).fetchall()
+        return [_product_from_row(row) for row in rows]
+
+    def distinct_product_values(self, field):
+        if field not in ('category', 'location'):
+            raise ValueError(f"Unsupported product field: {field}")
+        with self.read() as conn:
+            rows = conn.execute(f"SELECT DISTINCT {field} FROM products ORDER BY {field}").fetchall()
+        return [row[0] for row in rows]
+
+    def count_products(self):
+        with self.read() as conn:
+            return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    # Orders
+
+    def _take_stock(self, conn, order):
+        cursor = conn.execute(
+            "UPDATE products SET stock = stock - ? WHERE id = ? AND stock >= ?",
+            (order['quantity'], order['product_id'], order['quantity'])
+        )
+        if cursor.rowcount == 0:
+            raise InsufficientStockError(f"Not enough stock for product #{order['product_id']}")
+
+    def _insert_order(self, conn, order):
+        fields = ORDER_FIELDS + ['id'] if order.get('id') is not None else ORDER_FIELDS
+        cursor = conn.execute(
+            f"INSERT INTO orders ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))})",
+            [order[field] for field in fields]
+        )
+        return cursor.lastrowid
+
+    def place_order(self, order):
+        with self.write() as conn:
+            self._take_stock(conn, order)
+            order_id = self._insert_order(conn, order)
+        return dict(order, id=order_id)
+
+    def place_parent_order(self, parent, orders):
+        """Insert a parent order and all of its line orders in one transaction.
+
+        Stock is taken for every line or, if any line is short, for none.
+        Returns the parent and the lines with their ids filled in.
+        """
+        with self.write() as conn:
+            for order in orders:
+                self._take_stock(conn, order)
+            cursor = conn.execute(
+                f"INSERT INTO parent_orders ({', '.join(PARENT_ORDER_FIELDS)}, order_ids) VALUES ({', '.join('?' * (len(PARENT_ORDER_FIELDS) + 1))})",
+                [parent[field] for field in PARENT_ORDER_FIELDS] + ["[]"]
+            )
+            parent_id = cursor.lastrowid
+            orders = [dict(order, parent_id=parent_id) for order in orders]
+            orders = [dict(order, id=self._insert_order(conn, order)) for order in orders]
+            order_ids = [order['id'] for order in orders]
+            conn.execute("UPDATE parent_orders SET order_ids = ? WHERE id = ?", (json.dumps(order_ids), parent_id))
+        return dict(parent, id=parent_id, order_ids=order_ids), orders
+
+    def get_parent_order(self, parent_id):
+        with self.read() as conn:
+            row = conn.execute("SELECT * FROM parent_orders WHERE id = ?", (parent_id,)).fetchone()
+        return _parent_order_from_row(row) if row else None
+
+    def reserve_order_ids(self, count):
+        """Reserve `count` consecutive order ids for this process; returns the first.
+
+        The high-water mark lives in the meta table and moves under the
+        writer lock, so processes sharing the database never get the same
+        ids. Ids reserved by a process that exits unused are skipped.
+        """
+        with self.write() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'next_order_id'").fetchone()
+            sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'orders'").fetchone()
+            first = max(int(row[0]) if row else 1, (sequence[0] if sequence else 0) + 1)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_order_id', ?)", (str(first + count),))
+        return first
+
+    def max_order_id(self):
+        with self.read() as conn:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'orders'").fetchone()
+        return row[0] if row else 0
+
+    def get_order(self, order_id):
+        with self.read() as conn:
+            row = conn.execute("SELECT * FROM orders WHERE id = ?", (order_id,)).fetchone()
+        return _order_from_row(row) if row else self.archive.get(order_id)
+
+    def list_orders(self, status=None, driver_id=None, exclude_status=None):
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if driver_id is not None:
+            clauses.append("driver_id = ?")
+            params.append(driver_id)
+        if exclude_status is not None:
+            clauses.append("status != ?")
+            params.append(exclude_status)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.read() as conn:
+            rows = conn.execute(f"SELECT * FROM orders{where} ORDER BY id", params).fetchall()
+        return [_order_from_row(row) for row in rows]
+
+    def iter_orders(self, batch_size=5000):
+        yield from self._iter_rows('orders', _order_from_row, batch_size)
+
+    def iter_order_history(self, batch_size=5000):
+        """Every order placed so far exactly once, archived ones first, in batches.
+
+        Nothing is locked while the caller works through a batch. Orders
+        the archiver moves out of the database in the meantime are taken
+        from the segments it wrote, if they were not read here already.
+        """
+        with self._archive_lock:
+            segments = self.archive.segments
+            until_id = self.max_order_id()
+        yield from self.archive.iter_batches(segments)
+        last_id = 0
+        while True:
+            with self._archive_lock:
+                moved = self.archive.segments[len(segments):]
+                segments = self.archive.segments
+                rows = [row for row in self._rows_after('orders', last_id, batch_size) if row['id'] <= until_id]
+            for batch in self.archive.iter_batches(moved):
+                batch = [order for order in batch if last_id < order['id'] <= until_id]
+                if batch:
+                    yield batch
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            yield [_order_from_row(row) for row in rows]
+
+    def archive_orders(self, orders):
+        """Move delivered orders to the archive tier.
+
+        The segment is on disk before the rows are deleted, so a crash in
+        between leaves them in both tiers; `drop_archived_orders` then
+        deletes them here on the next start.
+        """
+        with self._archive_lock:
+            self.archive.append(orders)
+            with self.write() as conn:
+                conn.executemany("DELETE FROM orders WHERE id = ?", [(order['id'],) for order in orders])
+
+    def drop_archived_orders(self):
+        if len(self.archive) == 0:
+            return
+        with self.read() as conn:
+            delivered = [row[0] for row in conn.execute("SELECT id FROM orders WHERE status = 'Delivered'")]
+        archived = [(order_id,) for order_id in delivered if order_id in self.archive]
+        if archived:
+            with self.write() as conn:
+                conn.executemany("DELETE FROM orders WHERE id = ?", archived)
+
+    def _rows_after(self, table, after_id, limit):
+        with self.read() as conn:
+            return conn.execute(f"SELECT * FROM {table} WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)).fetchall()
+
+    def _iter_rows(self, table, convert, batch_size):
+        """Yield lists of at most `batch_size` rows of `table` in id order.
+
+        Each batch is its own short read, paged by id, so no connection or
+        transaction stays open while the caller works through a batch and an
+        abandoned iterator holds nothing. Rows that change between batches
+        are seen as they are when their batch is read.
+        """
+        last_id = 0
+        while True:
+            rows = self._rows_after(table, last_id, batch_size)
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            yield [convert(row) for row in rows]
+
+    def delete_order(self, order_id):
+        with self.write() as conn:
+            conn.execute("DELETE FROM orders WHERE id = ?", (order_id,))
+
+    def claim_order(self, order_id, driver_id):
+        return self.claim_orders([order_id], driver_id)
+
+    def claim_orders(self, order_ids, driver_id):
+        """Assign every order to the driver if all are still open; otherwise change nothing."""
+        placeholders = ', '.join('?' * len(order_ids))
+        with self.write() as conn:
+            open_count = conn.execute(
+                f"SELECT COUNT(*) FROM orders WHERE id IN ({placeholders}) AND status = 'Order Placed'",
+                list(order_ids)
+            ).fetchone()[0]
+            if open_count != len(order_ids):
+                return False
+            conn.execute(
+                f"UPDATE orders SET status = 'Driver Assigned', driver_id = ? WHERE id IN ({placeholders})",
+                [driver_id, *order_ids]
+            )
+        return True
+
+    def update_order_status(self, order_id, status, delivered_at=None):
+        self.update_orders_status([order_id], status, delivered_at)
+
+    def update_orders_status(self, order_ids, status, delivered_at=None):
+        with self.write() as conn:
+            conn.executemany(
+                "UPDATE orders SET status = ?, delivered_at = ? WHERE id = ?",
+                [(status, delivered_at, order_id) for order_id in order_ids]
+            )
+
+    def count_orders(self):
+        with self.read() as conn:
+            return conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] + len(self.archive)
+
+    # Drivers
+
+    def _insert_driver(self, conn, driver):
+        lat, lon = driver['coordinates']
+        cursor = conn.execute(
+            f"INSERT INTO drivers ({', '.join(DRIVER_FIELDS)}, lat, lon, available) VALUES ({', '.join('?' * (len(DRIVER_FIELDS) + 3))})",
+            [driver[field] for field in DRIVER_FIELDS] + [lat, lon, int(driver.get('available', True))]
+        )
+        return cursor.lastrowid
+
+    def add_driver(self, driver):
+        with self.write() as conn:
+            driver_id = self._insert_driver(conn, driver)
+        return dict(driver, id=driver_id)
+
+    def update_driver(self, driver_id, **fields):
+        if 'coordinates' in fields:
+            fields['lat'], fields['lon'] = fields.pop('coordinates')
+        if 'available' in fields:
+            fields['available'] = int(fields['available'])
+        if not fields:
+            return
+        assignments = ', '.join(f"{field} = ?" for field in fields)
+        with self.write() as conn:
+            conn.execute(f"UPDATE drivers SET {assignments} WHERE id = ?", [*fields.values(), driver_id])
+
+    def get_driver(self, driver_id):
+        with self.read() as conn:
+            row = conn.execute("SELECT * FROM drivers WHERE id = ?", (driver_id,)).fetchone()
+        return _driver_from_row(row) if row else None
+
+    def list_drivers(self):
+        with self.read() as conn:
+            rows = conn.execute("SELECT * FROM drivers ORDER BY id").fetchall()
+        return [_driver_from_row(row) for row in rows]
+
+    def count_drivers(self):
+        with self.read() as conn:
+            return conn.execute("SELECT COUNT(*) FROM drivers").fetchone()[0]
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = Storage()
+    return _storage
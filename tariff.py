@@ -0,0 +1,181 @@
+"""Delivery tariffs: admin-defined rate tables compiled into NumPy lookups.
+
+A tariff is a plain JSON-able dict. Compiling it turns the distance slabs
+into sorted boundary arrays (slab = searchsorted over the boundaries) and
+the vehicle and regional tables into arrays and dicts, so one quote is a
+handful of array reads whatever the tariff looks like.
+
+The default tariff reproduces the original flat formula exactly.
+"""
+import bisect
+import copy
+import json
+import threading
+
+import numpy as np
+
+from cache import VERSIONS
+from matching import VEHICLE_CAPACITIES, load_class
+from storage import get_storage
+
+TARIFF_META_KEY = 'tariff'
+
+DEFAULT_TARIFF = {
+    'name': "Standard",
+    'distance_slabs': [
+        {'up_to_km': 100, 'rate_per_km': 15, 'multiplier': 1.0},
+        {'up_to_km': None, 'rate_per_km': 15, 'multiplier': 1.2}
+    ],
+    'weight_rate_per_kg': 0.5,
+    'volume_rate_per_m3': 100,
+    'vehicle_rate_factors': {vehicle_type: 1.0 for vehicle_type in VEHICLE_CAPACITIES},
+    'region_surcharges': {},
+    'minimum_charge': 0
+}
+
+# Vehicle classes ordered by capacity, as matching.load_class numbers them.
+VEHICLE_CLASSES = sorted(VEHICLE_CAPACITIES, key=lambda vehicle_type: VEHICLE_CAPACITIES[vehicle_type])
+
+
+def validate_tariff(tariff):
+    """Raise ValueError describing the first problem in `tariff`."""
+    slabs = tariff.get('distance_slabs') or []
+    if not slabs:
+        raise ValueError("A tariff needs at least one distance slab")
+    if slabs[-1].get('up_to_km') is not None:
+        raise ValueError("The last distance slab must be open-ended")
+    bounds = [slab.get('up_to_km') for slab in slabs[:-1]]
+    if any(bound is None or bound <= 0 for bound in bounds):
+        raise ValueError("Every slab but the last needs a positive upper bound in km")
+    if any(b <= a for a, b in zip(bounds, bounds[1:])):
+        raise ValueError("Slab bounds must increase")
+    if any(slab.get('rate_per_km', 0) < 0 or slab.get('multiplier', 1) <= 0 for slab in slabs):
+        raise ValueError("Slab rates must be non-negative and multipliers positive")
+    for field in ('weight_rate_per_kg', 'volume_rate_per_m3', 'minimum_charge'):
+        if tariff.get(field, 0) < 0:
+            raise ValueError(f"'{field}' must be non-negative")
+    unknown = set(tariff.get('vehicle_rate_factors', {})) - set(VEHICLE_CAPACITIES)
+    if unknown:
+        raise ValueError(f"Unknown vehicle type(s): {', '.join(sorted(unknown))}")
+    if any(factor <= 0 for factor in tariff.get('vehicle_rate_factors', {}).values()):
+        raise ValueError("Vehicle rate factors must be positive")
+    if any(surcharge <= -1 for surcharge in tariff.get('region_surcharges', {}).values()):
+        raise ValueError("Regional surcharges must be above -100%")
+
+
+class CompiledTariff:
+    """A validated tariff as lookup arrays, evaluated in scalar or batch form.
+
+    The charge for one load is
+
+        (km * slab rate * vehicle factor + kg * weight rate + m3 * volume rate)
+        * slab multiplier * (1 + regional surcharge), at least the minimum.
+
+    The vehicle is the smallest class that carries the load, or the largest
+    class when none does. Results are unrounded; pricing rounds them.
+    """
+
+    def __init__(self, tariff, version=0):
+        validate_tariff(tariff)
+        self.tariff = copy.deepcopy(tariff)
+        self.version = version
+        slabs = tariff['distance_slabs']
+        self.bounds = np.array([slab['up_to_km'] for slab in slabs[:-1]], dtype=float)
+        self.rates = np.array([slab['rate_per_km'] for slab in slabs], dtype=float)
+        self.multipliers = np.array([slab.get('multiplier', 1.0) for slab in slabs], dtype=float)
+        factors = tariff.get('vehicle_rate_factors', {})
+        # One extra entry for loads no single vehicle carries.
+        self.vehicle_factors = np.array([factors.get(v, 1.0) for v in VEHICLE_CLASSES + VEHICLE_CLASSES[-1:]], dtype=float)
+        self.capacity_kg = np.array([VEHICLE_CAPACITIES[v][0] for v in VEHICLE_CLASSES], dtype=float)
+        self.capacity_m3 = np.array([VEHICLE_CAPACITIES[v][1] for v in VEHICLE_CLASSES], dtype=float)
+        self.weight_rate = tariff['weight_rate_per_kg']
+        self.volume_rate = tariff['volume_rate_per_m3']
+        self.minimum = tariff.get('minimum_charge', 0)
+        self.surcharges = dict(tariff.get('region_surcharges', {}))
+
+        # Plain-list mirrors keep the scalar path free of NumPy call overhead.
+        self._bounds = self.bounds.tolist()
+        self._rates = self.rates.tolist()
+        self._multipliers = self.multipliers.tolist()
+        self._vehicle_factors = self.vehicle_factors.tolist()
+
+    def surcharge(self, region):
+        return self.surcharges.get(region, 0.0)
+
+    def charge(self, weight_kg, volume_m3, quantity, distance_km, surcharge=0.0):
+        slab = bisect.bisect_left(self._bounds, distance_km)
+        vehicle = load_class(weight_kg * quantity, volume_m3 * quantity)
+        distance_charge = distance_km * self._rates[slab] * self._vehicle_factors[vehicle]
+        weight_factor = weight_kg * quantity * self.weight_rate
+        volume_factor = volume_m3 * quantity * self.volume_rate
+
+        total = (distance_charge + weight_factor + volume_factor) * self._multipliers[slab]
+        total *= 1 + surcharge
+        return max(total, self.minimum)
+
+    def charges(self, weight_kg, volume_m3, quantity, distance_km, surcharge=0.0):
+        weight_kg, volume_m3, quantity, distance_km, surcharge = np.broadcast_arrays(
+            np.asarray(weight_kg, dtype=float),
+            np.asarray(volume_m3, dtype=float),
+            np.asarray(quantity),
+            np.asarray(distance_km, dtype=float),
+            np.asarray(surcharge, dtype=float)
+        )
+        slab = np.searchsorted(self.bounds, distance_km, side='left')
+        fits = ((weight_kg * quantity)[..., None] <= self.capacity_kg) & ((volume_m3 * quantity)[..., None] <= self.capacity_m3)
+        vehicle = np.where(fits.any(axis=-1), fits.argmax(axis=-1), len(self.capacity_kg))
+        distance_charge = distance_km * self.rates[slab] * self.vehicle_factors[vehicle]
+        weight_factor = weight_kg * quantity * self.weight_rate
+        volume_factor = volume_m3 * quantity * self.volume_rate
+
+        total = (distance_charge + weight_factor + volume_factor) * self.multipliers[slab]
+        total = total * (1 + surcharge)
+        return np.maximum(total, self.minimum)
+
+
+class TariffBook:
+    """The active tariff, persisted in the meta table and compiled on change.
+
+    Saving bumps the 'tariff' version, which retires every memoized quote.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        stored = storage.get_meta(TARIFF_META_KEY)
+        if stored:
+            data = json.loads(stored)
+            self._active = CompiledTariff(data['tariff'], data['version'])
+        else:
+            self._active = CompiledTariff(DEFAULT_TARIFF)
+
+    @property
+    def version(self):
+        return self._active.version
+
+    def active(self):
+        return self._active
+
+    def save(self, tariff):
+        with self._lock:
+            compiled = CompiledTariff(tariff, self._active.version + 1)
+            self.storage.set_meta(TARIFF_META_KEY, json.dumps({'version': compiled.version, 'tariff': compiled.tariff}))
+            self._active = compiled
+        VERSIONS.bump('tariff')
+        return compiled
+
+    def reset(self):
+        return self.save(DEFAULT_TARIFF)
+
+
+_tariffs = None
+_tariffs_lock = threading.Lock()
+
+
+def get_tariffs():
+    global _tariffs
+    if _tariffs is None:
+        with _tariffs_lock:
+            if _tariffs is None:
+                _tariffs = TariffBook(get_storage())
+    return _tariffs
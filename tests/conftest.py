@@ -0,0 +1,57 @@
+"""Shared fixtures: each test gets its own database, archive and repositories.
+
+    python -m pytest -q
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Module-level singletons (the tariff book, metrics) open whatever INDE_DB_PATH
+# and INDE_METRICS_PATH name, so point them at scratch files before anything
+# imports storage.
+SCRATCH = tempfile.mkdtemp(prefix="inde-tests-")
+os.environ['INDE_DB_PATH'] = os.path.join(SCRATCH, "inde.db")
+os.environ['INDE_METRICS_PATH'] = os.path.join(SCRATCH, "inde_metrics.prom")
+os.environ.pop('INDE_ARCHIVE_DIR', None)
+os.environ.pop('INDE_API_PORT', None)
+
+import pytest
+
+from repository import Repositories, new_order
+from reservations import ReservationService
+from storage import Storage
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(SCRATCH, ignore_errors=True)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = Storage(str(tmp_path / "inde.db"))
+    yield storage
+    storage.pool.close()
+
+
+@pytest.fixture
+def repos(storage):
+    return Repositories(storage)
+
+
+@pytest.fixture
+def reservations(repos):
+    return ReservationService(repos)
+
+
+@pytest.fixture
+def make_order():
+    """Build an unplaced order for `quantity` units of `product`, priced without delivery."""
+    def make(product, quantity, delivery_location='Guwahati'):
+        total = product['price'] * quantity
+        pricing = {'product_total': total, 'delivery_charge': 0, 'grand_total': total, 'distance_km': 0}
+        return new_order(product, quantity, delivery_location, pricing, 'Test Buyer', '9000000000', 'Test Address')
+    return make
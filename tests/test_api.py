@@ -0,0 +1,122 @@
+import pytest
+
+from api import create_app
+from feed import ORDER_CREATED
+from matching import MatchingEngine
+from pricing import calculate_total_price
+
+BUYER = {'buyer_name': 'Test Buyer', 'buyer_phone': '9000000000', 'delivery_address': 'Test Address'}
+
+
+@pytest.fixture
+def client(reservations):
+    repos = reservations.repos
+    return create_app(repos, reservations, MatchingEngine(repos)).test_client()
+
+
+def place(client, product_id=4, quantity=50, **fields):
+    body = dict(BUYER, product_id=product_id, quantity=quantity, delivery_location='Guwahati', **fields)
+    return client.post("/api/orders", json=body)
+
+
+def test_products_list_and_lookup(client, repos):
+    listed = client.get("/api/products?location=Guwahati")
+    assert [p['id'] for p in listed.get_json()['items']] == [p['id'] for p in repos.products.list(location='Guwahati')]
+    assert client.get("/api/products?location=Guwahati", headers={'If-None-Match': listed.headers['ETag']}).status_code == 304
+    assert client.get("/api/products/1").get_json()['name'] == repos.products.get(1)['name']
+    response = client.get("/api/products/999")
+    assert response.status_code == 404 and 'error' in response.get_json()
+
+
+def test_quote_matches_the_pricing_code(client, repos):
+    quote = client.post("/api/quote", json={'product_id': 3, 'quantity': 20, 'delivery_location': 'Silchar'}).get_json()
+    expected = calculate_total_price(repos.products.get(3), 20, 'Silchar')
+    assert {field: quote[field] for field in expected} == expected
+
+
+def test_bulk_quotes_match_single_quotes(client):
+    items = [{'product_id': p, 'quantity': q, 'delivery_location': city} for p, q in [(1, 50), (4, 100), (6, 20)] for city in ('Tezpur', 'Jorhat')]
+    quotes = client.post("/api/quotes", json={'items': items}).get_json()['quotes']
+    for item, quote in zip(items, quotes):
+        single = client.post("/api/quote", json=item).get_json()
+        assert (quote['delivery_charge'], quote['grand_total']) == (single['delivery_charge'], single['grand_total'])
+
+
+@pytest.mark.parametrize("delivery_location", [None, 42, ['Guwahati'], {'city': 'Guwahati'}, "Atlantis"])
+def test_bad_delivery_locations_are_client_errors(client, delivery_location):
+    response = client.post("/api/quote", json={'product_id': 1, 'quantity': 50, 'delivery_location': delivery_location})
+    assert response.status_code == 400
+
+
+def test_orders_take_stock_and_never_oversell(client, repos):
+    stock = repos.products.get(2)['stock']
+    response = place(client, product_id=2, quantity=stock)
+    assert response.status_code == 201
+    assert repos.products.get(2)['stock'] == 0
+    assert place(client, product_id=2, quantity=1).status_code == 409
+    assert client.get(f"/api/orders/{response.get_json()['id']}").get_json()['quantity'] == stock
+
+
+def test_reservation_is_confirmed_into_an_order(client, repos):
+    held = client.post("/api/reservations", json={'product_id': 4, 'quantity': 100, 'holder': 'h'}).get_json()
+    assert place(client, quantity=100, reservation_id=held['reservation_id']).status_code == 201
+    assert place(client, quantity=100, reservation_id=held['reservation_id']).status_code == 409
+
+
+def test_status_moves_forward_for_the_assigned_driver_only(client):
+    order_id = place(client).get_json()['id']
+    status = lambda **body: client.post(f"/api/orders/{order_id}/status", json=body)
+
+    assert status(status='Picked Up', driver_id=1).status_code == 409
+    assert client.post(f"/api/jobs/{order_id}/claim", json={'driver_id': 1}).status_code == 200
+    assert client.post(f"/api/jobs/{order_id}/claim", json={'driver_id': 2}).status_code == 409
+
+    assert status(status='Picked Up').status_code == 400
+    assert status(status='Picked Up', driver_id=2).status_code == 403
+    assert status(status='Teleported', driver_id=1).status_code == 400
+    assert status(status='Picked Up', driver_id=1).get_json()['status'] == 'Picked Up'
+    assert status(status='Driver Assigned', driver_id=1).status_code == 409
+    assert status(status='Order Placed', driver_id=1).status_code == 409
+    assert status(status='Picked Up', driver_id=1).status_code == 409
+    assert status(status='Delivered', driver_id=1).get_json()['status'] == 'Delivered'
+
+
+def test_cart_checkout_lists_one_job_per_shipment(client, repos):
+    lines = [{'product_id': 1, 'quantity': 50}, {'product_id': 3, 'quantity': 10}, {'product_id': 1, 'quantity': 50}]
+    quote = client.post("/api/carts/quote", json={'lines': lines, 'delivery_location': 'Tezpur'}).get_json()
+    assert len(quote['shipments']) == 2
+
+    response = client.post("/api/carts/checkout", json=dict(BUYER, lines=lines, delivery_location='Tezpur'))
+    assert response.status_code == 201
+    parent = response.get_json()
+    assert len(parent['orders']) == 3
+    assert client.get(f"/api/parent-orders/{parent['id']}").get_json()['order_ids'] == parent['order_ids']
+
+    jobs = client.get("/api/jobs").get_json()['jobs']
+    assert len(jobs) == repos.orders.open_job_count() == 2
+    assert sum(job['order']['delivery_charge'] for job in jobs) == pytest.approx(parent['delivery_charge'])
+
+
+def test_short_cart_is_rejected_whole(client, repos):
+    stock = repos.products.get(2)['stock']
+    lines = [{'product_id': 1, 'quantity': 50}, {'product_id': 2, 'quantity': stock + 1}]
+    response = client.post("/api/carts/checkout", json=dict(BUYER, lines=lines, delivery_location='Tezpur'))
+    assert response.status_code == 409
+    assert len(repos.orders) == 0 and repos.products.get(1)['stock'] == repos.storage.get_product(1)['stock']
+
+
+def test_events_report_new_orders(client):
+    since = client.get("/api/events").get_json()['sequence']
+    order_id = place(client).get_json()['id']
+    events = client.get(f"/api/events?since={since}").get_json()
+    assert not events['reset'] and events['sequence'] > since
+    assert [(event['kind'], event['id']) for event in events['events'] if event['kind'] == ORDER_CREATED] == [(ORDER_CREATED, order_id)]
+
+
+def test_batch_runs_each_call_and_rejects_paths_outside_the_api(client):
+    responses = client.post("/api/batch", json={'requests': [
+        {'path': "/api/products/1"},
+        {'path': "/api/products/999"},
+        {'path': "/admin"}
+    ]}).get_json()['responses']
+    assert [response['status'] for response in responses] == [200, 404, 400]
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import archive
+from archive import OrderArchive
+from repository import Repositories
+from storage import Storage
+
+FIELDS = ['id', 'placed_at', 'delivered_at', 'status']
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Small blocks and segments so a few hundred orders span many of each.
+    monkeypatch.setattr(archive, 'BLOCK_ROWS', 16)
+    monkeypatch.setattr(archive, 'SEGMENT_ROWS', 50)
+
+
+def synthetic_orders(ids, seed):
+    rng = np.random.default_rng(seed)
+    placed = rng.integers(1_700_000_000, 1_700_900_000, len(ids)).tolist()
+    hours = rng.integers(2, 72, len(ids)).tolist()
+    return [
+        {'id': order_id, 'placed_at': at, 'delivered_at': at + 3600 * h, 'status': 'Delivered'}
+        for order_id, at, h in zip(ids, placed, hours)
+    ]
+
+
+def test_segments_return_every_order_by_id(tmp_path, small_blocks):
+    orders = synthetic_orders(range(1, 301, 2), seed=1) + synthetic_orders(range(2, 301, 2), seed=2)
+    store = OrderArchive(str(tmp_path / "archive"), FIELDS)
+    store.append(orders[:150])
+    store.append(orders[150:])
+    assert len(store) == 300 and len(store.segments) == 6
+    for order in orders:
+        assert store.get(order['id']) == order
+    assert store.get(0) is None and store.get(301) is None
+    assert sorted(o['id'] for batch in store.iter_batches() for o in batch) == list(range(1, 301))
+
+
+@pytest.mark.parametrize("field", ['placed_at', 'delivered_at'])
+def test_date_range_queries_match_brute_force(tmp_path, small_blocks, field):
+    orders = synthetic_orders(range(1, 401), seed=3)
+    store = OrderArchive(str(tmp_path / "archive"), FIELDS)
+    for start in range(0, 400, 90):
+        store.append(orders[start:start + 90])
+    rng = np.random.default_rng(4)
+    for _ in range(50):
+        start, end = sorted(rng.integers(1_699_990_000, 1_700_910_000, 2).tolist())
+        expected = {o['id'] for o in orders if start <= o[field] < end}
+        assert store.count(start, end, field) == len(expected)
+        rows = store.between(start, end, field)
+        assert {o['id'] for o in rows} == expected and len(rows) == len(expected)
+        assert store.between(start, end, field, offset=5, limit=10) == rows[5:15]
+
+
+def test_segments_survive_a_reopen_and_drop_partial_writes(tmp_path, small_blocks):
+    directory = str(tmp_path / "archive")
+    orders = synthetic_orders(range(1, 121), seed=5)
+    OrderArchive(directory, FIELDS).append(orders)
+    partial = os.path.join(directory, "segment-999999.seg.tmp")
+    with open(partial, 'wb') as file:
+        file.write(b"torn")
+    reopened = OrderArchive(directory, FIELDS)
+    assert len(reopened) == 120 and not os.path.exists(partial)
+    assert [reopened.get(order['id']) for order in orders] == orders
+
+
+def deliver(repos, order_ids, driver_id=1):
+    for order_id in order_ids:
+        repos.orders.claim(order_id, driver_id)
+        repos.orders.update_status(order_id, 'Delivered')
+
+
+@pytest.fixture
+def placed(repos, make_order):
+    repos.products.update(4, stock=10 ** 6)
+    product = repos.products.get(4)
+    return [repos.orders.place(make_order(product, 50))['id'] for _ in range(240)]
+
+
+def test_archiving_moves_delivered_orders_out_of_the_live_set(repos, placed):
+    deliver(repos, placed[::2])
+    before = {order_id: repos.orders.get(order_id) for order_id in placed}
+    totals = repos.analytics.snapshot()
+    assert repos.orders.archive_delivered(int(time.time()) + 1) == 120
+    assert len(repos.orders) == 120
+    assert repos.analytics.snapshot() == totals
+    assert repos.storage.count_orders() == 240
+    for order_id, order in before.items():
+        assert repos.orders.get(order_id) == order
+        assert (order_id in repos.orders.table) == (order['status'] != 'Delivered')
+
+    restarted = Repositories(Storage(repos.storage.path))
+    assert len(restarted.orders) == 120
+    assert all(restarted.orders.get(order_id) == order for order_id, order in before.items())
+
+
+def test_orders_left_in_both_tiers_by_a_crash_are_dropped_on_restart(repos, placed):
+    deliver(repos, placed[:10])
+    delivered = [repos.orders.get(order_id) for order_id in placed[:10]]
+    # Segment written, process gone before the rows were deleted.
+    repos.storage.archive.append(delivered)
+    restarted = Storage(repos.storage.path)
+    with restarted.read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM orders WHERE id <= ?", (placed[9],)).fetchone()[0] == 0
+    assert [restarted.get_order(order['id']) for order in delivered] == delivered
+    assert restarted.count_orders() == 240
+
+
+def history_ids(batches):
+    return [order['id'] for batch in batches for order in batch]
+
+
+def test_history_streams_each_order_once_when_archived_mid_stream(repos, placed):
+    storage = repos.storage
+    deliver(repos, placed[::4])
+    repos.orders.archive_delivered(int(time.time()) + 1)
+
+    batches = storage.iter_order_history(batch_size=25)
+    seen = history_ids([next(batches) for _ in range(4)])
+    # Orders on both sides of the reader's cursor move while it is paused.
+    moving = [order_id for i, order_id in enumerate(placed) if i % 4 and i % 3 == 0]
+    assert min(moving) < seen[-1] < max(moving)
+    deliver(repos, moving)
+    repos.orders.archive_delivered(int(time.time()) + 1)
+    seen += history_ids(batches)
+
+    assert len(seen) == len(set(seen)) == 240
+    assert set(seen) == set(placed)
+
+
+def test_history_streams_each_order_once_while_the_archiver_runs(repos, placed):
+    storage = repos.storage
+    stop = threading.Event()
+
+    def archiver():
+        for start in range(0, len(placed), 20):
+            if stop.is_set():
+                break
+            deliver(repos, placed[start:start + 20:2])
+            repos.orders.archive_delivered(int(time.time()) + 1)
+
+    thread = threading.Thread(target=archiver)
+    thread.start()
+    try:
+        for _ in range(5):
+            seen = history_ids(storage.iter_order_history(batch_size=7))
+            assert len(seen) == len(set(seen)) == 240
+    finally:
+        stop.set()
+        thread.join()
+    assert sorted(history_ids(storage.iter_order_history(batch_size=7))) == placed
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from distances import ASSAM_CITIES
+from pricing import calculate_delivery_prices, quote_cart
+from repository import new_parent_order
+from storage import InsufficientStockError
+
+
+def guwahati_product(name, weight_kg, volume_m3, stock=1000):
+    return {
+        'name': name,
+        'category': 'Construction Materials',
+        'price': 120,
+        'weight_kg': weight_kg,
+        'volume_m3': volume_m3,
+        'min_quantity': 1,
+        'unit': 'units',
+        'supplier': 'Test Supplier',
+        'location': 'Guwahati',
+        'coordinates': ASSAM_CITIES['Guwahati'],
+        'description': 'Test product',
+        'stock': stock
+    }
+
+
+@pytest.fixture
+def catalog(repos):
+    for name, weight_kg, volume_m3 in [('Bricks', 3.0, 0.002), ('Cement', 50.0, 0.04), ('Tiles', 0.0, 0.01)]:
+        repos.products.add(guwahati_product(name, weight_kg, volume_m3))
+    return {product['id']: product for product in repos.products.list()}
+
+
+def guwahati_ids(catalog):
+    return [product_id for product_id, product in catalog.items() if product['location'] == 'Guwahati']
+
+
+def test_each_shipment_is_one_pickup_charged_on_its_combined_load(catalog):
+    bricks, cement, _ = guwahati_ids(catalog)[-3:]
+    lines = [(bricks, 200), (3, 10), (cement, 12), (1, 50)]
+    quote = quote_cart(catalog, lines, 'Jorhat')
+
+    assert [shipment['pickup_location'] for shipment in quote['shipments']] == ['Guwahati', 'Dibrugarh']
+    assert [shipment['lines'] for shipment in quote['shipments']] == [[0, 2, 3], [1]]
+    guwahati = quote['shipments'][0]
+    assert guwahati['weight_kg'] == pytest.approx(3.0 * 200 + 50.0 * 12 + catalog[1]['weight_kg'] * 50)
+    combined = calculate_delivery_prices(guwahati['weight_kg'], guwahati['volume_m3'], 1, guwahati['distance_km'])
+    assert guwahati['delivery_charge'] == pytest.approx(float(combined), abs=0.01)
+    assert quote['delivery_charge'] == round(sum(shipment['delivery_charge'] for shipment in quote['shipments']), 2)
+    assert quote['grand_total'] == quote['product_total'] + quote['delivery_charge']
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_line_charges_split_each_shipment_charge_by_weight_exactly(catalog, seed):
+    rng = np.random.default_rng(seed)
+    ids = list(catalog)
+    lines = [(int(product_id), int(rng.integers(1, 40))) for product_id in rng.choice(ids, 8)]
+    quote = quote_cart(catalog, lines, str(rng.choice(list(ASSAM_CITIES))))
+
+    for shipment in quote['shipments']:
+        shares = [quote['lines'][i]['delivery_charge'] for i in shipment['lines']]
+        # The lead line absorbs the rounding, so the shares add up to the cent.
+        assert round(sum(shares), 2) == round(shipment['delivery_charge'], 2)
+        weights = [catalog[quote['lines'][i]['product_id']]['weight_kg'] * quote['lines'][i]['quantity'] for i in shipment['lines']]
+        for i, share, weight in zip(shipment['lines'][1:], shares[1:], weights[1:]):
+            expected = shipment['delivery_charge'] * weight / sum(weights) if sum(weights) else shipment['delivery_charge'] / len(weights)
+            assert share == pytest.approx(expected, abs=0.01)
+
+
+def test_weightless_shipments_split_evenly(catalog):
+    tiles = guwahati_ids(catalog)[-1]
+    quote = quote_cart(catalog, [(tiles, 5), (tiles, 7), (tiles, 9)], 'Tezpur')
+    charges = [line['delivery_charge'] for line in quote['lines']]
+    assert round(sum(charges), 2) == round(quote['shipments'][0]['delivery_charge'], 2)
+    assert max(charges) - min(charges) <= 0.02
+
+
+def test_one_line_cart_costs_the_same_as_a_single_order(catalog):
+    quote = quote_cart(catalog, [(4, 50)], 'Silchar')
+    assert quote['delivery_charge'] == quote['separate_delivery_charge'] == quote['lines'][0]['delivery_charge']
+
+
+def test_empty_cart_is_rejected(catalog):
+    with pytest.raises(ValueError):
+        quote_cart(catalog, [], 'Guwahati')
+
+
+def place_cart(reservations, catalog, lines, delivery_location='Jorhat'):
+    quote = quote_cart(catalog, lines, delivery_location)
+    parent, shipments = new_parent_order(catalog, quote, delivery_location, 'Test Buyer', '9000000000', 'Test Address')
+    return quote, reservations.place_parent(parent, shipments)
+
+
+def test_a_shipment_is_offered_and_claimed_as_one_job(reservations, catalog):
+    repos = reservations.repos
+    bricks, cement, _ = guwahati_ids(catalog)[-3:]
+    quote, (parent, orders) = place_cart(reservations, catalog, [(bricks, 200), (3, 10), (cement, 12)])
+
+    assert parent['order_ids'] == [order['id'] for order in orders]
+    leads = {order['shipment_id'] for order in orders}
+    assert len(leads) == len(quote['shipments']) == 2
+    jobs = [repos.orders.as_job(order) for order in repos.orders.list(status='Order Placed')]
+    assert len([job for job in jobs if job is not None]) == repos.orders.open_job_count() == 2
+
+    guwahati_lead = orders[0]['id']
+    combined = repos.orders.as_job(repos.orders.get(guwahati_lead))
+    assert combined['weight_kg'] == pytest.approx(quote['shipments'][0]['weight_kg'])
+    assert combined['delivery_charge'] == pytest.approx(quote['shipments'][0]['delivery_charge'])
+
+    assert repos.orders.claim(guwahati_lead, 1)
+    shipment = [repos.orders.get(order['id']) for order in orders if order['shipment_id'] == guwahati_lead]
+    assert [(order['status'], order['driver_id']) for order in shipment] == [('Driver Assigned', 1)] * 2
+    assert repos.orders.open_job_count() == 1
+
+
+def test_a_cart_short_on_any_line_places_nothing(reservations, catalog):
+    repos = reservations.repos
+    bricks = guwahati_ids(catalog)[-3]
+    stock = {product_id: product['stock'] for product_id, product in catalog.items()}
+    with pytest.raises(InsufficientStockError):
+        place_cart(reservations, catalog, [(bricks, 10), (2, stock[2] + 1)])
+    assert len(repos.orders) == 0
+    assert {product['id']: product['stock'] for product in repos.products.list()} == stock
+    assert repos.storage.count_orders() == 0
@@ -0,0 +1,107 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from distances import ASSAM_CITIES, haversine_km
+from gazetteer import PLACES_PATH, SpatialGrid, nearest_hub, normalize, open_gazetteer
+
+
+@pytest.fixture(scope="module")
+def gazetteer(tmp_path_factory):
+    # Built from a copy so the test never rewrites the index beside the bundled CSV.
+    csv_path = tmp_path_factory.mktemp("gazetteer") / "places.csv"
+    shutil.copy(PLACES_PATH, csv_path)
+    return open_gazetteer(str(csv_path))
+
+
+@pytest.fixture(scope="module")
+def places(gazetteer):
+    return [gazetteer.place(i) for i in range(len(gazetteer))]
+
+
+def brute_search(places, query):
+    query = normalize(query)
+    matches = set()
+    for place in places:
+        words = normalize(place['name']).split()
+        if place['pin'].startswith(query) or any(" ".join(words[i:]).startswith(query) for i in range(len(words))):
+            matches.add(place['id'])
+    return matches
+
+
+def all_prefixes(places):
+    prefixes = set()
+    for place in places:
+        words = normalize(place['name']).split()
+        for i in range(len(words)):
+            suffix = " ".join(words[i:])
+            prefixes.update(suffix[:n] for n in range(1, len(suffix) + 1))
+        prefixes.update(place['pin'][:n] for n in range(1, 7))
+    return sorted(prefixes)
+
+
+def test_trie_search_matches_brute_force_for_every_prefix(gazetteer, places):
+    for query in all_prefixes(places):
+        found = {place['id'] for place in gazetteer.search(query, limit=len(places))}
+        assert found == brute_search(places, query), query
+
+
+def test_trie_search_is_case_and_punctuation_insensitive(gazetteer, places):
+    name = places[0]['name']
+    assert gazetteer.search(name.upper()) == gazetteer.search(f"  {name.lower()}!")
+
+
+@pytest.mark.parametrize("query", ["zzz", "q", "999", "guwahatix"])
+def test_trie_search_finds_nothing_brute_force_does_not(gazetteer, places, query):
+    assert {place['id'] for place in gazetteer.search(query, limit=len(places))} == brute_search(places, query)
+
+
+def test_search_ranks_within_its_limit(gazetteer, places):
+    ranked = gazetteer.search("g", limit=len(places))
+    assert gazetteer.search("g", limit=3) == ranked[:3]
+
+
+def test_resolve_round_trips_every_label(gazetteer, places):
+    for place in places:
+        assert gazetteer.resolve(place['label'])['pin'] == place['pin']
+        assert normalize(gazetteer.resolve(place['label'])['name']) == normalize(place['name'])
+    assert gazetteer.resolve("Nowhere In Particular") is None
+
+
+def test_grid_nearest_matches_brute_force(gazetteer):
+    rng = np.random.default_rng(3)
+    lat_lo, lon_lo = gazetteer.coordinates.min(axis=0)
+    lat_hi, lon_hi = gazetteer.coordinates.max(axis=0)
+    # Points inside the grid and well outside it on every side.
+    points = np.column_stack([rng.uniform(lat_lo - 2, lat_hi + 2, 500), rng.uniform(lon_lo - 2, lon_hi + 2, 500)])
+    for point in points.tolist():
+        place = gazetteer.nearest(point)
+        km = haversine_km(gazetteer.coordinates, tuple(point))
+        assert place['km'] == round(float(km.min()), 2)
+        assert km[place['id']] == km.min()
+
+
+@pytest.mark.parametrize("cell_deg", [0.05, 0.25, 1.0])
+def test_spatial_grid_matches_brute_force_on_random_points(cell_deg):
+    rng = np.random.default_rng(int(cell_deg * 100))
+    coordinates = np.column_stack([rng.uniform(24, 28, 300), rng.uniform(89.5, 96, 300)])
+    grid = SpatialGrid.build(coordinates, cell_deg)
+    for point in np.column_stack([rng.uniform(23, 29, 200), rng.uniform(88, 97, 200)]).tolist():
+        point_id, km = grid.nearest(point)
+        distances = haversine_km(coordinates, tuple(point))
+        assert km == distances.min()
+        assert distances[point_id] == distances.min()
+
+
+def test_empty_grid_has_no_nearest_point():
+    assert SpatialGrid.build(np.empty((0, 2)), 0.25).nearest((26.0, 92.0)) == (None, np.inf)
+
+
+def test_nearest_hub_matches_brute_force():
+    rng = np.random.default_rng(5)
+    names = list(ASSAM_CITIES)
+    coordinates = np.array(list(ASSAM_CITIES.values()))
+    for point in np.column_stack([rng.uniform(24, 28, 200), rng.uniform(89.5, 96, 200)]).tolist():
+        distances = haversine_km(coordinates, tuple(point))
+        assert distances[names.index(nearest_hub(point))] == distances.min()
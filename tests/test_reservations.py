@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from reservations import ReservationError, ReservationService
+from storage import InsufficientStockError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_holds_reduce_what_others_can_reserve(reservations):
+    stock = reservations.repos.products.get(1)['stock']
+    hold = reservations.reserve(1, 100, holder='a')
+    assert reservations.available(1) == stock - 100
+    assert reservations.available(1, holder='a') == stock
+    with pytest.raises(InsufficientStockError):
+        reservations.reserve(1, stock - 99, holder='b')
+    assert reservations.release(hold.id)
+    assert reservations.available(1) == stock
+
+
+def test_a_new_hold_replaces_the_holders_previous_one(reservations):
+    reservations.reserve(1, 100, holder='a')
+    reservations.reserve(1, 60, holder='a')
+    assert reservations.held(1) == 60
+
+
+def test_expired_holds_free_their_stock(repos):
+    clock = FakeClock()
+    service = ReservationService(repos, hold_seconds=10, clock=clock)
+    stock = repos.products.get(2)['stock']
+    hold = service.reserve(2, stock, holder='a')
+    with pytest.raises(InsufficientStockError):
+        service.reserve(2, 1, holder='b')
+    clock.now = 10
+    assert service.get(hold.id) is None
+    assert service.reserve(2, stock, holder='b').quantity == stock
+
+
+def test_confirm_consumes_the_hold(reservations, make_order):
+    product = reservations.repos.products.get(4)
+    hold = reservations.reserve(4, 50, holder='a')
+    order = reservations.confirm(hold.id, make_order(product, 50))
+    assert reservations.repos.products.get(4)['stock'] == product['stock'] - 50
+    assert reservations.held(4) == 0
+    with pytest.raises(ReservationError):
+        reservations.confirm(hold.id, make_order(product, 50))
+    assert reservations.repos.orders.get(order['id'])['quantity'] == 50
+
+
+def test_confirm_rejects_an_order_that_does_not_match(reservations, make_order):
+    hold = reservations.reserve(4, 50, holder='a')
+    with pytest.raises(ReservationError):
+        reservations.confirm(hold.id, make_order(reservations.repos.products.get(4), 100))
+
+
+def test_reserve_many_holds_every_line_or_none(reservations):
+    short = reservations.repos.products.get(2)['stock']
+    with pytest.raises(InsufficientStockError):
+        reservations.reserve_many([(1, 50), (3, 10), (2, short + 1)], holder='cart')
+    assert [reservations.held(product_id) for product_id in (1, 2, 3)] == [0, 0, 0]
+    holds = reservations.reserve_many([(1, 50), (3, 10), (1, 50)], holder='cart')
+    assert [(hold.product_id, hold.quantity) for hold in holds] == [(1, 100), (3, 10)]
+
+
+def test_concurrent_buyers_never_oversell(reservations, make_order):
+    repos = reservations.repos
+    repos.products.update(5, stock=1000)
+    product = repos.products.get(5)
+    placed = []
+    barrier = threading.Barrier(8)
+
+    def buy(i):
+        barrier.wait()
+        for _ in range(3):
+            try:
+                placed.append(reservations.place(make_order(product, 100), holder=f"buyer-{i}"))
+            except InsufficientStockError:
+                pass
+
+    threads = [threading.Thread(target=buy, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(placed) == 10
+    assert repos.products.get(5)['stock'] == repos.storage.get_product(5)['stock'] == 0
+    assert reservations.held(5) == 0
@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+
+from storage import InsufficientStockError, Storage
+
+
+def index_names(storage, table):
+    with storage.read() as conn:
+        return {row['name'] for row in conn.execute(f"PRAGMA index_list({table})")}
+
+
+def query_plan(storage, sql, params=()):
+    with storage.read() as conn:
+        return " ".join(row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def test_database_runs_in_wal_mode(storage):
+    with storage.read() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_hot_filters_are_indexed(storage):
+    assert {'idx_orders_status', 'idx_orders_driver_id'} <= index_names(storage, 'orders')
+    assert {'idx_products_category', 'idx_products_location'} <= index_names(storage, 'products')
+    assert 'idx_orders_status' in query_plan(storage, "SELECT * FROM orders WHERE status = ?", ('Order Placed',))
+    assert 'idx_products_location' in query_plan(storage, "SELECT * FROM products WHERE location = ?", ('Guwahati',))
+
+
+def test_place_order_takes_stock(storage, make_order):
+    product = storage.get_product(1)
+    order = storage.place_order(make_order(product, 50))
+    assert storage.get_product(1)['stock'] == product['stock'] - 50
+    assert storage.get_order(order['id'])['quantity'] == 50
+
+
+def test_oversell_guard_rejects_orders_beyond_stock(storage, make_order):
+    product = storage.get_product(2)
+    with pytest.raises(InsufficientStockError):
+        storage.place_order(make_order(product, product['stock'] + 1))
+    assert storage.get_product(2)['stock'] == product['stock']
+    assert storage.count_orders() == 0
+
+
+def test_concurrent_writers_never_oversell(storage, make_order):
+    storage.update_product(3, stock=40)
+    product = storage.get_product(3)
+    placed = []
+    barrier = threading.Barrier(8)
+
+    def buy():
+        barrier.wait()
+        for _ in range(10):
+            try:
+                placed.append(storage.place_order(make_order(product, 1))['id'])
+            except InsufficientStockError:
+                pass
+
+    threads = [threading.Thread(target=buy) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(placed) == len(set(placed)) == 40
+    assert storage.get_product(3)['stock'] == 0
+
+
+def test_parent_order_takes_stock_for_every_line_or_none(storage, make_order):
+    first, short = storage.get_product(1), storage.get_product(2)
+    with pytest.raises(InsufficientStockError):
+        storage.place_parent_order({}, [make_order(first, 50), make_order(short, short['stock'] + 1)])
+    assert storage.get_product(1)['stock'] == first['stock']
+    assert storage.count_orders() == 0
+
+
+def test_claim_orders_assigns_all_or_nothing(storage, make_order):
+    product = storage.get_product(4)
+    ids = [storage.place_order(make_order(product, 50))['id'] for _ in range(3)]
+    assert storage.claim_order(ids[0], 1)
+    assert not storage.claim_orders(ids, 2)
+    assert [storage.get_order(i)['driver_id'] for i in ids] == [1, None, None]
+    assert storage.claim_orders(ids[1:], 2)
+    assert [storage.get_order(i)['status'] for i in ids] == ['Driver Assigned'] * 3
+
+
+def test_reserved_order_id_blocks_never_overlap(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first, second = Storage(path), Storage(path)
+    blocks = [first.reserve_order_ids(100), second.reserve_order_ids(100), first.reserve_order_ids(100)]
+    ranges = [set(range(start, start + 100)) for start in blocks]
+    assert not (ranges[0] & ranges[1]) and not (ranges[1] & ranges[2]) and not (ranges[0] & ranges[2])
+    first.pool.close()
+    second.pool.close()
+
+
+def test_in_memory_indexes_match_the_store(repos, make_order):
+    product = repos.products.get(4)
+    ids = [repos.orders.place(make_order(product, 50))['id'] for _ in range(12)]
+    for i, order_id in enumerate(ids):
+        if i % 3:
+            repos.orders.claim(order_id, 1 + i % 2)
+        if i % 4 == 0 and i % 3:
+            repos.orders.update_status(order_id, 'In Transit')
+    repos.orders.delete(ids[-1])
+
+    stored = repos.storage.list_orders()
+    for status in ('Order Placed', 'Driver Assigned', 'In Transit'):
+        assert [o['id'] for o in repos.orders.list(status=status)] == [o['id'] for o in stored if o['status'] == status]
+    for driver_id in (1, 2):
+        assert [o['id'] for o in repos.orders.list(driver_id=driver_id)] == [o['id'] for o in stored if o['driver_id'] == driver_id]
+    assert repos.orders.get(ids[-1]) is None
+    assert repos.products.get(4)['stock'] == repos.storage.get_product(4)['stock']
+    assert [p['id'] for p in repos.products.list(location='Guwahati')] == [p['id'] for p in repos.storage.list_products(location='Guwahati')]
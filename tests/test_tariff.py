@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from matching import VEHICLE_CAPACITIES
+from pricing import calculate_delivery_price, calculate_delivery_prices
+from tariff import DEFAULT_TARIFF, CompiledTariff, validate_tariff
+
+CUSTOM_TARIFF = {
+    'name': "Tiered",
+    'distance_slabs': [
+        {'up_to_km': 25, 'rate_per_km': 22.5, 'multiplier': 1.0},
+        {'up_to_km': 100, 'rate_per_km': 17, 'multiplier': 1.05},
+        {'up_to_km': 300, 'rate_per_km': 14.25, 'multiplier': 1.15},
+        {'up_to_km': None, 'rate_per_km': 12, 'multiplier': 1.3}
+    ],
+    'weight_rate_per_kg': 0.65,
+    'volume_rate_per_m3': 85,
+    'vehicle_rate_factors': {vehicle_type: 1.0 + 0.15 * i for i, vehicle_type in enumerate(VEHICLE_CAPACITIES)},
+    'region_surcharges': {'Silchar': 0.12, 'Dibrugarh': -0.05},
+    'minimum_charge': 350
+}
+
+
+def random_loads(n, seed):
+    rng = np.random.default_rng(seed)
+    weight_kg = np.round(rng.uniform(0.1, 400, n), 2)
+    volume_m3 = np.round(rng.uniform(0.01, 4, n), 3)
+    quantity = rng.integers(1, 60, n)
+    distance_km = np.round(rng.uniform(0, 700, n), 2)
+    # Slab boundaries and zero distance are where scalar and batch forms could disagree.
+    distance_km[:8] = [0, 25, 100, 300, 25.000001, 99.99, 100.01, 300.5]
+    surcharge = rng.choice([0.0, 0.12, -0.05], n)
+    return weight_kg, volume_m3, quantity, distance_km, surcharge
+
+
+def original_charge(weight_kg, volume_m3, quantity, distance_km):
+    # The flat formula the default tariff replaced, before rounding.
+    total = distance_km * 15 + weight_kg * quantity * 0.5 + volume_m3 * quantity * 100
+    if distance_km > 100:
+        total *= 1.2
+    return total
+
+
+@pytest.mark.parametrize("tariff", [DEFAULT_TARIFF, CUSTOM_TARIFF], ids=["default", "custom"])
+def test_batch_charges_match_scalar_charges_bit_for_bit(tariff):
+    compiled = CompiledTariff(tariff)
+    weight_kg, volume_m3, quantity, distance_km, surcharge = random_loads(5000, seed=7)
+    batch = compiled.charges(weight_kg, volume_m3, quantity, distance_km, surcharge)
+    scalar = [
+        compiled.charge(w, v, q, d, s)
+        for w, v, q, d, s in zip(weight_kg.tolist(), volume_m3.tolist(), quantity.tolist(), distance_km.tolist(), surcharge.tolist())
+    ]
+    assert batch.tolist() == scalar
+
+
+def test_batch_charges_broadcast_one_load_over_many_distances():
+    compiled = CompiledTariff(CUSTOM_TARIFF)
+    distances = np.linspace(0, 600, 241)
+    batch = compiled.charges(120.0, 1.5, 8, distances, 0.12)
+    assert batch.tolist() == [compiled.charge(120.0, 1.5, 8, d, 0.12) for d in distances.tolist()]
+
+
+def test_default_tariff_reproduces_the_original_formula():
+    compiled = CompiledTariff(DEFAULT_TARIFF)
+    weight_kg, volume_m3, quantity, distance_km, _ = random_loads(2000, seed=11)
+    for w, v, q, d in zip(weight_kg.tolist(), volume_m3.tolist(), quantity.tolist(), distance_km.tolist()):
+        assert compiled.charge(w, v, q, d) == original_charge(w, v, q, d)
+
+
+def test_rounded_batch_prices_match_rounded_scalar_prices():
+    weight_kg, volume_m3, quantity, distance_km, _ = random_loads(2000, seed=13)
+    batch = calculate_delivery_prices(weight_kg, volume_m3, quantity, distance_km)
+    scalar = [
+        calculate_delivery_price(w, v, q, d)
+        for w, v, q, d in zip(weight_kg.tolist(), volume_m3.tolist(), quantity.tolist(), distance_km.tolist())
+    ]
+    assert batch.tolist() == scalar
+
+
+def test_explicit_tariff_overrides_the_active_one():
+    custom = CompiledTariff(CUSTOM_TARIFF)
+    prices = calculate_delivery_prices([10.0], [0.5], [3], [40.0], tariff=custom)
+    assert prices.tolist() == [round(custom.charge(10.0, 0.5, 3, 40.0), 2)]
+
+
+@pytest.mark.parametrize("change", [
+    {'distance_slabs': []},
+    {'distance_slabs': [{'up_to_km': 100, 'rate_per_km': 15}]},
+    {'distance_slabs': [{'up_to_km': 100, 'rate_per_km': 15}, {'up_to_km': 50, 'rate_per_km': 15}, {'up_to_km': None, 'rate_per_km': 15}]},
+    {'weight_rate_per_kg': -1},
+    {'vehicle_rate_factors': {'Hovercraft': 1.0}},
+    {'region_surcharges': {'Silchar': -1}}
+])
+def test_invalid_tariffs_are_rejected(change):
+    with pytest.raises(ValueError):
+        validate_tariff(dict(DEFAULT_TARIFF, **change))
@@ -0,0 +1,354 @@
+import bisect
+import calendar
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from columnar import MISSING
+
+HOUR = 3600
+DAY = 24 * HOUR
+HOURLY_RETENTION_DAYS = 7
+INITIAL_CAPACITY = 1024
+
+PLACED = 'placed'
+DELIVERED = 'delivered'
+GRANULARITIES = {'hour': HOUR, 'day': DAY}
+MEASURES = ('orders', 'units', 'revenue', 'delivery_fees', 'km')
+DIMENSIONS = ('product', 'category', 'pickup_city', 'delivery_city')
+UNKNOWN_CATEGORY = "Unknown"
+
+
+def wall_clock(epoch):
+    """Seconds since 1970-01-01 00:00 local time, so buckets line up with local hours and days."""
+    return epoch + time.localtime(epoch).tm_gmtoff
+
+
+def wall_clock_many(epochs):
+    # The UTC offset only changes on an hour boundary; look it up once per hour.
+    hours, inverse = np.unique(epochs // HOUR, return_inverse=True)
+    offsets = np.array([time.localtime(hour * HOUR).tm_gmtoff for hour in hours.tolist()], dtype=np.int64)
+    return epochs + offsets[inverse]
+
+
+def day_wall_clock(day):
+    return calendar.timegm(day.timetuple())
+
+
+def day_epoch(day):
+    return int(time.mktime(day.timetuple()))
+
+
+def wall_clock_datetime(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+
+
+class TimeIndex:
+    """Order ids sorted by placement time (epoch seconds) for range lookups.
+
+    Orders arrive in time order, so adding one is normally an append; an
+    order with an earlier time is shifted into place. Archived orders
+    leave in bulk, so `discard` only queues the id and the next access
+    drops every queued id in one pass.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.times = np.empty(INITIAL_CAPACITY, dtype=np.int64)
+        self.ids = np.empty(INITIAL_CAPACITY, dtype=np.int64)
+        self.size = 0
+        self._discarded = []
+
+    def __len__(self):
+        with self._lock:
+            self._flush()
+            return self.size
+
+    def rebuild_from_columns(self, store):
+        columns, live = store.view(('placed_at', 'id'))
+        times, ids = columns['placed_at'][live], columns['id'][live]
+        order = np.lexsort((ids, times))
+        with self._lock:
+            self.times = np.concatenate([times[order], np.empty(INITIAL_CAPACITY, dtype=np.int64)])
+            self.ids = np.concatenate([ids[order], np.empty(INITIAL_CAPACITY, dtype=np.int64)])
+            self.size = len(order)
+            self._discarded = []
+
+    def _flush(self):
+        if not self._discarded:
+            return
+        keep = np.flatnonzero(~np.isin(self.ids[:self.size], self._discarded))
+        self.times[:len(keep)] = self.times[keep]
+        self.ids[:len(keep)] = self.ids[keep]
+        self.size = len(keep)
+        self._discarded = []
+
+    def _position(self, placed_at, order_id):
+        lo = np.searchsorted(self.times[:self.size], placed_at, 'left')
+        hi = np.searchsorted(self.times[:self.size], placed_at, 'right')
+        return int(lo + np.searchsorted(self.ids[lo:hi], order_id))
+
+    def add(self, placed_at, order_id):
+        with self._lock:
+            self._flush()
+            if self.size == len(self.times):
+                self.times = np.concatenate([self.times, np.empty(self.size, dtype=np.int64)])
+                self.ids = np.concatenate([self.ids, np.empty(self.size, dtype=np.int64)])
+            if self.size == 0 or (self.times[self.size - 1], self.ids[self.size - 1]) <= (placed_at, order_id):
+                i = self.size
+            else:
+                i = self._position(placed_at, order_id)
+                self.times[i + 1:self.size + 1] = self.times[i:self.size]
+                self.ids[i + 1:self.size + 1] = self.ids[i:self.size]
+            self.times[i] = placed_at
+            self.ids[i] = order_id
+            self.size += 1
+
+    def remove(self, placed_at, order_id):
+        with self._lock:
+            self._flush()
+            i = self._position(placed_at, order_id)
+            if i < self.size and self.ids[i] == order_id and self.times[i] == placed_at:
+                self.times[i:self.size - 1] = self.times[i + 1:self.size]
+                self.ids[i:self.size - 1] = self.ids[i + 1:self.size]
+                self.size -= 1
+
+    def discard(self, order_id):
+        with self._lock:
+            self._discarded.append(order_id)
+
+    def _bounds(self, start, end):
+        times = self.times[:self.size]
+        return int(np.searchsorted(times, start, 'left')), int(np.searchsorted(times, end, 'left'))
+
+    def count(self, start, end):
+        with self._lock:
+            self._flush()
+            lo, hi = self._bounds(start, end)
+            return hi - lo
+
+    def between(self, start, end):
+        """Ids of orders placed in [start, end), oldest first."""
+        with self._lock:
+            self._flush()
+            lo, hi = self._bounds(start, end)
+            return self.ids[lo:hi].copy()
+
+    def on_order_event(self, event, old, new):
+        if event == 'created':
+            self.add(new['placed_at'], new['id'])
+        elif event == 'deleted':
+            self.remove(old['placed_at'], old['id'])
+        elif event == 'archived':
+            self.discard(old['id'])
+
+
+def _new_bucket():
+    return {'total': [0.0] * len(MEASURES), **{dimension: {} for dimension in DIMENSIONS}}
+
+
+def _add_cell(cell, measures):
+    for i, value in enumerate(measures):
+        cell[i] += value
+
+
+class BucketSeries:
+    """Fixed-width time buckets kept sorted by start time for bisecting.
+
+    Each bucket holds the measure totals overall and per dimension value.
+    With a retention, buckets older than that before the newest are dropped.
+    """
+
+    def __init__(self, width, retention=None):
+        self.width = width
+        self.retention = retention
+        self.starts = []
+        self.buckets = []
+
+    def bucket(self, wall):
+        start = wall - wall % self.width
+        i = bisect.bisect_left(self.starts, start)
+        if i < len(self.starts) and self.starts[i] == start:
+            return self.buckets[i]
+        if self.retention is not None and self.starts and start < self.starts[-1] - self.retention:
+            return None
+        self.starts.insert(i, start)
+        self.buckets.insert(i, _new_bucket())
+        if self.retention is not None:
+            expired = bisect.bisect_left(self.starts, self.starts[-1] - self.retention)
+            del self.starts[:expired]
+            del self.buckets[:expired]
+        return self.buckets[bisect.bisect_left(self.starts, start)]
+
+    def between(self, start, end):
+        lo = bisect.bisect_left(self.starts, start)
+        hi = bisect.bisect_left(self.starts, end)
+        return self.starts[lo:hi], self.buckets[lo:hi]
+
+
+class Rollups:
+    """Hourly and daily order totals, bucketed by local time.
+
+    Orders count once in the bucket they were placed in and again in the
+    bucket they were delivered in, overall and per product, category,
+    pickup city and delivery city. Updated per order event like
+    OrderAggregates; range queries bisect the bucket starts and add up
+    only the buckets inside the range. Hourly buckets are kept for
+    HOURLY_RETENTION_DAYS, daily ones for the whole history.
+    """
+
+    def __init__(self, products):
+        self.products = products
+        self._lock = threading.Lock()
+        self._series = self._empty_series()
+
+    @staticmethod
+    def _empty_series():
+        return {
+            event: {
+                'hour': BucketSeries(HOUR, HOURLY_RETENTION_DAYS * DAY),
+                'day': BucketSeries(DAY)
+            }
+            for event in (PLACED, DELIVERED)
+        }
+
+    def _category(self, product_id):
+        product = self.products.get(product_id)
+        return UNKNOWN_CATEGORY if product is None else product['category']
+
+    def _add(self, order, event, sign):
+        at = order['placed_at'] if event == PLACED else order['delivered_at']
+        if at is None:
+            return
+        wall = wall_clock(at)
+        measures = [sign, sign * order['quantity'], sign * order['grand_total'], sign * order['delivery_charge'], sign * order['distance_km']]
+        values = {
+            'product': order['product_name'],
+            'category': self._category(order['product_id']),
+            'pickup_city': order['pickup_location'],
+            'delivery_city': order['delivery_location']
+        }
+        with self._lock:
+            for series in self._series[event].values():
+                bucket = series.bucket(wall)
+                if bucket is None:
+                    continue
+                _add_cell(bucket['total'], measures)
+                for dimension, value in values.items():
+                    cells = bucket[dimension]
+                    cell = cells.setdefault(value, [0.0] * len(MEASURES))
+                    _add_cell(cell, measures)
+                    if not cell[0]:
+                        del cells[value]
+
+    def on_order_event(self, event, old, new):
+        if event == 'archived':
+            # Still part of the history the rollups cover.
+            return
+        if event == 'created':
+            self._add(new, PLACED, 1)
+        elif event == 'deleted':
+            self._add(old, PLACED, -1)
+            if old['status'] == 'Delivered':
+                self._add(old, DELIVERED, -1)
+        elif old['status'] != 'Delivered' and new['status'] == 'Delivered':
+            self._add(new, DELIVERED, 1)
+        elif old['status'] == 'Delivered' and new['status'] != 'Delivered':
+            self._add(old, DELIVERED, -1)
+
+    def rebuild_from_columns(self, store):
+        """Recompute every bucket from a ColumnStore of orders, grouping with NumPy."""
+        fields = ('product_id', 'product_name', 'pickup_location', 'delivery_location', 'status', 'quantity', 'grand_total', 'delivery_charge', 'distance_km', 'placed_at', 'delivered_at')
+        columns, live = store.view(fields)
+        columns = {field: column[live] for field, column in columns.items()}
+        measures = [
+            np.ones(len(columns['quantity'])),
+            columns['quantity'].astype(np.float64),
+            columns['grand_total'],
+            columns['delivery_charge'],
+            columns['distance_km']
+        ]
+        product_ids, product_index = np.unique(columns['product_id'], return_inverse=True)
+        product_categories = [self._category(product_id) for product_id in product_ids.tolist()]
+        category_names = sorted(set(product_categories))
+        category_codes = {name: code for code, name in enumerate(category_names)}
+        category_of_product = np.array([category_codes[name] for name in product_categories], dtype=np.int64)
+        dimensions = {
+            'product': (columns['product_name'], store.categories['product_name']),
+            'category': (category_of_product[product_index], category_names),
+            'pickup_city': (columns['pickup_location'], store.categories['pickup_location']),
+            'delivery_city': (columns['delivery_location'], store.categories['delivery_location'])
+        }
+        delivered = np.zeros(len(columns['status']), dtype=np.bool_)
+        if 'Delivered' in store.categories['status']:
+            delivered = (columns['status'] == store.categories['status'].index('Delivered')) & (columns['delivered_at'] != MISSING)
+        selections = {
+            PLACED: (np.ones(len(delivered), dtype=np.bool_), columns['placed_at']),
+            DELIVERED: (delivered, columns['delivered_at'])
+        }
+        series = self._empty_series()
+        for event, (selected, times) in selections.items():
+            wall = wall_clock_many(times[selected]) if selected.any() else np.empty(0, dtype=np.int64)
+            for granularity, width in GRANULARITIES.items():
+                starts = wall - wall % width
+                keep = np.ones(len(starts), dtype=np.bool_)
+                target = series[event][granularity]
+                if target.retention is not None and len(starts):
+                    keep = starts >= starts.max() - target.retention
+                self._fill(target, starts[keep], [m[selected][keep] for m in measures], {dimension: (codes[selected][keep], values) for dimension, (codes, values) in dimensions.items()})
+        with self._lock:
+            self._series = series
+
+    @staticmethod
+    def _fill(series, starts, measures, dimensions):
+        bucket_starts, bucket_index = np.unique(starts, return_inverse=True)
+        series.starts = bucket_starts.tolist()
+        series.buckets = [_new_bucket() for _ in series.starts]
+        sums = [np.bincount(bucket_index, weights=m, minlength=len(series.starts)).tolist() for m in measures]
+        for bucket, total in zip(series.buckets, zip(*sums)):
+            bucket['total'] = list(total)
+        for dimension, (codes, values) in dimensions.items():
+            keys, key_index = np.unique(bucket_index.astype(np.int64) * len(values) + codes, return_inverse=True)
+            sums = [np.bincount(key_index, weights=m, minlength=len(keys)).tolist() for m in measures]
+            for key, cell in zip(keys.tolist(), zip(*sums)):
+                b, v = divmod(key, len(values))
+                series.buckets[b][dimension][values[v]] = list(cell)
+
+    def span(self, event=PLACED):
+        """(first, last) daily bucket start in wall-clock seconds, or None without orders."""
+        with self._lock:
+            starts = self._series[event]['day'].starts
+            return (starts[0], starts[-1]) if starts else None
+
+    def covers(self, start, event=PLACED):
+        """Whether hourly buckets are still kept for wall-clock time `start`."""
+        with self._lock:
+            starts = self._series[event]['hour'].starts
+            return bool(starts) and starts[0] <= start
+
+    def totals(self, start, end, event=PLACED, granularity='day'):
+        total = [0.0] * len(MEASURES)
+        with self._lock:
+            for bucket in self._series[event][granularity].between(start, end)[1]:
+                _add_cell(total, bucket['total'])
+        return dict(zip(MEASURES, total))
+
+    def breakdown(self, dimension, start, end, event=PLACED, granularity='day'):
+        """Measure totals per value of `dimension` over [start, end)."""
+        cells = {}
+        with self._lock:
+            for bucket in self._series[event][granularity].between(start, end)[1]:
+                for value, measures in bucket[dimension].items():
+                    _add_cell(cells.setdefault(value, [0.0] * len(MEASURES)), measures)
+        return {value: dict(zip(MEASURES, cell)) for value, cell in cells.items()}
+
+    def series(self, start, end, event=PLACED, granularity='day'):
+        """[(bucket start, totals)] for every bucket in [start, end), empty ones included."""
+        width = GRANULARITIES[granularity]
+        with self._lock:
+            starts, buckets = self._series[event][granularity].between(start, end)
+            filled = dict(zip(starts, (list(bucket['total']) for bucket in buckets)))
+        first = start - start % width
+        return [(at, dict(zip(MEASURES, filled.get(at, [0.0] * len(MEASURES))))) for at in range(first, end, width)]
@@ -0,0 +1 @@
+"""Page modules for app.py, each imported the first time its page is opened."""
@@ -0,0 +1,773 @@
+"""Admin Panel page: the only page that needs pandas and the bulk import/export stack."""
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from bulk_io import FORMATS, detect_format, export_orders, export_products, import_products
+from cache import CACHE, VERSIONS, versioned
+from dispatch import plan_dispatch
+from distances import ASSAM_CITIES
+from matching import VEHICLE_CAPACITIES
+from pricing import QUOTES, distance_matrix
+from profiling import PERF
+from repository import ORDER_STATUSES
+from storage import PRODUCT_CATEGORIES, PRODUCT_FIELDS
+from tariff import get_tariffs
+from timeline import DAY, DELIVERED, PLACED, day_epoch, day_wall_clock, wall_clock_datetime
+from views.common import FEED_REFRESH_SECONDS, catalog_view, city_names, matcher, pagination_controls, repos, rerun_fragment
+
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
+ACTIVITY_LOG_SIZE = 50
+OPEN_ORDER_CHOICES = 200
+
+PRODUCT_TABLE_COLUMNS = ['id', 'name', 'category', 'price', 'stock', 'supplier', 'location']
+ORDER_TABLE_COLUMNS = ['id', 'product_name', 'buyer_name', 'quantity', 'grand_total', 'status', 'timestamp']
+DRIVER_TABLE_COLUMNS = ['id', 'name', 'phone', 'vehicle_type', 'location', 'available']
+
+TREND_EVENTS = {"Placed": PLACED, "Delivered": DELIVERED}
+TREND_DIMENSIONS = {
+    "Product": 'product',
+    "Category": 'category',
+    "Pickup City": 'pickup_city',
+    "Delivery City": 'delivery_city'
+}
+DEFAULT_TREND_DAYS = 30
+
+
+@versioned('catalog')
+def product_options():
+    return {f"{p['name']} (ID: {p['id']})": p['id'] for p in catalog_view()}
+
+
+def column_frame(store, columns, slots=None):
+    # Rows are picked straight out of the column arrays; only the picked
+    # rows are copied, and category codes are decoded for just those rows.
+    arrays, live = store.view(columns)
+    if slots is None:
+        slots = np.flatnonzero(live)
+    return pd.DataFrame({field: store.decode(field, arrays[field][slots]) for field in columns})
+
+
+@versioned('catalog')
+def product_table():
+    return column_frame(repos.products.table.store, PRODUCT_TABLE_COLUMNS)
+
+
+@versioned('drivers')
+def driver_names():
+    return {d['id']: d['name'] for d in repos.drivers.list()}
+
+
+@st.fragment(run_every=FEED_REFRESH_SECONDS)
+def order_activity():
+    with PERF.rerun("fragment.order_activity"):
+        activity = st.session_state.get('order_activity')
+        events = None if activity is None else repos.feed.since(activity['seq'])
+        if events is None:
+            activity = st.session_state.order_activity = {'seq': repos.feed.sequence, 'events': deque(maxlen=ACTIVITY_LOG_SIZE)}
+        elif events:
+            activity['seq'] = events[-1]['seq']
+            activity['events'].extendleft(events)
+        
+        # Delivered includes the archived orders.
+        counts = repos.analytics.status_counts()
+        cols = st.columns(len(ORDER_STATUSES))
+        for col, status in zip(cols, ORDER_STATUSES):
+            col.metric(status, counts.get(status, 0))
+        
+        if activity['events']:
+            st.dataframe(pd.DataFrame([
+                {
+                    'time': datetime.fromtimestamp(event['timestamp']).strftime('%H:%M:%S'),
+                    'event': event['kind'],
+                    'id': event['id'],
+                    'status': event.get('status'),
+                    'driver_id': event.get('driver_id'),
+                    'stock': event.get('stock')
+                }
+                for event in activity['events']
+            ]), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No activity since you opened this page.")
+
+
+@st.fragment
+def admin_manage_products():
+    with PERF.rerun("admin.manage_products"):
+        st.markdown("### Product Management")
+        
+        subtab1, subtab2, subtab3, subtab4 = st.tabs(["➕ Add Product", "✏️ Edit Product", "🗑️ Delete Product", "📥 Bulk Import / Export"])
+        
+        with subtab1:
+            st.markdown("#### Add New Product")
+            with st.form("add_product_admin"):
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    product_name = st.text_input("Product Name *")
+                    category = st.selectbox(
+                        "Category *",
+                        PRODUCT_CATEGORIES
+                    )
+                    price = st.number_input("Price per Unit (₹) *", min_value=0, value=1000)
+                    unit = st.text_input("Unit (e.g., bags, saplings, sets) *", value="units")
+                    min_quantity = st.number_input("Minimum Order Quantity *", min_value=1, value=10)
+                    stock = st.number_input("Available Stock *", min_value=0, value=100)
+                
+                with col2:
+                    supplier_name = st.text_input("Supplier/Business Name *")
+                    location = st.selectbox("Location *", city_names())
+                    weight_kg = st.number_input("Weight per Unit (kg) *", min_value=0.1, value=10.0, step=0.1)
+                    volume_m3 = st.number_input("Volume per Unit (m³) *", min_value=0.1, value=1.0, step=0.1)
+                    description = st.text_area("Product Description *")
+                
+                submitted = st.form_submit_button("➕ Add Product", type="primary")
+                
+                if submitted:
+                    if not product_name or not supplier_name or not description:
+                        st.error("Please fill in all required fields marked with *")
+                    else:
+                        new_product = {
+                            'name': product_name,
+                            'category': category,
+                            'price': price,
+                            'weight_kg': weight_kg,
+                            'volume_m3': volume_m3,
+                            'min_quantity': min_quantity,
+                            'unit': unit,
+                            'supplier': supplier_name,
+                            'location': location,
+                            'coordinates': ASSAM_CITIES[location],
+                            'description': description,
+                            'stock': stock
+                        }
+                        new_product = repos.products.add(new_product)
+                        distance_matrix().add(new_product['coordinates'])
+                        st.success(f"✅ Product '{product_name}' added successfully!")
+                        st.balloons()
+        
+        products = catalog_view()
+        product_choices = product_options()
+        
+        with subtab2:
+            st.markdown("#### Edit Existing Product")
+            
+            if len(products) == 0:
+                st.info("No products available to edit.")
+            else:
+                selected_product_name = st.selectbox("Select Product to Edit", list(product_choices.keys()))
+                selected_product_id = product_choices[selected_product_name]
+                
+                product_to_edit = repos.products.get(selected_product_id)
+                
+                with st.form("edit_product_admin"):
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        edit_name = st.text_input("Product Name *", value=product_to_edit['name'])
+                        edit_category = st.selectbox(
+                            "Category *",
+                            PRODUCT_CATEGORIES,
+                            index=PRODUCT_CATEGORIES.index(product_to_edit['category']) if product_to_edit['category'] in PRODUCT_CATEGORIES else 0
+                        )
+                        edit_price = st.number_input("Price per Unit (₹) *", min_value=0, value=product_to_edit['price'])
+                        edit_unit = st.text_input("Unit *", value=product_to_edit['unit'])
+                        edit_min_quantity = st.number_input("Minimum Order Quantity *", min_value=1, value=product_to_edit['min_quantity'])
+                        edit_stock = st.number_input("Available Stock *", min_value=0, value=product_to_edit['stock'])
+                    
+                    with col2:
+                        edit_supplier = st.text_input("Supplier/Business Name *", value=product_to_edit['supplier'])
+                        edit_location = st.selectbox("Location *", city_names(), index=city_names().index(product_to_edit['location']) if product_to_edit['location'] in ASSAM_CITIES.keys() else 0)
+                        edit_weight = st.number_input("Weight per Unit (kg) *", min_value=0.1, value=float(product_to_edit['weight_kg']), step=0.1)
+                        edit_volume = st.number_input("Volume per Unit (m³) *", min_value=0.1, value=float(product_to_edit['volume_m3']), step=0.1)
+                        edit_description = st.text_area("Product Description *", value=product_to_edit['description'])
+                    
+                    submitted = st.form_submit_button("💾 Save Changes", type="primary")
+                    
+                    if submitted:
+                        repos.products.update(
+                            selected_product_id,
+                            name=edit_name,
+                            category=edit_category,
+                            price=edit_price,
+                            unit=edit_unit,
+                            min_quantity=edit_min_quantity,
+                            stock=edit_stock,
+                            supplier=edit_supplier,
+                            location=edit_location,
+                            coordinates=ASSAM_CITIES[edit_location],
+                            weight_kg=edit_weight,
+                            volume_m3=edit_volume,
+                            description=edit_description
+                        )
+                        
+                        st.success(f"✅ Product '{edit_name}' updated successfully!")
+                        rerun_fragment()
+        
+        with subtab3:
+            st.markdown("#### Delete Product")
+            
+            if len(products) == 0:
+                st.info("No products available to delete.")
+            else:
+                selected_product_name = st.selectbox("Select Product to Delete", list(product_choices.keys()), key="delete_select")
+                selected_product_id = product_choices[selected_product_name]
+                
+                product_to_delete = repos.products.get(selected_product_id)
+                
+                st.warning(f"⚠️ You are about to delete: **{product_to_delete['name']}**")
+                st.write(f"Category: {product_to_delete['category']}")
+                st.write(f"Price: ₹{product_to_delete['price']:,}")
+                st.write(f"Stock: {product_to_delete['stock']} {product_to_delete['unit']}")
+                
+                col1, col2, col3 = st.columns([1, 1, 2])
+                with col1:
+                    if st.button("🗑️ Confirm Delete", type="primary"):
+                        repos.products.delete(selected_product_id)
+                        st.success(f"✅ Product deleted successfully!")
+                        rerun_fragment()
+                with col2:
+                    st.button("Cancel")
+        
+        with subtab4:
+            st.markdown("#### Bulk Import")
+            st.caption(f"CSV or Parquet with columns: {', '.join(PRODUCT_FIELDS)}. Rows are matched to existing products by supplier and name; matches are updated, the rest are added.")
+            catalog_file = st.file_uploader("Catalog file", type=["csv", "parquet"])
+            if catalog_file is not None and st.button("📥 Import Catalog", type="primary"):
+                try:
+                    with st.spinner("Importing..."):
+                        report = import_products(repos, catalog_file, detect_format(catalog_file.name))
+                except ValueError as e:
+                    st.error(f"Import failed: {e}")
+                else:
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("Rows Read", f"{report['rows']:,}")
+                    with col2:
+                        st.metric("Added", f"{report['created']:,}")
+                    with col3:
+                        st.metric("Updated", f"{report['updated']:,}")
+                    with col4:
+                        st.metric("Rejected", f"{report['rejected']:,}")
+                    if report['errors']:
+                        st.dataframe(
+                            pd.DataFrame([{'row': e['row'], 'errors': "; ".join(e['errors'])} for e in report['errors']]),
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                        if report['rejected'] > len(report['errors']):
+                            st.caption(f"Showing the first {len(report['errors']):,} of {report['rejected']:,} rejected rows.")
+                    else:
+                        st.success("✅ Every row was imported.")
+            
+            st.markdown("#### Export")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                export_kind = st.selectbox("Data", ["Products", "Orders"], key="export_kind")
+            with col2:
+                export_format = st.selectbox("Format", FORMATS, key="export_format")
+            with col3:
+                st.write("")
+                if st.button("Prepare Export"):
+                    exporter = export_products if export_kind == "Products" else export_orders
+                    st.session_state.export_file = (
+                        f"inde_{export_kind.lower()}.{export_format}",
+                        b"".join(exporter(repos.storage, export_format))
+                    )
+            if st.session_state.get('export_file'):
+                file_name, data = st.session_state.export_file
+                st.download_button(f"⬇️ Download {file_name}", data, file_name=file_name, on_click="ignore")
+        
+        st.markdown("---")
+        st.markdown("### All Products")
+        if len(products) > 0:
+            st.dataframe(product_table(), use_container_width=True)
+        else:
+            st.info("No products listed yet.")
+
+
+@st.fragment
+def admin_orders():
+    with PERF.rerun("admin.orders"):
+        st.markdown("### Live Activity")
+        order_activity()
+        
+        st.markdown("### All Orders")
+        archive = repos.storage.archive
+        if len(repos.orders) > 0 or len(archive) > 0:
+            placed = st.date_input("Placed between", value=(), key="admin_orders_placed")
+            # Newest first; only the page on screen is pulled out of the columns.
+            # Compaction swaps in a new store, so the page keeps the one it read.
+            if len(placed) == 2:
+                start_at, end_at = day_epoch(placed[0]), day_epoch(placed[1] + timedelta(days=1))
+                order_ids = repos.order_times.between(start_at, end_at)[::-1]
+                total = len(order_ids)
+            else:
+                store = repos.orders.table.store
+                slots = np.flatnonzero(store.view(())[1])[::-1]
+                total = len(slots)
+            page_number, page_size = pagination_controls("admin_orders", total)
+            start = (page_number - 1) * page_size
+            if len(placed) == 2:
+                store, page = repos.orders.table.slots(order_ids[start:start + page_size])
+            else:
+                page = slots[start:start + page_size]
+            if total > 0:
+                st.dataframe(
+                    column_frame(store, ORDER_TABLE_COLUMNS, page),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            elif len(placed) == 2:
+                st.info("No live orders placed in this date range.")
+            else:
+                st.info("No orders in flight.")
+            
+            if len(archive) > 0:
+                st.markdown("#### Archived Orders")
+                if len(placed) == 2:
+                    archived_total = archive.count(start_at, end_at)
+                    if archived_total > 0:
+                        page_number, page_size = pagination_controls("admin_archive", archived_total)
+                        rows = archive.between(start_at, end_at, offset=(page_number - 1) * page_size, limit=page_size)
+                        st.dataframe(pd.DataFrame(rows, columns=ORDER_TABLE_COLUMNS), use_container_width=True, hide_index=True)
+                    else:
+                        st.info("No archived orders placed in this date range.")
+                else:
+                    st.caption(f"{len(archive):,} delivered orders are archived. Pick dates above to list them, or look one up by ID.")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                lookup_id = st.number_input("Look up order by ID", min_value=1, step=1, value=None, key="admin_order_lookup")
+                if lookup_id is not None:
+                    order = repos.orders.get(int(lookup_id))
+                    if order is None:
+                        st.info(f"No order #{int(lookup_id)}.")
+                    else:
+                        st.dataframe(pd.DataFrame([order]), use_container_width=True, hide_index=True)
+                        if order['id'] not in repos.orders.table:
+                            st.caption("From the archive.")
+            with col2:
+                st.write("")
+                if st.button("🗄️ Archive Delivered Orders Now"):
+                    moved = repos.orders.archive_delivered(int(time.time()) + 1)
+                    st.success(f"✅ Archived {moved} delivered orders.")
+        else:
+            st.info("No orders placed yet.")
+        
+        # The newest open orders; the dispatch planner covers the whole backlog.
+        open_order_ids = sorted(repos.orders.table.ids(status='Order Placed'), reverse=True)[:OPEN_ORDER_CHOICES]
+        if len(open_order_ids) > 0:
+            st.markdown("#### Suggested Drivers for Open Orders")
+            order_to_match = st.selectbox(
+                "Open Order",
+                [repos.orders.get(order_id) for order_id in open_order_ids],
+                format_func=lambda o: f"Order #{o['id']} - {o['product_name']} ({o['weight_kg']} kg, {o['volume_m3']} m³) from {o['pickup_location']}"
+            )
+            suggestions = matcher.drivers_for_order(order_to_match, k=5)
+            if suggestions:
+                st.dataframe(
+                    pd.DataFrame([
+                        {'driver': d['name'], 'vehicle_type': d['vehicle_type'], 'location': d['location'], 'phone': d['phone'], 'distance_to_pickup_km': km}
+                        for d, km in suggestions
+                    ]),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                st.info("No available driver can carry this load.")
+
+
+@st.fragment
+def admin_drivers():
+    with PERF.rerun("admin.drivers"):
+        st.markdown("### Registered Drivers")
+        drivers = repos.drivers.list()
+        if len(drivers) > 0:
+            st.dataframe(pd.DataFrame(drivers, columns=DRIVER_TABLE_COLUMNS), use_container_width=True)
+        else:
+            st.info("No drivers registered yet.")
+
+
+@st.fragment
+def admin_analytics():
+    with PERF.rerun("admin.analytics"):
+        st.markdown("### Analytics")
+        
+        aggregates = repos.analytics.snapshot()
+        if aggregates['order_count'] > 0:
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("#### Orders by Status")
+                st.bar_chart(pd.Series(aggregates['count_by_status'], name='count').sort_values(ascending=False))
+            
+            with col2:
+                st.markdown("#### Revenue by Product")
+                st.bar_chart(aggregates['revenue_by_product'])
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("#### Units Sold by Product")
+                st.bar_chart(aggregates['units_by_product'])
+            
+            with col2:
+                st.markdown("#### Delivery Fees by Driver")
+                names = driver_names()
+                fees_by_driver = {names.get(driver_id, f"Driver #{driver_id}"): fee for driver_id, fee in aggregates['fees_by_driver'].items()}
+                if fees_by_driver:
+                    st.bar_chart(fees_by_driver)
+                else:
+                    st.info("No jobs accepted yet.")
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("#### Revenue by Pickup City")
+                st.bar_chart(aggregates['revenue_by_pickup_city'])
+            
+            with col2:
+                st.markdown("#### Revenue by Delivery City")
+                st.bar_chart(aggregates['revenue_by_delivery_city'])
+            
+            if st.button("🔍 Verify Aggregates Against Order History"):
+                mismatched = repos.analytics.verify(repos.orders.history())
+                if mismatched:
+                    repos.analytics.rebuild(repos.orders.history())
+                    st.warning(f"Rebuilt drifted counters: {', '.join(mismatched)}")
+                else:
+                    st.success("✅ All aggregates match the order history.")
+        else:
+            st.info("No order data available for analytics.")
+
+
+@st.fragment
+def admin_trends():
+    with PERF.rerun("admin.trends"):
+        st.markdown("### Trends")
+        
+        span = repos.rollups.span()
+        if span is None:
+            st.info("No order data available for trends.")
+            return
+        first_day, last_day = (wall_clock_datetime(at).date() for at in span)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            date_range = st.date_input(
+                "Date range",
+                value=(max(first_day, last_day - timedelta(days=DEFAULT_TREND_DAYS - 1)), last_day),
+                key="trend_range"
+            )
+        with col2:
+            event = TREND_EVENTS[st.radio("Count orders when", list(TREND_EVENTS), horizontal=True, key="trend_event")]
+        with col3:
+            dimension_label = st.selectbox("Break down by", list(TREND_DIMENSIONS), key="trend_dimension")
+        
+        if len(date_range) != 2:
+            st.caption("Pick the last day of the range.")
+            return
+        start, end = day_wall_clock(date_range[0]), day_wall_clock(date_range[1]) + DAY
+        
+        totals = repos.rollups.totals(start, end, event)
+        cols = st.columns(5)
+        cols[0].metric("Orders", f"{totals['orders']:,.0f}")
+        cols[1].metric("Units", f"{totals['units']:,.0f}")
+        cols[2].metric("Revenue", f"₹{totals['revenue']:,.2f}")
+        cols[3].metric("Delivery Fees", f"₹{totals['delivery_fees']:,.2f}")
+        cols[4].metric("Distance", f"{totals['km']:,.0f} km")
+        
+        # A single day is drawn by the hour while its hourly buckets are still kept.
+        granularity = 'hour' if end - start == DAY and repos.rollups.covers(start, event) else 'day'
+        series = repos.rollups.series(start, end, event, granularity)
+        trend = pd.DataFrame(
+            [measures for _, measures in series],
+            index=pd.Index([wall_clock_datetime(at) for at, _ in series], name='time')
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(f"#### Revenue per {granularity}")
+            st.bar_chart(trend['revenue'])
+        with col2:
+            st.markdown(f"#### Orders per {granularity}")
+            st.line_chart(trend['orders'])
+        
+        st.markdown(f"#### By {dimension_label}")
+        breakdown = repos.rollups.breakdown(TREND_DIMENSIONS[dimension_label], start, end, event)
+        if breakdown:
+            st.dataframe(
+                pd.DataFrame.from_dict(breakdown, orient='index').rename_axis(dimension_label).sort_values('revenue', ascending=False),
+                use_container_width=True
+            )
+        else:
+            st.info("No orders in this date range.")
+
+
+@st.fragment
+def admin_dispatch_planner():
+    with PERF.rerun("admin.dispatch_planner"):
+        st.markdown("### Load Consolidation & Multi-Drop Dispatch")
+        st.markdown("Groups all open orders into truckloads that fit the registered fleet and sequences pickups and drops to minimise km.")
+        
+        if st.button("🧮 Plan Dispatch", type="primary"):
+            st.session_state.dispatch_plan = plan_dispatch(repos)
+        
+        plan = st.session_state.get('dispatch_plan')
+        if plan is None:
+            st.info(f"{repos.orders.table.count(status='Order Placed')} open orders waiting for dispatch.")
+        elif plan['orders'] == 0 and not plan['unassignable_order_ids']:
+            st.info("No open orders to plan.")
+        else:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Trucks", plan['after']['trips'], plan['after']['trips'] - plan['before']['trips'], delta_color="inverse")
+            with col2:
+                st.metric("Total km", f"{plan['after']['km']:,.0f}", f"{plan['after']['km'] - plan['before']['km']:,.0f}", delta_color="inverse")
+            with col3:
+                st.metric("Fill Rate", f"{plan['after']['fill_rate']:.0%}", f"{plan['after']['fill_rate'] - plan['before']['fill_rate']:+.0%}")
+            st.caption(f"Before consolidation: {plan['before']['trips']} trucks, {plan['before']['km']:,.0f} km, {plan['before']['fill_rate']:.0%} fill. Planned {plan['orders']} orders in {plan['seconds']}s.")
+            
+            if plan['unassignable_order_ids']:
+                st.warning(f"Orders too large for any registered vehicle: {', '.join(f'#{i}' for i in plan['unassignable_order_ids'])}")
+            
+            if plan['routes']:
+                st.dataframe(
+                    pd.DataFrame([
+                        {
+                            'vehicle_type': r['vehicle_type'],
+                            'route': " → ".join(r['stops']),
+                            'orders': ", ".join(f"#{i}" for i in r['order_ids']),
+                            'weight_kg': r['weight_kg'],
+                            'volume_m3': r['volume_m3'],
+                            'km': r['km'],
+                            'fill_rate': f"{r['fill_rate']:.0%}"
+                        }
+                        for r in plan['routes']
+                    ]),
+                    use_container_width=True,
+                    hide_index=True
+                )
+
+
+@st.fragment
+def admin_tariffs():
+    with PERF.rerun("admin.tariffs"):
+        st.markdown("### Delivery Tariff")
+        tariffs = get_tariffs()
+        tariff = tariffs.active().tariff
+        st.caption(f"Version {tariffs.version}. Delivery charge = (km × slab rate × vehicle factor + kg × weight rate + m³ × volume rate) × slab multiplier × (1 + regional surcharge), never below the minimum charge. The vehicle is the smallest class that carries the load.")
+        
+        with st.form("tariff_form"):
+            tariff_name = st.text_input("Tariff Name", value=tariff['name'])
+            st.markdown("**Distance Slabs** (leave the last upper bound empty)")
+            slab_rows = st.data_editor(
+                pd.DataFrame(tariff['distance_slabs'], columns=['up_to_km', 'rate_per_km', 'multiplier']),
+                num_rows="dynamic",
+                use_container_width=True,
+                hide_index=True,
+                key="tariff_slabs"
+            )
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                weight_rate = st.number_input("Rate per kg (₹)", min_value=0.0, value=float(tariff['weight_rate_per_kg']), step=0.1)
+            with col2:
+                volume_rate = st.number_input("Rate per m³ (₹)", min_value=0.0, value=float(tariff['volume_rate_per_m3']), step=1.0)
+            with col3:
+                minimum_charge = st.number_input("Minimum Charge (₹)", min_value=0.0, value=float(tariff['minimum_charge']), step=10.0)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**Vehicle Rate Factors** (× per-km rate)")
+                vehicle_rows = st.data_editor(
+                    pd.DataFrame([{'vehicle_type': v, 'factor': tariff['vehicle_rate_factors'].get(v, 1.0)} for v in VEHICLE_CAPACITIES]),
+                    disabled=['vehicle_type'],
+                    use_container_width=True,
+                    hide_index=True,
+                    key="tariff_vehicles"
+                )
+            with col2:
+                st.markdown("**Regional Surcharges** (% on deliveries via a hub)")
+                region_rows = st.data_editor(
+                    pd.DataFrame([{'hub': city, 'surcharge_pct': tariff['region_surcharges'].get(city, 0.0) * 100} for city in city_names()]),
+                    disabled=['hub'],
+                    use_container_width=True,
+                    hide_index=True,
+                    key="tariff_regions"
+                )
+            submitted = st.form_submit_button("💾 Save Tariff", type="primary")
+        
+        if submitted:
+            new_tariff = {
+                'name': tariff_name or tariff['name'],
+                'distance_slabs': [
+                    {
+                        'up_to_km': None if pd.isna(row['up_to_km']) else float(row['up_to_km']),
+                        'rate_per_km': float(row['rate_per_km']),
+                        'multiplier': 1.0 if pd.isna(row['multiplier']) else float(row['multiplier'])
+                    }
+                    for row in slab_rows.dropna(subset=['rate_per_km']).sort_values('up_to_km', na_position='last').to_dict('records')
+                ],
+                'weight_rate_per_kg': weight_rate,
+                'volume_rate_per_m3': volume_rate,
+                'vehicle_rate_factors': dict(zip(vehicle_rows['vehicle_type'], vehicle_rows['factor'].astype(float))),
+                'region_surcharges': {hub: pct / 100 for hub, pct in zip(region_rows['hub'], region_rows['surcharge_pct'].astype(float)) if pct},
+                'minimum_charge': minimum_charge
+            }
+            try:
+                tariffs.save(new_tariff)
+            except ValueError as error:
+                st.error(f"❌ {error}")
+            else:
+                st.success(f"✅ Tariff saved as version {tariffs.version}. New quotes use it immediately.")
+        
+        if st.button("↩️ Reset to Standard Tariff"):
+            tariffs.reset()
+            rerun_fragment()
+
+
+@st.fragment
+def admin_cache():
+    with PERF.rerun("admin.cache"):
+        st.markdown("### View Cache")
+        st.caption("Derived views are cached per catalog/driver version and quotes per tariff version; each is recomputed only after a change.")
+        
+        versions = VERSIONS.snapshot()
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.metric("Catalog Version", versions.get('catalog', 0))
+        with col2:
+            st.metric("Driver Version", versions.get('drivers', 0))
+        with col3:
+            st.metric("City Version", versions.get('cities', 0))
+        with col4:
+            st.metric("Tariff Version", versions.get('tariff', 0))
+        with col5:
+            st.metric("Cached Entries", len(CACHE) + len(QUOTES))
+        
+        cache_stats = CACHE.stats() + QUOTES.stats()
+        if cache_stats:
+            st.dataframe(pd.DataFrame(cache_stats), use_container_width=True, hide_index=True)
+        else:
+            st.info("No cached views yet.")
+        
+        if st.button("Clear Cache"):
+            CACHE.clear()
+            QUOTES.clear()
+            rerun_fragment()
+
+
+@st.fragment
+def admin_performance():
+    with PERF.rerun("admin.performance"):
+        st.markdown("### Performance")
+        st.caption(f"Wall time per instrumented section over the last {PERF.ring_size:,} calls of each. Pages, fragments and admin tabs are timed on every rerun; a fragment that reruns on its own is listed as a rerun of its own.")
+        
+        PERF.profiling = st.toggle("Capture cProfile for the slowest reruns", value=PERF.profiling)
+        
+        perf_summary = PERF.summary()
+        if perf_summary:
+            st.dataframe(
+                pd.DataFrame(perf_summary).sort_values('p95_ms', ascending=False),
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.info("No timings recorded yet.")
+        
+        st.markdown("#### Recent Reruns")
+        recent_reruns = list(PERF.reruns)[-20:][::-1]
+        if recent_reruns:
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        'time': r['timestamp'],
+                        'page': r['page'],
+                        'ms': round(r['seconds'] * 1000, 1),
+                        'slowest sections': ", ".join(
+                            f"{name} {seconds * 1000:.1f} ms ×{calls}"
+                            for name, (calls, seconds) in sorted(r['sections'].items(), key=lambda item: -item[1][1])[:3]
+                        )
+                    }
+                    for r in recent_reruns
+                ]),
+                use_container_width=True,
+                hide_index=True
+            )
+        
+        slowest_profiles = PERF.slowest_profiles()
+        if slowest_profiles:
+            st.markdown("#### Slowest Profiled Reruns")
+            for profile in slowest_profiles:
+                with st.expander(f"{profile['page']} - {profile['seconds'] * 1000:.1f} ms at {profile['timestamp']}"):
+                    st.code(profile['stats'], language=None)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Write Prometheus Metrics"):
+                st.success(f"Metrics written to {PERF.write_metrics()}")
+        with col2:
+            if st.button("Reset Timers"):
+                PERF.reset()
+                rerun_fragment()
+
+
+def render():
+    with PERF.rerun("page.admin_panel"):
+        if not st.session_state.admin_logged_in:
+            st.title("🔐 Admin Login")
+            st.markdown("### Enter admin password to access the control panel")
+            
+            password = st.text_input("Admin Password", type="password")
+            
+            if st.button("Login", type="primary"):
+                if password == ADMIN_PASSWORD:
+                    st.session_state.admin_logged_in = True
+                    st.success("✅ Login successful!")
+                    st.rerun()
+                else:
+                    st.error("❌ Incorrect password. Please try again.")
+        else:
+            col1, col2 = st.columns([6, 1])
+            with col1:
+                st.title("👤 Admin Dashboard")
+                st.markdown("### Platform Overview and Management")
+            with col2:
+                if st.button("Logout"):
+                    st.session_state.admin_logged_in = False
+                    st.rerun()
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Total Products", len(repos.products))
+            with col2:
+                st.metric("Total Orders", repos.analytics.order_count)
+            with col3:
+                st.metric("Registered Drivers", len(repos.drivers))
+            with col4:
+                total_revenue = repos.analytics.total_revenue
+                st.metric("Total Revenue", f"₹{total_revenue:,.2f}")
+            
+            st.markdown("---")
+            
+            admin_views = {
+                "📦 Manage Products": admin_manage_products,
+                "📋 Orders": admin_orders,
+                "🚛 Drivers": admin_drivers,
+                "📊 Analytics": admin_analytics,
+                "📈 Trends": admin_trends,
+                "🗺️ Dispatch Planner": admin_dispatch_planner,
+                "💰 Tariffs": admin_tariffs,
+                "⚡ Cache": admin_cache,
+                "⏱️ Performance": admin_performance
+            }
+            # Only the open tab runs; each view is a fragment, so its own widgets rerun just that view.
+            admin_tabs = st.tabs(list(admin_views), key="admin_tab", on_change="rerun")
+            for tab, view in zip(admin_tabs, admin_views.values()):
+                if tab.open:
+                    with tab:
+                        view()
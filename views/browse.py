@@ -0,0 +1,133 @@
+"""Browse Products page."""
+import streamlit as st
+
+from cache import versioned
+from distances import ASSAM_CITIES
+from pagination import paginate
+from pricing import batch_quote, distance_matrix
+from profiling import PERF, timed
+from views.common import catalog_view, city_names, pagination_controls, repos
+
+COMPACT_COLUMNS = ['id', 'name', 'category', 'price', 'unit', 'min_quantity', 'stock', 'supplier', 'location']
+
+PRODUCT_SORT_OPTIONS = {
+    "Relevance": (None, False),
+    "Price: Low to High": ('price', False),
+    "Price: High to Low": ('price', True),
+    "Stock: High to Low": ('stock', True),
+    "Distance to Me": ('distance_km', False),
+    "Delivery Fee (min. order)": ('delivery_charge', False)
+}
+
+
+@versioned('catalog')
+def filter_options(field):
+    return ["All"] + repos.products.distinct(field)
+
+
+@versioned('catalog', 'tariff', 'cities')
+def delivery_fees(category, location, search, buyer_city):
+    # Minimum-order delivery fee of every product in a catalog_view, for sorting.
+    products = catalog_view(category, location, search)
+    if not products:
+        return []
+    return batch_quote(
+        products,
+        [p['id'] for p in products],
+        [p['min_quantity'] for p in products],
+        buyer_city
+    )['delivery_charge'].to_numpy()
+
+
+@st.fragment
+def product_browser():
+    with PERF.rerun("fragment.browse_products"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            category_filter = st.selectbox(
+                "Filter by Category",
+                filter_options('category')
+            )
+        with col2:
+            location_filter = st.selectbox(
+                "Filter by Location",
+                filter_options('location')
+            )
+        with col3:
+            search_query = st.text_input("Search Products", "")
+            if search_query:
+                suggestions = repos.products.suggest(search_query)
+                if suggestions:
+                    st.caption("Suggestions: " + ", ".join(suggestions))
+        
+        with timed("browse.filter"):
+            filters = (
+                None if category_filter == "All" else category_filter,
+                None if location_filter == "All" else location_filter,
+                search_query
+            )
+            filtered_products = catalog_view(*filters)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sort_by = st.selectbox("Sort by", list(PRODUCT_SORT_OPTIONS))
+        with col2:
+            buyer_city = st.selectbox("Your City (for distance and delivery fee)", city_names())
+        with col3:
+            compact_view = st.toggle("Compact table view", key="browse_compact")
+        
+        with timed("browse.sort"):
+            sort_field, descending = PRODUCT_SORT_OPTIONS[sort_by]
+            sort_values = None
+            if sort_field in ('price', 'stock'):
+                sort_values = [p[sort_field] for p in filtered_products]
+            elif sort_field == 'distance_km':
+                distances = distance_matrix()
+                buyer_idx = distances.index_of(ASSAM_CITIES[buyer_city])
+                sort_values = distances.lookup([distances.index_of(p['coordinates']) for p in filtered_products], buyer_idx) if filtered_products else []
+            elif sort_field == 'delivery_charge':
+                sort_values = delivery_fees(*filters, buyer_city)
+        
+        st.markdown(f"### Showing {len(filtered_products)} Products")
+        
+        page_number, page_size = pagination_controls("browse", len(filtered_products))
+        with timed("browse.paginate"):
+            product_page = paginate(filtered_products, page_number, page_size, sort_values, descending)
+        
+        if product_page.total > 0:
+            st.caption(f"Products {product_page.start + 1}–{product_page.end} of {product_page.total}")
+        
+        with timed("browse.render"):
+            if compact_view:
+                if product_page.items:
+                    st.dataframe(
+                        [{column: row[column] for column in COMPACT_COLUMNS} for row in product_page.items],
+                        use_container_width=True,
+                        hide_index=True
+                    )
+            else:
+                for product in product_page.items:
+                    with st.expander(f"**{product['name']}** - ₹{product['price']:,} per {product['unit']}"):
+                        col1, col2 = st.columns([2, 1])
+                        
+                        with col1:
+                            st.markdown(f"**Category:** {product['category']}")
+                            st.markdown(f"**Description:** {product['description']}")
+                            st.markdown(f"**Supplier:** {product['supplier']}")
+                            st.markdown(f"**Location:** {product['location']}")
+                            st.markdown(f"**Minimum Order:** {product['min_quantity']} {product['unit']}")
+                            st.markdown(f"**Available Stock:** {product['stock']} {product['unit']}")
+                        
+                        with col2:
+                            st.markdown(f"**Specifications:**")
+                            st.markdown(f"- Weight: {product['weight_kg']} kg per {product['unit']}")
+                            st.markdown(f"- Volume: {product['volume_m3']} m³ per {product['unit']}")
+                            st.markdown(f"- Price: ₹{product['price']:,}")
+
+
+def render():
+    with PERF.rerun("page.browse_products"):
+        st.title("🏠 INDE - Browse Wholesale Products")
+        st.markdown("### Convenient bulk ordering for shops, markets, and builders across Assam")
+        
+        product_browser()
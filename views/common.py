@@ -0,0 +1,47 @@
+"""Singletons and helpers shared by the page modules."""
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+from cache import versioned
+from distances import ASSAM_CITIES
+from matching import get_matching_engine
+from pagination import PAGE_SIZES, page_count
+from repository import get_repositories
+from reservations import get_reservations
+
+FEED_REFRESH_SECONDS = 5
+
+repos = get_repositories()
+reservations = get_reservations()
+matcher = get_matching_engine()
+
+
+def pagination_controls(key, total):
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Items per page", PAGE_SIZES, key=f"{key}_page_size")
+    pages = page_count(total, page_size)
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    with col2:
+        page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    return page_number, page_size
+
+
+@versioned('cities')
+def city_names():
+    return sorted(ASSAM_CITIES.keys())
+
+
+@versioned('catalog')
+def catalog_view(category=None, location=None, search=""):
+    return repos.products.list(category=category, location=location, search=search)
+
+
+def rerun_fragment():
+    # A fragment-scoped rerun is only allowed while the fragment is rerunning
+    # on its own; when its widgets fired during a full run, rerun everything.
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
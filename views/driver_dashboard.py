@@ -0,0 +1,224 @@
+"""Driver Dashboard page."""
+import streamlit as st
+
+from cache import versioned
+from distances import ASSAM_CITIES
+from feed import DriverBoard
+from matching import VEHICLE_CAPACITIES
+from pagination import paginate
+from profiling import PERF, timed
+from views.common import FEED_REFRESH_SECONDS, city_names, matcher, pagination_controls, repos, rerun_fragment
+
+COMPACT_JOB_COLUMNS = ['id', 'product_name', 'quantity', 'weight_kg', 'volume_m3', 'pickup_location', 'delivery_location', 'distance_km', 'delivery_charge']
+
+JOB_SORT_OPTIONS = {
+    "Best Match": (None, False),
+    "Newest": ('id', True),
+    "Delivery Fee": ('delivery_charge', True),
+    "Fee per km": ('fee_per_km', True),
+    "Distance: Shortest": ('distance_km', False),
+    "Weight: Lightest": ('weight_kg', False)
+}
+
+
+@versioned('drivers')
+def driver_options():
+    return {f"{d['name']} ({d['vehicle_type']})": d['id'] for d in repos.drivers.list()}
+
+
+@st.fragment(run_every=FEED_REFRESH_SECONDS)
+def driver_job_board(driver_id):
+    # Reruns on its own every few seconds and when its own widgets change;
+    # only feed events since the last run are applied to the driver's board.
+    with PERF.rerun("fragment.driver_jobs"):
+        st.markdown("### Available Delivery Jobs")
+        
+        matched_only = st.toggle("Only show jobs my vehicle can carry (nearest pickup first)", value=True, key="jobs_matched_only")
+        with timed("jobs.filter"):
+            board = st.session_state.get('driver_board')
+            if board is None or board.driver_id != driver_id or board.matched_only != matched_only:
+                board = st.session_state.driver_board = DriverBoard(repos, matcher, driver_id, matched_only)
+            else:
+                board.refresh()
+            available_orders = [job['order'] for job in board.jobs]
+            deadhead_km = {job['order']['id']: job['deadhead_km'] for job in board.jobs if 'deadhead_km' in job}
+        
+        if matched_only:
+            unmatched = repos.orders.open_job_count() - len(available_orders)
+            if unmatched > 0:
+                st.caption(f"{unmatched} other open job(s) are too heavy or bulky for your vehicle. Turn off the filter above to see them.")
+        
+        if len(available_orders) == 0:
+            st.info("No delivery jobs available at the moment. Check back later!")
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                job_sort_by = st.selectbox("Sort jobs by", list(JOB_SORT_OPTIONS))
+            with col2:
+                compact_jobs = st.toggle("Compact table view", key="jobs_compact")
+            
+            with timed("jobs.sort"):
+                sort_field, descending = JOB_SORT_OPTIONS[job_sort_by]
+                if sort_field is None:
+                    sort_values = None
+                elif sort_field == 'fee_per_km':
+                    sort_values = [o['delivery_charge'] / max(o['distance_km'], 1) for o in available_orders]
+                else:
+                    sort_values = [o[sort_field] for o in available_orders]
+            
+            page_number, page_size = pagination_controls("jobs", len(available_orders))
+            with timed("jobs.paginate"):
+                job_page = paginate(available_orders, page_number, page_size, sort_values, descending)
+            st.caption(f"Jobs {job_page.start + 1}–{job_page.end} of {job_page.total}")
+            
+            with timed("jobs.render"):
+                if compact_jobs:
+                    st.dataframe(
+                        [{column: row[column] for column in COMPACT_JOB_COLUMNS} for row in job_page.items],
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                    job_ids = [o['id'] for o in job_page.items]
+                    col1, col2 = st.columns([2, 1])
+                    with col1:
+                        job_to_accept = st.selectbox("Job", job_ids, format_func=lambda x: f"Order #{x}", key="compact_accept_select")
+                    with col2:
+                        if st.button("Accept Selected Job", key="compact_accept"):
+                            accept_job(board, job_to_accept)
+                else:
+                    for order in job_page.items:
+                        with st.expander(f"Order #{order['id']} - {order['product_name']} | ₹{order['delivery_charge']:,.2f} delivery fee"):
+                            col1, col2, col3 = st.columns(3)
+                            
+                            with col1:
+                                st.markdown("**📦 Load Details:**")
+                                st.write(f"Product: {order['product_name']}")
+                                st.write(f"Quantity: {order['quantity']}")
+                                st.write(f"Weight: {order['weight_kg']} kg")
+                                st.write(f"Volume: {order['volume_m3']} m³")
+                            
+                            with col2:
+                                st.markdown("**📍 Route:**")
+                                st.write(f"Pickup: {order['pickup_location']}")
+                                st.write(f"Delivery: {order['delivery_location']}")
+                                st.write(f"Distance: {order['distance_km']} km")
+                                if order['id'] in deadhead_km:
+                                    st.write(f"Your distance to pickup: ~{deadhead_km[order['id']]} km")
+                                st.write(f"Address: {order['delivery_address']}")
+                            
+                            with col3:
+                                st.markdown("**💰 Earnings:**")
+                                st.write(f"Delivery Fee: ₹{order['delivery_charge']:,.2f}")
+                                st.write(f"Buyer: {order['buyer_name']}")
+                                st.write(f"Contact: {order['buyer_phone']}")
+                            
+                            if st.button(f"Accept Job #{order['id']}", key=f"accept_{order['id']}"):
+                                accept_job(board, order['id'])
+        
+        st.markdown("---")
+        st.markdown("### My Active Deliveries")
+        
+        my_deliveries = board.deliveries
+        
+        if len(my_deliveries) == 0:
+            st.info("You have no active deliveries.")
+        else:
+            for delivery in my_deliveries:
+                with st.expander(f"Order #{delivery['id']} - {delivery['status']}"):
+                    st.write(f"**Product:** {delivery['product_name']}")
+                    st.write(f"**Route:** {delivery['pickup_location']} → {delivery['delivery_location']}")
+                    st.write(f"**Buyer:** {delivery['buyer_name']} ({delivery['buyer_phone']})")
+                    
+                    new_status = st.selectbox(
+                        "Update Status",
+                        ["Driver Assigned", "Picked Up", "In Transit", "Delivered"],
+                        index=["Driver Assigned", "Picked Up", "In Transit", "Delivered"].index(delivery['status']),
+                        key=f"status_{delivery['id']}"
+                    )
+                    
+                    if st.button(f"Update Status for Order #{delivery['id']}", key=f"update_{delivery['id']}"):
+                        repos.orders.update_status(delivery['id'], new_status)
+                        st.success(f"Status updated to: {new_status}")
+                        board.refresh()
+                        rerun_fragment()
+
+
+def accept_job(board, order_id):
+    winner = repos.feed.claim(repos.orders, order_id, board.driver_id)
+    if winner is not None and winner['driver_id'] == board.driver_id:
+        st.success(f"✅ Job #{order_id} accepted! Contact buyer to coordinate pickup.")
+        board.refresh()
+        rerun_fragment()
+    else:
+        st.error(f"Job #{order_id} was already taken by another driver.")
+
+
+def render():
+    with PERF.rerun("page.driver_dashboard"):
+        st.title("🚛 Driver Dashboard")
+        st.markdown("### Manage your deliveries and earnings")
+        
+        driver_accounts = driver_options()
+        
+        if len(driver_accounts) > 0:
+            selected_driver_name = st.selectbox(
+                "👤 Select Your Driver Account",
+                options=list(driver_accounts.keys()),
+                index=0 if st.session_state.selected_driver_id is None else list(driver_accounts.values()).index(st.session_state.selected_driver_id) if st.session_state.selected_driver_id in driver_accounts.values() else 0
+            )
+            st.session_state.selected_driver_id = driver_accounts[selected_driver_name]
+            
+            selected_driver = repos.drivers.get(st.session_state.selected_driver_id)
+            st.info(f"📱 Logged in as: **{selected_driver['name']}** | Vehicle: {selected_driver['vehicle_type']} | Location: {selected_driver['location']}")
+            
+            available_for_jobs = st.toggle("🟢 Available for new jobs", value=selected_driver['available'], key=f"available_{selected_driver['id']}")
+            if available_for_jobs != selected_driver['available']:
+                selected_driver = repos.drivers.update(selected_driver['id'], available=available_for_jobs)
+        
+        st.markdown("---")
+        
+        tab1, tab2 = st.tabs(["📋 Available Jobs", "➕ Register as Driver"], key="driver_tab", on_change="rerun")
+        
+        if tab1.open:
+            with tab1:
+                if st.session_state.selected_driver_id is None:
+                    st.warning("⚠️ Please register as a driver first in the 'Register as Driver' tab to view available jobs.")
+                else:
+                    driver_job_board(st.session_state.selected_driver_id)
+        
+        if tab2.open:
+            with tab2:
+                st.markdown("### Register as a Driver")
+                
+                with st.form("driver_registration"):
+                    driver_name = st.text_input("Full Name *")
+                    driver_phone = st.text_input("Contact Number *")
+                    vehicle_type = st.selectbox(
+                        "Vehicle Type *",
+                        list(VEHICLE_CAPACITIES)
+                    )
+                    
+                    driver_location = st.selectbox("Operating Location *", city_names())
+                    
+                    submitted = st.form_submit_button("Register", type="primary")
+                    
+                    if submitted:
+                        if not driver_name or not driver_phone:
+                            st.error("Please fill in all required fields")
+                        else:
+                            capacity_kg, capacity_m3 = VEHICLE_CAPACITIES[vehicle_type]
+                            
+                            new_driver = {
+                                'name': driver_name,
+                                'phone': driver_phone,
+                                'vehicle_type': vehicle_type,
+                                'capacity_kg': capacity_kg,
+                                'capacity_m3': capacity_m3,
+                                'location': driver_location,
+                                'coordinates': ASSAM_CITIES[driver_location],
+                                'available': True
+                            }
+                            new_driver = repos.drivers.add(new_driver)
+                            st.session_state.selected_driver_id = new_driver['id']
+                            st.success(f"✅ Driver registered successfully! Welcome, {driver_name}!")
+                            st.balloons()
@@ -0,0 +1,247 @@
+"""Place Order page."""
+import streamlit as st
+
+from cache import versioned
+from gazetteer import get_gazetteer, nearest_hub
+from pricing import calculate_total_price, quote_cart
+from profiling import PERF
+from repository import new_order, new_parent_order
+from reservations import HOLD_SECONDS, ReservationError
+from storage import InsufficientStockError
+from views.common import catalog_view, city_names, repos, reservations, rerun_fragment
+
+
+@versioned('catalog')
+def product_labels():
+    return [f"{p['name']} (₹{p['price']:,})" for p in catalog_view()]
+
+
+@st.fragment
+def order_form():
+    with PERF.rerun("fragment.place_order"):
+        products = catalog_view()
+        
+        if len(products) == 0:
+            st.warning("No products available. Please add products first.")
+        else:
+            product_names = product_labels()
+            selected_product_idx = st.selectbox("Select Product", range(len(product_names)), format_func=lambda x: product_names[x])
+            selected_product = products[selected_product_idx]
+            
+            st.markdown("---")
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("**Product Details:**")
+                st.info(f"""
+                **{selected_product['name']}**
+                
+                Category: {selected_product['category']}
+                Supplier: {selected_product['supplier']}
+                Location: {selected_product['location']}
+                
+                Base Price: ₹{selected_product['price']:,} per {selected_product['unit']}
+                Minimum Order: {selected_product['min_quantity']} {selected_product['unit']}
+                Stock Available: {selected_product['stock']} {selected_product['unit']}
+                """)
+            
+            with col2:
+                st.markdown("**Order Details:**")
+                buyer_name = st.text_input("Your Name/Business Name")
+                buyer_phone = st.text_input("Contact Number")
+                quantity = st.number_input(
+                    f"Quantity ({selected_product['unit']})",
+                    min_value=selected_product['min_quantity'],
+                    max_value=selected_product['stock'],
+                    value=selected_product['min_quantity'],
+                    step=selected_product['min_quantity']
+                )
+                place_query = st.text_input("Delivery Town, Village or PIN", placeholder="e.g. Sonapur or 782402")
+                place_matches = get_gazetteer().search(place_query) if place_query.strip() else []
+                delivery_place = None
+                if place_matches:
+                    delivery_place = st.selectbox("Matching Places", place_matches, format_func=lambda p: p['label'])
+                elif place_query.strip():
+                    st.caption("No matching place found. Choose the nearest city or add the PIN to your address.")
+                delivery_address = st.text_area("Full Delivery Address")
+                if delivery_place is None and delivery_address:
+                    delivery_place = get_gazetteer().geocode(delivery_address)
+                if delivery_place is None:
+                    delivery_location = st.selectbox("Delivery Location", city_names())
+                    quote_location = delivery_location
+                else:
+                    delivery_location = nearest_hub(delivery_place['coordinates'])
+                    quote_location = delivery_place['label']
+                    st.caption(f"📍 Delivering to {delivery_place['label']} via the {delivery_location} hub")
+                    if delivery_address and delivery_place['pin'] not in delivery_address:
+                        delivery_address = f"{delivery_address}, {delivery_place['label']}"
+            
+            if quantity < selected_product['min_quantity']:
+                st.error(f"Minimum order quantity is {selected_product['min_quantity']} {selected_product['unit']}")
+            else:
+                pricing = calculate_total_price(selected_product, quantity, quote_location)
+                
+                st.markdown("---")
+                st.markdown("### 💰 Price Breakdown")
+                
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Product Cost", f"₹{pricing['product_total']:,.2f}")
+                with col2:
+                    st.metric("Delivery Charge", f"₹{pricing['delivery_charge']:,.2f}")
+                with col3:
+                    st.metric("Distance", f"{pricing['distance_km']} km")
+                with col4:
+                    st.metric("**TOTAL**", f"₹{pricing['grand_total']:,.2f}")
+                
+                st.info(f"💡 Delivery fee calculated based on: Weight ({selected_product['weight_kg']} kg × {quantity}), Volume ({selected_product['volume_m3']} m³ × {quantity}), and Distance ({pricing['distance_km']} km)")
+                
+                previous_reservation_id = st.session_state.reservation_id
+                try:
+                    reservation = reservations.reserve(selected_product['id'], quantity, st.session_state.reservation_holder)
+                except InsufficientStockError:
+                    reservation = None
+                    available = reservations.available(selected_product['id'], st.session_state.reservation_holder)
+                    st.warning(f"⚠️ Only {max(available, 0)} {selected_product['unit']} can be reserved right now because other buyers are holding stock. Please reduce your quantity.")
+                else:
+                    st.caption(f"🔒 {quantity} {selected_product['unit']} held for you for {HOLD_SECONDS // 60} minutes while you complete your order.")
+                if previous_reservation_id is not None and (reservation is None or previous_reservation_id != reservation.id):
+                    reservations.release(previous_reservation_id)
+                st.session_state.reservation_id = reservation.id if reservation else None
+                
+                st.markdown("---")
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    place_clicked = st.button("🚀 Place Order", type="primary", disabled=reservation is None)
+                with col2:
+                    if st.button("🛒 Add to Cart"):
+                        add_to_cart(selected_product['id'], quantity)
+                
+                if place_clicked:
+                    if not buyer_name or not buyer_phone or not delivery_address:
+                        st.error("Please fill in all buyer details")
+                    else:
+                        order = new_order(selected_product, quantity, delivery_location, pricing, buyer_name, buyer_phone, delivery_address)
+                        try:
+                            order = reservations.confirm(reservation.id, order)
+                        except InsufficientStockError:
+                            st.error(f"Sorry, only {repos.products.get(selected_product['id'])['stock']} {selected_product['unit']} left in stock. Please adjust your quantity.")
+                        except ReservationError:
+                            st.session_state.reservation_id = None
+                            st.error("Your stock hold has expired. Please place the order again.")
+                        else:
+                            st.session_state.reservation_id = None
+                            st.success(f"✅ Order #{order['id']} placed successfully! Total: ₹{pricing['grand_total']:,.2f}")
+                            st.balloons()
+                            st.info("Your order has been sent to available drivers. You will be contacted soon!")
+            
+            if st.session_state.cart:
+                cart_section(buyer_name, buyer_phone, delivery_address, delivery_location, quote_location)
+
+
+def add_to_cart(product_id, quantity):
+    cart = [list(line) for line in st.session_state.cart]
+    for line in cart:
+        if line[0] == product_id:
+            line[1] += quantity
+            break
+    else:
+        cart.append([product_id, quantity])
+    st.session_state.cart = cart
+
+
+def release_cart_holds():
+    for reservation_id in st.session_state.cart_reservation_ids:
+        reservations.release(reservation_id)
+    st.session_state.cart_reservation_ids = []
+
+
+def cart_section(buyer_name, buyer_phone, delivery_address, delivery_location, quote_location):
+    st.markdown("---")
+    st.markdown("### 🛒 Your Cart")
+    
+    catalog = {product_id: repos.products.get(product_id) for product_id, _ in st.session_state.cart}
+    cart = [(product_id, quantity) for product_id, quantity in st.session_state.cart if catalog[product_id] is not None]
+    if not cart:
+        st.session_state.cart = []
+        release_cart_holds()
+        st.info("The products in your cart are no longer available.")
+        return
+    quote = quote_cart(catalog, cart, quote_location)
+    
+    st.dataframe(
+        [
+            {
+                'Product': catalog[line['product_id']]['name'],
+                'Quantity': line['quantity'],
+                'Pickup': line['pickup_location'],
+                'Product Cost (₹)': line['product_total'],
+                'Delivery Share (₹)': line['delivery_charge'],
+                'Total (₹)': line['grand_total']
+            }
+            for line in quote['lines']
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+    for number, shipment in enumerate(quote['shipments'], 1):
+        st.caption(f"🚚 Shipment {number}: {len(shipment['lines'])} item(s) from {shipment['pickup_location']}, {shipment['weight_kg']:,.1f} kg over {shipment['distance_km']} km — ₹{shipment['delivery_charge']:,.2f} delivery")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Product Cost", f"₹{quote['product_total']:,.2f}")
+    with col2:
+        savings = quote['separate_delivery_charge'] - quote['delivery_charge']
+        st.metric("Delivery Charge", f"₹{quote['delivery_charge']:,.2f}", delta=f"-₹{savings:,.2f} combined" if savings > 0 else None, delta_color="inverse")
+    with col3:
+        st.metric("**CART TOTAL**", f"₹{quote['grand_total']:,.2f}")
+    
+    previous_ids = st.session_state.cart_reservation_ids
+    try:
+        holds = reservations.reserve_many(cart, f"{st.session_state.reservation_holder}:cart")
+    except InsufficientStockError as error:
+        holds = None
+        st.warning(f"⚠️ {error}. Please reduce that quantity or remove it from your cart.")
+    else:
+        st.caption(f"🔒 Stock for every item in your cart is held for {HOLD_SECONDS // 60} minutes.")
+    hold_ids = [hold.id for hold in holds] if holds else []
+    for reservation_id in previous_ids:
+        if reservation_id not in hold_ids:
+            reservations.release(reservation_id)
+    st.session_state.cart_reservation_ids = hold_ids
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        remove_index = st.selectbox("Item", range(len(cart)), format_func=lambda i: f"{catalog[cart[i][0]]['name']} × {cart[i][1]}", key="cart_remove_select")
+    with col2:
+        if st.button("Remove from Cart"):
+            st.session_state.cart = [list(line) for i, line in enumerate(cart) if i != remove_index]
+            rerun_fragment()
+    
+    if st.button("🚀 Place Cart Order", type="primary", disabled=holds is None):
+        if not buyer_name or not buyer_phone or not delivery_address:
+            st.error("Please fill in all buyer details")
+            return
+        parent, shipments = new_parent_order(catalog, quote, delivery_location, buyer_name, buyer_phone, delivery_address)
+        try:
+            parent, orders = reservations.confirm_many(hold_ids, parent, shipments)
+        except InsufficientStockError:
+            st.error("Sorry, some items in your cart have just run out. Please adjust your cart.")
+        except ReservationError:
+            st.session_state.cart_reservation_ids = []
+            st.error("Your stock hold has expired. Please place the order again.")
+        else:
+            st.session_state.cart = []
+            st.session_state.cart_reservation_ids = []
+            st.success(f"✅ Order #{parent['id']} placed successfully as {len(shipments)} shipment(s) of {len(orders)} item(s)! Total: ₹{parent['grand_total']:,.2f}")
+            st.balloons()
+            st.info("Your order has been sent to available drivers. You will be contacted soon!")
+
+
+def render():
+    with PERF.rerun("page.place_order"):
+        st.title("🛒 Place Your Order")
+        st.markdown("### Select products and get instant delivery pricing")
+        
+        order_form()